@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Compares the memory held by the bit length sets of a large synthetic namespace with and without the interning of
+structurally identical operator trees. Every type of the namespace contains many fields of the same few types,
+including a string type similar to uavcan.primitive.String.1.0, so most of the bit length set expressions are
+repeated many times over.
+Usage: python benchmarks/bit_length_set_sharing.py [number of types] [number of fields per type]
+"""
+
+import gc
+import sys
+import random
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydsdl  # pylint: disable=wrong-import-position
+from pydsdl._bit_length_set import _bit_length_set, _symbolic  # pylint: disable=wrong-import-position
+
+FIELD_TYPES = ["ns.String.1.0", "uint8[<=64]", "float32[3]", "ns.String.1.0[<=4]", "bool", "uint16"]
+
+
+def make_namespace(root: Path, types: int, fields: int) -> None:
+    root.mkdir()
+    (root / "String.1.0.dsdl").write_text("uint8[<=256] value\n@sealed\n")
+    for i in range(types):
+        rng = random.Random(i)  # Every type has a different sequence of fields.
+        body = "".join(f"{rng.choice(FIELD_TYPES)} field_{j}\n" for j in range(fields))
+        (root / f"Type{i}.1.0.dsdl").write_text(body + "@sealed\n")
+
+
+def measure(root: Path) -> "tuple[float, float, int]":
+    gc.collect()
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    types = pydsdl.read_namespace(str(root))
+    for t in types:
+        assert t.bit_length_set.max > 0
+        assert t.bit_length_set.is_aligned_at_byte()
+        for _, offset in t.iterate_fields_with_offsets():
+            offset.is_aligned_at_byte()
+    elapsed = time.perf_counter() - started_at
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    live = len({id(x) for x in gc.get_objects() if isinstance(x, _symbolic.Operator)})
+    del types
+    return elapsed, retained / 1024**2, live
+
+
+def main() -> None:
+    type_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    field_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{type_count} types, {field_count} fields per type, pydsdl {pydsdl.__version__}")
+    print(f"{'':24}{'time':>12}{'retained':>14}{'operators':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        make_namespace(root, type_count, field_count)
+        interned = measure(root)
+        _bit_length_set.intern_operator = _symbolic.MemoizationOperator  # Emulate the absence of interning.
+        try:
+            baseline = measure(root)
+        finally:
+            _bit_length_set.intern_operator = _symbolic.intern_operator
+        for name, (elapsed, retained, live) in (("without interning", baseline), ("with interning", interned)):
+            print(f"{name:24}{elapsed:10.2f} s{retained:10.1f} MiB{live:12}")
+
+
+if __name__ == "__main__":
+    main()
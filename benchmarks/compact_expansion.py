@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Measures the time and the peak memory it takes to expand the bit length sets of delimited types that contain large
+variable-length arrays, both into the set of the elements and into the compact form of arithmetic progressions.
+The expansion into the set is abandoned if it takes longer than the specified time (POSIX only).
+Usage: python benchmarks/compact_expansion.py [array capacity] [timeout in seconds] [repetitions]
+"""
+
+import gc
+import sys
+import time
+import signal
+import tempfile
+import statistics
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydsdl  # pylint: disable=wrong-import-position
+
+TYPES = {
+    "Blob.1.0": "uint8[<={capacity}] data\n@extent {capacity} * 8 + 64\n",
+    "Packet.1.0": "uint8[<={capacity}] data\nuint16[<=256] meta\nbool flag\n@extent ({capacity} + 1024) * 8\n",
+    "Outer.1.0": "Blob.1.0 blob\nPacket.1.0 packet\n@sealed\n",
+    "Batch.1.0": "Packet.1.0[<=4] packets\n@sealed\n",
+}
+
+
+class Timeout(Exception):
+    pass
+
+
+def load(root: Path, name: str) -> pydsdl.BitLengthSet:
+    gc.collect()  # Drop the memoized operators of the previous run (see intern_operator()) so that they are cold.
+    (t,) = [t for t in pydsdl.read_namespace(str(root)) if t.short_name == name]
+    return t.bit_length_set
+
+
+def measure(root: Path, name: str, fun: "callable", repetitions: int, timeout: float) -> "tuple[float, float]":
+    def on_timeout(*_: object) -> None:
+        raise Timeout
+
+    samples = []
+    for _ in range(repetitions):
+        bls = load(root, name)
+        signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            started_at = time.perf_counter()
+            fun(bls)
+            samples.append(time.perf_counter() - started_at)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            del bls  # Otherwise the memoized expansion would be shared with the next run via the interned operators.
+    bls = load(root, name)
+    tracemalloc.start()
+    fun(bls)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(samples) * 1e3, peak / 1024
+
+
+def main() -> None:
+    capacity = int(sys.argv[1]) if len(sys.argv) > 1 else 1023
+    timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    repetitions = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    print(f"uint8[<={capacity}], pydsdl {pydsdl.__version__}")
+    print(f"{'':12}{'elements':>12}{'runs':>6}{'set':>14}{'memory':>14}{'compact':>14}{'memory':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        root.mkdir()
+        for name, text in TYPES.items():
+            (root / f"{name}.dsdl").write_text(text.format(capacity=capacity))
+        for name in sorted(x.split(".")[0] for x in TYPES):
+            bls = load(root, name)
+            row = f"{name:12}{len(bls):12}{len(list(bls.expand_compact().runs())):6}"
+            del bls
+            try:
+                elapsed, memory = measure(root, name, lambda x: x._op.expand(), repetitions, timeout)
+                row += f"{elapsed:11.1f} ms{memory:10.0f} KiB"
+            except Timeout:
+                row += f"{'timed out':>28}"
+            elapsed, memory = measure(root, name, lambda x: x.expand_compact(), repetitions, timeout)
+            print(row + f"{elapsed:11.1f} ms{memory:10.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
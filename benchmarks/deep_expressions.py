@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Measures the time it takes to parse and evaluate very long and very deeply nested expressions with every parser
+backend. The recursion limit is lowered while the expressions are processed to ensure that the stack depth does not
+grow with the size of the expression; where a backend cannot cope, the failure is reported instead of the time.
+Usage: python benchmarks/deep_expressions.py [number of terms] [repetitions]
+"""
+
+import sys
+import time
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydsdl  # pylint: disable=wrong-import-position
+from pydsdl import _dsdl_definition, _data_type_builder, _parser  # pylint: disable=wrong-import-position
+
+RECURSION_LIMIT = 500
+
+
+def make_cases(terms: int) -> "dict[str, str]":
+    return {
+        "flat sum": "uint64 A = " + " + ".join(str(i) for i in range(terms)),
+        "mixed precedence": "@assert " + " || ".join("%d * 2 + 1 == %d" % (i, i * 2 + 1) for i in range(terms)),
+        "nested parentheses": "uint8 A = " + "(" * terms + "1" + ")" * terms,
+        "logical negation": "bool A = " + "!" * terms + "true",
+        "exponent chain": "uint8 A = 1" + " ** 1" * terms,
+        "nested sets": "@assert " + "{" * terms + "1" + "}" * terms + ".count == 1",
+    }
+
+
+def median_ms(fun: "callable", repetitions: int) -> float:
+    samples = []
+    for _ in range(repetitions):
+        started_at = time.perf_counter()
+        fun()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples) * 1e3
+
+
+def main() -> None:
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{terms} terms, recursion limit {RECURSION_LIMIT}, pydsdl {pydsdl.__version__}")
+    print(f"{'':24}" + "".join(f"{backend:>16}" for backend in _parser.PARSER_BACKENDS))
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        root.mkdir()
+        path = root / "Deep.1.0.dsdl"
+        for name, text in make_cases(terms).items():
+            path.write_text(text + "\n@sealed\n")
+            definition = _dsdl_definition.DSDLDefinition(path, root)
+            row = f"{name:24}"
+            for backend in _parser.PARSER_BACKENDS:
+
+                def run() -> None:
+                    ast = _parser.parse_ast(definition.text, backend=backend)
+                    _parser.evaluate(ast, _data_type_builder.DataTypeBuilder(definition, [], lambda *_: None, False))
+
+                original_limit = sys.getrecursionlimit()
+                sys.setrecursionlimit(RECURSION_LIMIT)
+                try:
+                    row += f"{median_ms(run, repetitions):13.2f} ms"
+                except RecursionError:
+                    row += f"{'RecursionError':>16}"
+                finally:
+                    sys.setrecursionlimit(original_limit)
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Measures the time it takes a fresh process to import the library and parse the first definition
+with and without the precompiled grammar. Usage: python benchmarks/grammar_loading.py [repetitions]
+"""
+
+import sys
+import shutil
+import tempfile
+import subprocess
+import statistics
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import time
+started_at = time.perf_counter()
+import pydsdl
+imported_at = time.perf_counter()
+from pydsdl import _parser
+_parser._get_grammar().parse("uint8 a\\n@sealed\\n")
+parsed_at = time.perf_counter()
+print(imported_at - started_at, parsed_at - imported_at)
+"""
+
+
+def measure(package_dir: Path, repetitions: int) -> "tuple[float, float]":
+    samples = []
+    for _ in range(repetitions):
+        out = subprocess.check_output([sys.executable, "-c", PROBE], cwd=package_dir, text=True)
+        imported, parsed = map(float, out.split())
+        samples.append((imported, parsed))
+    return statistics.median(x for x, _ in samples), statistics.median(x for _, x in samples)
+
+
+def main() -> None:
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    with tempfile.TemporaryDirectory() as directory:
+        package_dir = Path(directory)
+        shutil.copytree(ROOT_DIR / "pydsdl", package_dir / "pydsdl", ignore=shutil.ignore_patterns("__pycache__"))
+        # Warm up the bytecode cache so that the compilation of the sources is not measured.
+        subprocess.check_call([sys.executable, "-c", "import pydsdl"], cwd=package_dir)
+        artifact = package_dir / "pydsdl" / "grammar.pickle"
+        artifact.unlink(missing_ok=True)
+        results = {"text grammar": measure(package_dir, repetitions)}
+        compile_grammar = f"from pydsdl import _parser; _parser.compile_grammar(_parser.Path({str(artifact)!r}))"
+        subprocess.check_call([sys.executable, "-c", compile_grammar], cwd=package_dir)
+        results["precompiled grammar"] = measure(package_dir, repetitions)
+    for name, (imported, parsed) in results.items():
+        print(f"{name:20}  import: {imported * 1e3:7.1f} ms  first parse: {parsed * 1e3:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
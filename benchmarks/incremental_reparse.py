@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Compares the time it takes to process a large service definition from scratch against an incremental reparse
+after a single-line edit near the beginning, in the middle, and near the end of the definition.
+Usage: python benchmarks/incremental_reparse.py [number of fields per section] [repetitions]
+"""
+
+import sys
+import time
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydsdl  # pylint: disable=wrong-import-position
+
+
+def make_text(fields: int) -> str:
+    section = "".join(
+        f"# Field {i}\nuint{8 * (1 + i % 4)}[<=4] field_{i}\nuint16 CONST_{i} = {i} * 2 + 1\n" for i in range(fields)
+    )
+    return f"# Request\n\n{section}@assert CONST_0 == 1\n@sealed\n---\n# Response\n\n{section}@sealed\n"
+
+
+def median_ms(fun: "callable", repetitions: int) -> float:
+    samples = []
+    for _ in range(repetitions):
+        started_at = time.perf_counter()
+        fun()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples) * 1e3
+
+
+def main() -> None:
+    fields = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 11
+    text = make_text(fields)
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        root.mkdir()
+        path = root / "Service.1.0.dsdl"
+
+        print(f"{text.count(chr(10))} lines, pydsdl {pydsdl.__version__}")
+        elapsed = median_ms(lambda: pydsdl.parse_incremental(text, path, root), repetitions)
+        print(f"{'from scratch':24} {elapsed:8.2f} ms")
+        result = pydsdl.parse_incremental(text, path, root)
+        assert result.error is None, result.error
+        for where in (0.05, 0.5, 0.95):
+            offset = text.index("= ", int(len(text) * where)) + 2
+            updated = result.reparse(offset, offset, "1 + ")
+            assert updated.error is None, updated.error
+            elapsed = median_ms(lambda: result.reparse(offset, offset, "1 + "), repetitions)
+            print(f"{'edit at %.0f%%' % (where * 100):24} {elapsed:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Measures the time it takes to decode multi-kilobyte string literals, both in isolation and as part of
+the processing of a definition that embeds them in assertions.
+Usage: python benchmarks/string_literals.py [literal size in KiB] [repetitions]
+"""
+
+import sys
+import time
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydsdl  # pylint: disable=wrong-import-position
+from pydsdl import _parser  # pylint: disable=wrong-import-position
+from pydsdl._dsdl_definition import DSDLDefinition  # pylint: disable=wrong-import-position
+
+
+def make_literals(size: int) -> "dict[str, str]":
+    plain = "The quick brown fox jumps over the lazy dog. "
+    escaped = r"Line\tone\r\nQuote \"two\" é\U0001F600 "
+    return {
+        "plain text": '"' + (plain * (size // len(plain) + 1))[:size] + '"',
+        "sparse escapes": '"' + (plain * 20 + escaped) * (size // (len(plain) * 20 + len(escaped)) + 1) + '"',
+        "dense escapes": '"' + escaped * (size // len(escaped) + 1) + '"',
+    }
+
+
+def median_ms(fun: "callable", repetitions: int) -> float:
+    samples = []
+    for _ in range(repetitions):
+        started_at = time.perf_counter()
+        fun()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples) * 1e3
+
+
+def main() -> None:
+    size = int(sys.argv[1]) * 1024 if len(sys.argv) > 1 else 64 * 1024
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 11
+    print(f"{size // 1024} KiB literals, pydsdl {pydsdl.__version__}")
+    print(f"{'':24}{'decode':>16}{'definition':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        root.mkdir()
+        path = root / "Strings.1.0.dsdl"
+        for name, literal in make_literals(size).items():
+            path.write_text(f"@assert {literal} == {literal}\n@print {literal}\nuint8 x\n@sealed\n")
+            decode = median_ms(lambda: _parser._parse_string_literal(literal), repetitions)
+            process = median_ms(lambda: DSDLDefinition(path, root).read([], lambda *_: None, False), repetitions)
+            print(f"{name:24}{decode:13.2f} ms{process:13.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Measures the construction and the querying of the bit length sets of wide structures with and without
+the simplification of the symbolic expressions. The queries are those that code generators typically perform:
+the bounds and the alignment of the structure and of the offset of every field. The depth of the resulting
+expression tree is reported as well; deep trees may exhaust the stack when queried.
+Usage: python benchmarks/wide_structures.py [number of fields] [repetitions]
+"""
+
+import sys
+import time
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydsdl  # pylint: disable=wrong-import-position
+from pydsdl import _serializable  # pylint: disable=wrong-import-position
+from pydsdl._bit_length_set import _bit_length_set, _symbolic  # pylint: disable=wrong-import-position
+
+_MODE = _serializable.PrimitiveType.CastMode.SATURATED
+_U8 = _serializable.UnsignedIntegerType(8, _MODE)
+LAYOUTS = {
+    "fixed-length fields": [
+        _U8,
+        _serializable.UnsignedIntegerType(16, _MODE),
+        _serializable.FloatType(32, _MODE),
+        _serializable.FixedLengthArrayType(_U8, 4),
+    ],
+    "with bit fields": [
+        _U8,
+        _serializable.BooleanType(_MODE),
+        _serializable.UnsignedIntegerType(3, _MODE),
+        _serializable.VoidType(4),
+    ],
+    "with variable arrays": [
+        _U8,
+        _serializable.VariableLengthArrayType(_serializable.UnsignedIntegerType(16, _MODE), 8),
+        _serializable.FloatType(32, _MODE),
+        _serializable.VariableLengthArrayType(_U8, 32),
+    ],
+}
+
+
+def run(field_types: "list[_serializable.SerializableType]") -> "tuple[int, int, int]":
+    bls = _serializable.StructureType.aggregate_bit_length_sets(field_types)
+    offset = pydsdl.BitLengthSet(0)
+    for t in field_types:
+        offset = offset.pad_to_alignment(t.alignment_requirement)
+        assert offset.min <= offset.max
+        offset.is_aligned_at_byte()
+        offset = offset + t.bit_length_set
+    bls.pad_to_alignment(8).is_aligned_at_byte()
+    depth, pending = 0, [(bls._op, 1)]  # pylint: disable=protected-access
+    while pending:
+        op, level = pending.pop()
+        depth = max(depth, level)
+        inner = _symbolic._unwrap(op)  # pylint: disable=protected-access
+        children = getattr(inner, "_children", [getattr(inner, "_child", None)])
+        pending += [(x, level + 1) for x in children if x is not None]
+    return bls.min, bls.max, depth
+
+
+def median_ms(fun: "callable", repetitions: int) -> float:
+    samples = []
+    for _ in range(repetitions):
+        started_at = time.perf_counter()
+        fun()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples) * 1e3
+
+
+def main() -> None:
+    fields = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{fields} fields, pydsdl {pydsdl.__version__}")
+    print(f"{'':24}{'':>16}{'time':>12}{'tree depth':>12}")
+    for name, layout in LAYOUTS.items():
+        field_types = [layout[i % len(layout)] for i in range(fields)]
+        results = {}
+        for variant in ("unsimplified", "simplified"):
+            if variant == "unsimplified":
+                _bit_length_set.simplify = lambda op: op
+            try:
+                elapsed = median_ms(lambda: run(field_types), repetitions)
+                results[variant] = run(field_types)
+            except RecursionError:
+                print(f"{name:24}{variant:>16}{'RecursionError':>24}")
+                continue
+            finally:
+                _bit_length_set.simplify = _symbolic.simplify
+            print(f"{name:24}{variant:>16}{elapsed:9.2f} ms{results[variant][2]:12}")
+        assert len(set(x[:2] for x in results.values())) == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -69,6 +69,13 @@ def test_eol(session):
     session.run("pytest")
 
 
+@nox.session(python=PYTHONS[-1])
+def benchmark(session):
+    for script in sorted((ROOT_DIR / "benchmarks").glob("*.py")):
+        session.log(f"Running benchmark: {script.name}")
+        session.run("python", str(script), *session.posargs)
+
+
 @nox.session(python=PYTHONS)
 def pristine(session):
     """
@@ -26,12 +26,18 @@ _sys.path = [str(_Path(__file__).parent / "third_party")] + _sys.path
 
 # Never import anything that is not available here - API stability guarantees are only provided for the exposed items.
 from ._namespace import read_namespace as read_namespace
+from ._namespace import read_types as read_types
+from ._namespace import check_syntax as check_syntax
+from ._namespace import NamespaceSession as NamespaceSession
+from ._namespace import parse_incremental as parse_incremental
+from ._incremental import ParseResult as ParseResult
 from ._namespace import PrintOutputHandler as PrintOutputHandler
 
 # Error model.
 from ._error import FrontendError as FrontendError
 from ._error import InvalidDefinitionError as InvalidDefinitionError
 from ._error import InternalError as InternalError
+from ._namespace import CollectedErrors as CollectedErrors
 
 # Data type model - meta types.
 from ._serializable import SerializableType as SerializableType
@@ -71,5 +77,6 @@ from ._expression import Set as Set
 from ._serializable import ValueRange as ValueRange
 from ._serializable import Version as Version
 from ._bit_length_set import BitLengthSet as BitLengthSet
+from ._bit_length_set import CompactSet as CompactSet
 
 _sys.path = _original_sys_path
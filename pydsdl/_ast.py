@@ -0,0 +1,339 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+The abstract syntax tree of a DSDL definition produced by the parser (see :func:`pydsdl._parser.parse_ast`).
+The tree is a purely syntactic representation that does not depend on any other definitions, so it can be
+constructed ahead of time (e.g., in a different process), pickled, and evaluated later (possibly multiple times)
+by the semantic analysis pass (see :func:`pydsdl._parser.evaluate`).
+
+Every node carries the line number and the column number where it begins; both are one-based.
+The line number is counted by the ends of lines between the statements, same as the line numbers reported in
+the errors; a line break inside a string literal does not start a new line.
+
+Literals whose interpretation may fail (strings containing escape sequences) are stored as written in the source;
+they are interpreted during the semantic analysis so that the errors are reported in the same order as they occur.
+"""
+
+import copy
+import fractions
+from typing import Any, Iterator, List, Optional, Tuple, TypeVar
+
+
+_N = TypeVar("_N", bound="Node")
+
+
+class Node:
+    __slots__ = ("line", "column")
+
+    def __init__(self, line: int, column: int) -> None:
+        self.line = line
+        self.column = column
+
+    def _fields(self) -> Iterator[Tuple[str, Any]]:
+        for cls in reversed(type(self).__mro__):
+            for name in getattr(cls, "__slots__", ()):
+                yield name, getattr(self, name)
+
+    def walk(self) -> Iterator["Node"]:
+        """
+        The nodes of the subtree including this one in the order they appear in the text (depth-first pre-order).
+        The subtree is traversed without recursion because expressions can be nested arbitrarily deep.
+        """
+        pending: List[Node] = [self]
+        while pending:
+            node = pending.pop()
+            yield node
+            children: List[Node] = []
+            for _, value in node._fields():
+                if isinstance(value, Node):
+                    children.append(value)
+                elif isinstance(value, list):
+                    children += [x for x in value if isinstance(x, Node)]
+            pending += reversed(children)
+
+    def shifted(self: _N, line_delta: int) -> _N:
+        """
+        A copy of the subtree where the line numbers are offset by the specified delta; e.g., when the node is moved
+        because some lines were inserted above it. The original is not modified.
+        The subtree is traversed without recursion because expressions can be nested arbitrarily deep.
+        """
+        root = copy.copy(self)
+        pending: List[Node] = [root]
+        while pending:
+            out = pending.pop()
+            out.line += line_delta
+            for name, value in list(out._fields()):
+                if isinstance(value, Node):
+                    value = copy.copy(value)
+                    pending.append(value)
+                elif isinstance(value, list):
+                    value = [copy.copy(x) if isinstance(x, Node) else x for x in value]
+                    pending += [x for x in value if isinstance(x, Node)]
+                else:
+                    continue
+                setattr(out, name, value)
+        return root
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        assert isinstance(other, Node)
+        pending: List[Tuple[Node, Node]] = [(self, other)]
+        while pending:
+            left, right = pending.pop()
+            for (_, a), (_, b) in zip(left._fields(), right._fields()):
+                if isinstance(a, list) and isinstance(b, list):
+                    if len(a) != len(b):
+                        return False
+                    pairs: Any = zip(a, b)
+                else:
+                    pairs = ((a, b),)
+                for x, y in pairs:
+                    if isinstance(x, Node):
+                        if type(x) is not type(y):
+                            return False
+                        pending.append((x, y))
+                    elif x != y:
+                        return False
+        return True
+
+    def __repr__(self) -> str:
+        return "%s(%s)" % (type(self).__name__, ", ".join("%s=%r" % x for x in self._fields()))
+
+
+# ================================================== Expressions ==================================================
+
+
+class Expression(Node):
+    __slots__ = ()
+
+
+class OperatorChain(Expression):
+    """
+    A sequence of binary operators of the same precedence level, e.g., ``a + b - c``, or a single exponentiation.
+    The operators are applied left to right after all of the operands have been evaluated.
+    The right operand of the attribute reference operator ``.`` is an :class:`AttributeName`.
+    """
+
+    __slots__ = ("operands", "operators")
+
+    def __init__(self, line: int, column: int, operands: List[Expression], operators: List[str]) -> None:
+        super().__init__(line, column)
+        assert len(operands) == len(operators) + 1
+        self.operands = operands
+        self.operators = operators
+
+
+class UnaryOperator(Expression):
+    __slots__ = ("operator", "operand")
+
+    def __init__(self, line: int, column: int, operator: str, operand: Expression) -> None:
+        super().__init__(line, column)
+        self.operator = operator
+        self.operand = operand
+
+
+class Identifier(Expression):
+    """A reference to a top-level entity, such as a constant defined earlier in the same definition."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, line: int, column: int, name: str) -> None:
+        super().__init__(line, column)
+        self.name = name
+
+
+class AttributeName(Expression):
+    __slots__ = ("name",)
+
+    def __init__(self, line: int, column: int, name: str) -> None:
+        super().__init__(line, column)
+        self.name = name
+
+
+class SetLiteral(Expression):
+    __slots__ = ("elements",)
+
+    def __init__(self, line: int, column: int, elements: List[Expression]) -> None:
+        super().__init__(line, column)
+        self.elements = elements
+
+
+class RationalLiteral(Expression):
+    """Integer and real literals."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, line: int, column: int, value: fractions.Fraction) -> None:
+        super().__init__(line, column)
+        self.value = value
+
+
+class StringLiteral(Expression):
+    __slots__ = ("source",)
+
+    def __init__(self, line: int, column: int, source: str) -> None:
+        super().__init__(line, column)
+        self.source = source  # Including the quotes and the escape sequences.
+
+
+class BooleanLiteral(Expression):
+    __slots__ = ("value",)
+
+    def __init__(self, line: int, column: int, value: bool) -> None:
+        super().__init__(line, column)
+        self.value = value
+
+
+# ================================================== Data types ==================================================
+
+
+class Type(Expression):
+    """Data types are also expressions; e.g., ``uint8.MAX``."""
+
+    __slots__ = ()
+
+
+class PrimitiveType(Type):
+    __slots__ = ("cast_mode", "name", "bit_length")
+
+    def __init__(self, line: int, column: int, cast_mode: str, name: str, bit_length: Optional[int]) -> None:
+        super().__init__(line, column)
+        self.cast_mode = cast_mode  # "saturated" or "truncated"
+        self.name = name  # "bool", "uint", "int", or "float"
+        self.bit_length = bit_length  # None for bool
+
+
+class VoidType(Type):
+    __slots__ = ("bit_length",)
+
+    def __init__(self, line: int, column: int, bit_length: int) -> None:
+        super().__init__(line, column)
+        self.bit_length = bit_length
+
+
+class VersionedType(Type):
+    __slots__ = ("name_components", "major", "minor")
+
+    def __init__(self, line: int, column: int, name_components: List[str], major: int, minor: int) -> None:
+        super().__init__(line, column)
+        self.name_components = name_components
+        self.major = major
+        self.minor = minor
+
+
+class ArrayType(Type):
+    __slots__ = ("element_type", "mode", "capacity")
+
+    def __init__(self, line: int, column: int, element_type: Type, mode: str, capacity: Expression) -> None:
+        super().__init__(line, column)
+        self.element_type = element_type
+        self.mode = mode  # "<=", "<", or "" for fixed-length arrays
+        self.capacity = capacity
+
+
+# ================================================== Statements ==================================================
+
+
+class Statement(Node):
+    __slots__ = ()
+
+
+class Constant(Statement):
+    __slots__ = ("type", "name", "value")
+
+    def __init__(self, line: int, column: int, type: Type, name: str, value: Expression) -> None:
+        # pylint: disable=redefined-builtin
+        super().__init__(line, column)
+        self.type = type
+        self.name = name
+        self.value = value
+
+
+class Field(Statement):
+    __slots__ = ("type", "name")
+
+    def __init__(self, line: int, column: int, type: Type, name: str) -> None:
+        # pylint: disable=redefined-builtin
+        super().__init__(line, column)
+        self.type = type
+        self.name = name
+
+
+class PaddingField(Statement):
+    __slots__ = ("type",)
+
+    def __init__(self, line: int, column: int, type: VoidType) -> None:
+        # pylint: disable=redefined-builtin
+        super().__init__(line, column)
+        self.type = type
+
+
+class ServiceResponseMarker(Statement):
+    __slots__ = ()
+
+
+class Directive(Statement):
+    __slots__ = ("name", "expression")
+
+    def __init__(self, line: int, column: int, name: str, expression: Optional[Expression]) -> None:
+        super().__init__(line, column)
+        self.name = name
+        self.expression = expression
+
+
+class Line(Node):
+    """
+    Comments are attached to the statements and to the definition by the semantic analysis,
+    which is why they are kept in the tree along with the empty lines.
+    """
+
+    __slots__ = ("statement", "comment", "empty")
+
+    def __init__(self, line: int, statement: Optional[Statement], comment: Optional[str], empty: bool) -> None:
+        super().__init__(line, 1)
+        self.statement = statement
+        self.comment = comment  # Without the leading "# " or "#".
+        self.empty = empty  # True if the line contains nothing at all, not even whitespace.
+
+
+class Definition(Node):
+    __slots__ = ("lines",)
+
+    def __init__(self, lines: List[Line]) -> None:
+        super().__init__(1, 1)
+        self.lines = lines
+
+
+def _unittest_ast() -> None:
+    import pickle
+
+    tree = Definition(
+        [
+            Line(1, None, "Header", False),
+            Line(
+                2,
+                Constant(2, 1, PrimitiveType(2, 1, "saturated", "uint", 8), "A", RationalLiteral(2, 11, 1)),
+                None,
+                False,
+            ),
+        ]
+    )
+    assert pickle.loads(pickle.dumps(tree)) == tree
+    assert tree != Definition([])
+    assert "Constant(line=2, column=1, type=PrimitiveType(" in repr(tree)
+    assert not hasattr(tree, "__dict__")
+
+    moved = tree.lines[1].shifted(3)
+    assert moved.line == 5 and moved.statement.line == 5 and moved.statement.value.line == 5  # type: ignore
+    assert moved.statement.value.column == 11  # type: ignore
+    assert tree.lines[1].line == 2 and tree.lines[1].statement.value.line == 2  # type: ignore
+    assert moved != tree.lines[1] and moved.shifted(-3) == tree.lines[1]
+
+    deep: Expression = Identifier(1, 1, "x")
+    for _ in range(10000):
+        deep = UnaryOperator(1, 1, "-", deep)
+    assert deep.shifted(1).shifted(-1) == deep
+    assert deep != UnaryOperator(1, 1, "-", Identifier(1, 1, "x"))
@@ -3,3 +3,4 @@
 # Author: Pavel Kirienko <pavel@opencyphal.org>
 
 from ._bit_length_set import BitLengthSet as BitLengthSet
+from ._progression import CompactSet as CompactSet
@@ -4,7 +4,8 @@
 
 import typing
 import warnings
-from ._symbolic import Operator, NullaryOperator, MemoizationOperator
+from ._symbolic import Operator, NullaryOperator, simplify, intern_operator
+from ._progression import CompactSet
 
 
 class BitLengthSet:
@@ -38,15 +39,17 @@ class BitLengthSet:
     def __init__(self, value: typing.Union[typing.Iterable[int], int, Operator, "BitLengthSet"]):
         """
         Accepts any iterable that yields integers (like another bit length set) or a single integer.
+        The expression is simplified (see :func:`simplify`), and structurally identical expressions share the same
+        underlying operator (see :func:`intern_operator`).
         """
         if isinstance(value, BitLengthSet):
             self._op = value._op  # type: Operator
         elif isinstance(value, Operator):
-            self._op = MemoizationOperator(value)
+            self._op = intern_operator(simplify(value))
         elif isinstance(value, int):
-            self._op = NullaryOperator([value])
+            self._op = intern_operator(NullaryOperator([value]))
         else:
-            self._op = NullaryOperator(value)
+            self._op = intern_operator(NullaryOperator(value))
 
     # ========================================  QUERY METHODS  ========================================
 
@@ -122,6 +125,43 @@ class BitLengthSet:
         # The type is reported as iterable[int], not sure yet if we should specialize it further. Time will tell.
         return BitLengthSet(self._op.modulo(int(divisor)))
 
+    def __contains__(self, item: typing.Any) -> bool:
+        """
+        Exact membership test derived analytically.
+
+        >>> b = 16 + BitLengthSet(8).repeat_range(65536)
+        >>> 16 in b, 17 in b, 524304 in b, 524312 in b
+        (True, False, True, False)
+        """
+        return item in self._op.progressions()
+
+    def __len__(self) -> int:
+        """
+        The number of elements derived analytically.
+
+        >>> len(BitLengthSet(0))
+        1
+        >>> len(BitLengthSet([1, 2, 3]))
+        3
+        >>> len(BitLengthSet(1).repeat_range(10**9).pad_to_alignment(8))
+        125000001
+        """
+        return len(self._op.progressions())
+
+    def expand_compact(self) -> CompactSet:
+        """
+        The elements of the set as a sequence of arithmetic progressions ``(start, stride, count)``
+        derived analytically. Unlike the set of the elements, it takes a few runs even for the layouts
+        that contain millions of distinct bit lengths.
+
+        >>> b = BitLengthSet(8).repeat_range(65535) + 16
+        >>> list(b.expand_compact().runs())
+        [(16, 8, 65536)]
+        >>> list((b | {1, 3}).expand_compact().runs())
+        [(1, 2, 2), (16, 8, 65536)]
+        """
+        return self._op.expand_compact()
+
     # ========================================  COMPOSITION METHODS  ========================================
 
     def pad_to_alignment(self, bit_length: int) -> "BitLengthSet":
@@ -264,39 +304,22 @@ class BitLengthSet:
 
     def __iter__(self) -> typing.Iterator[int]:
         """
+        Yields the elements in ascending order produced lazily from :meth:`expand_compact`.
+
         ..  attention::
-            This method triggers slow numerical expansion.
+            The number of the elements may be prohibitively large for data types with complex layout.
 
             You might be tempted to use ``min(foo)`` or ``max(foo)`` for detecting length bounds.
-            This may be effectively incomputable for data types with complex layout.
             Instead, use :attr:`min` and :attr:`max`.
         """
-        return iter(self._op.expand())
-
-    def __len__(self) -> int:
-        """
-        ..  attention::
-            This method triggers slow numerical expansion.
-
-            You might be tempted to use something like ``len(foo) == 1`` for detecting fixed-length sets.
-            This may be effectively incomputable for data types with complex layout.
-            Instead, use :attr:`fixed_length`.
-
-        >>> len(BitLengthSet(0))
-        1
-        >>> len(BitLengthSet([1, 2, 3]))
-        3
-        """
-        return len(self._op.expand())
+        return iter(self.expand_compact())
 
     # ========================================  AUXILIARY METHODS  ========================================
 
     def __eq__(self, other: typing.Any) -> bool:
         """
-        Currently, this method performs an approximate comparison that may yield a false-positive for some operands.
-        This is done to avoid performing the costly numerical expansion of the operands.
-        The implementation may be changed to perform exact comparison in the future if the underlying solver is
-        updated accordingly.
+        Exact comparison derived analytically (numerical expansion is not performed).
+        Operands that are built differently compare equal if they contain the same elements.
 
         >>> BitLengthSet([1, 2, 4]) == {1, 2, 4}
         True
@@ -304,13 +327,16 @@ class BitLengthSet:
         False
         >>> BitLengthSet([123]) == BitLengthSet(123)
         True
+        >>> BitLengthSet(16).repeat_range(3) + {0, 8} == BitLengthSet(8).repeat_range(7)
+        True
+        >>> BitLengthSet(16).repeat_range(3) + {0, 24} == BitLengthSet(8).repeat_range(9)  # Same bounds and residues.
+        False
         """
         try:
             other = BitLengthSet(other)
         except TypeError:
             return NotImplemented
-        divisor = 32
-        return self.min == other.min and self.max == other.max and set(self % divisor) == set(other % divisor)
+        return self._op is other._op or self._op.progressions() == other._op.progressions()
 
     def __hash__(self) -> int:
         """
@@ -400,3 +426,44 @@ def _unittest_bit_length_set() -> None:
 
     with raises(ValueError):
         BitLengthSet([4, 5, 6]).pad_to_alignment(0)
+
+    # Equality and membership are exact even if the sets are too large to expand.
+    a = BitLengthSet(8).repeat_range(10**9)
+    assert a + {0, 8} == a + 8 | 0
+    assert a + {0, 8} != a + {0, 16}
+    assert 8 * 10**9 in a and 8 * 10**9 + 4 not in a and "8" not in a
+    assert len(a.pad_to_alignment(64)) == 10**9 // 8 + 1
+
+    # A large variable-length array in a delimited type is a single run of bit lengths.
+    delimited = 32 + (16 + BitLengthSet(8).repeat_range(65535)).pad_to_alignment(8)
+    assert list(delimited.expand_compact().runs()) == [(48, 8, 65536)]
+    assert list(delimited) == list(range(48, 48 + 8 * 65536, 8))
+
+
+def _unittest_bit_length_set_interning() -> None:
+    import gc
+    import pickle
+    from ._symbolic import _interned_operators
+
+    def make() -> BitLengthSet:
+        string = 16 + BitLengthSet(8).repeat_range(256)
+        return BitLengthSet.concatenate([string.pad_to_alignment(8), BitLengthSet({1, 2}) | 3, string])
+
+    a, b = make(), make()
+    assert a._op is b._op  # pylint: disable=protected-access
+    x, y = BitLengthSet(8).repeat_range(2), BitLengthSet(16).repeat_range(3)
+    assert (x + y)._op is not (y + x)._op  # pylint: disable=protected-access
+    assert BitLengthSet([3, 1, 2])._op is BitLengthSet({1, 2, 3})._op  # pylint: disable=protected-access
+    assert str(a) == "concat({33,34,35},repeat(<=256,{8}),repeat(<=256,{8}))"  # Simplified, too.
+
+    # The memoized results are shared as well.
+    assert sorted(a % 8) == [1, 2, 3]
+    assert a._op._modula is b._op._modula  # type: ignore # pylint: disable=protected-access
+    c = pickle.loads(pickle.dumps(a))
+    assert c == a
+
+    # The registry does not keep the operators alive.
+    size = len(_interned_operators)
+    del a, b, c
+    gc.collect()
+    assert len(_interned_operators) < size
@@ -0,0 +1,442 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+import math
+import array
+import bisect
+import heapq
+import typing
+import itertools
+
+Interval = typing.Tuple[int, int]
+"""
+A closed interval of integers ``[lo, hi]``.
+"""
+
+
+class ProgressionSet:
+    """
+    A finite set of integers in a canonical compressed form: the elements are grouped by their residue modulo the
+    period, and the quotients of each group are kept as a sorted sequence of disjoint non-adjacent closed intervals.
+    In other words, the set is a union of arithmetic progressions whose common difference is the period;
+    e.g., ``{1, 9, 17, 25, 32}`` with the period 8 is ``1 + 8*[0, 3]`` united with ``0 + 8*[4, 4]``.
+
+    The form is unique for a given period, so two sets are equal iff their forms are equal once both are refined
+    to the least common multiple of their periods.
+    The sets that occur in data type layouts (sums of repeated fields, padding) consist of few long progressions,
+    which is why the operations defined here are much cheaper than operating on the elements;
+    the size of the form never exceeds the number of the elements.
+
+    Instances are immutable.
+
+    >>> a = ProgressionSet.from_values(range(0, 800, 8)).repeat_range(1000)
+    >>> a.min, a.max, len(a)
+    (0, 792000, 99001)
+    >>> a
+    ProgressionSet(8, {0: ((0, 99000),)})
+    >>> a == ProgressionSet.from_values(range(0, 792001, 8))
+    True
+    >>> (a + 3).pad_to_alignment(16)
+    ProgressionSet(16, {0: ((1, 49501),)})
+    >>> 792000 in a, 792001 in a
+    (True, False)
+    """
+
+    def __init__(self, period: int, classes: typing.Mapping[int, typing.Iterable[Interval]]) -> None:
+        """
+        The classes map residues in ``[0, period)`` to the intervals of quotients in any order;
+        the intervals are normalized here.
+        """
+        if period < 1:
+            raise ValueError("Invalid period: %r" % period)
+        self._period = int(period)
+        self._classes = {}  # type: typing.Dict[int, typing.Tuple[Interval, ...]]
+        for residue, intervals in classes.items():
+            if not 0 <= residue < period:
+                raise ValueError("Invalid residue %r for period %r" % (residue, period))
+            merged = _merge_intervals(intervals)
+            if merged:
+                self._classes[residue] = merged
+        if not self._classes:
+            raise ValueError("A progression set cannot be empty")
+
+    @staticmethod
+    def from_values(values: typing.Iterable[int]) -> "ProgressionSet":
+        """
+        The period is the greatest common divisor of the differences between the elements,
+        so that they all belong to one residue class.
+        """
+        ordered = sorted(set(values))
+        if not ordered:
+            raise ValueError("A progression set cannot be empty")
+        period = 0
+        for x in ordered:
+            period = math.gcd(period, x - ordered[0])
+        return ProgressionSet(max(period, 1), _group(ordered, max(period, 1)))
+
+    @property
+    def period(self) -> int:
+        return self._period
+
+    @property
+    def min(self) -> int:
+        return min(r + self._period * iv[0][0] for r, iv in self._classes.items())
+
+    @property
+    def max(self) -> int:
+        return max(r + self._period * iv[-1][1] for r, iv in self._classes.items())
+
+    @property
+    def sparse(self) -> bool:
+        """
+        True if every progression consists of one element, so the set can be represented with any period.
+        """
+        return all(lo == hi for intervals in self._classes.values() for lo, hi in intervals)
+
+    def refine(self, period: int) -> "ProgressionSet":
+        """
+        The same set represented with another period. If it is a multiple of the current one, an interval of
+        quotients is split into as many progressions as the factor, or into its individual elements if there are
+        fewer of them; otherwise, the elements are regrouped one by one (see :meth:`refinement_size`).
+
+        >>> ProgressionSet.from_values([0, 2, 4, 6, 10]).refine(4)
+        ProgressionSet(4, {0: ((0, 1),), 2: ((0, 2),)})
+        >>> ProgressionSet.from_values([0, 4, 10]).refine(3)
+        ProgressionSet(3, {0: ((0, 0),), 1: ((1, 1), (3, 3))})
+        """
+        if period == self._period:
+            return self
+        if period < 1:
+            raise ValueError("Invalid period: %r" % period)
+        factor, remainder = divmod(period, self._period)
+        if remainder:
+            return ProgressionSet(period, _group(self._elements(), period))
+        classes = {}  # type: typing.Dict[int, typing.List[Interval]]
+        for r, intervals in self._classes.items():
+            for lo, hi in intervals:
+                if hi - lo + 1 < factor:
+                    for i in range(lo, hi + 1):
+                        classes.setdefault(r + self._period * (i % factor), []).append((i // factor, i // factor))
+                else:
+                    for t in range(factor):  # Each subclass is nonempty because the interval is long enough.
+                        sub = (-((t - lo) // factor), (hi - t) // factor)
+                        classes.setdefault(r + self._period * t, []).append(sub)
+        return ProgressionSet(period, classes)
+
+    def refinement_size(self, period: int) -> int:
+        """
+        An upper bound on the number of progressions in :meth:`refine`, found without performing it.
+        """
+        if period % self._period:
+            return len(self)
+        factor = period // self._period
+        return sum(min(hi - lo + 1, factor) for intervals in self._classes.values() for lo, hi in intervals)
+
+    def pad_to_alignment(self, alignment: int) -> "ProgressionSet":
+        """
+        Rounds every element up to the nearest multiple of the alignment. Once the period is a multiple of the
+        alignment, every residue class is padded as a whole, possibly into the next period.
+        """
+        if alignment < 1:
+            raise ValueError("Invalid alignment: %r" % alignment)
+        period = self._period * alignment // math.gcd(self._period, alignment)
+        classes = {}  # type: typing.Dict[int, typing.List[Interval]]
+        for r, intervals in self.refine(period)._classes.items():
+            carry, residue = divmod(-(-r // alignment) * alignment, period)
+            classes.setdefault(residue, []).extend((lo + carry, hi + carry) for lo, hi in intervals)
+        return _compact(ProgressionSet(period, classes))
+
+    def repeat(self, k: int) -> "ProgressionSet":
+        """
+        The sums of ``k`` elements (repetitions allowed) via repeated squaring, which takes ``O(log k)`` additions.
+        """
+        out = ProgressionSet.from_values([0])
+        base = self
+        while k > 0:
+            if k & 1:
+                out = out + base
+            k >>= 1
+            if k > 0:
+                base = base + base
+        return out
+
+    def repeat_range(self, k_max: int) -> "ProgressionSet":
+        """
+        Up to ``k_max`` elements is exactly ``k_max`` elements of the set extended with zero.
+        """
+        return (self | 0).repeat(k_max)
+
+    def __add__(self, other: typing.Union["ProgressionSet", int]) -> "ProgressionSet":
+        """
+        The sums of all pairs of elements. The sum of two progressions with the same difference is a progression,
+        so the cost depends on the number of intervals rather than elements.
+        """
+        a, b = _coerce(self, other)
+        classes = {}  # type: typing.Dict[int, typing.List[Interval]]
+        for ra, intervals_a in a._classes.items():
+            for rb, intervals_b in b._classes.items():
+                carry, residue = divmod(ra + rb, a._period)
+                out = classes.setdefault(residue, [])
+                for lo_a, hi_a in intervals_a:
+                    out.extend((lo_a + lo_b + carry, hi_a + hi_b + carry) for lo_b, hi_b in intervals_b)
+        return _compact(ProgressionSet(a._period, classes))
+
+    __radd__ = __add__
+
+    def __or__(self, other: typing.Union["ProgressionSet", int]) -> "ProgressionSet":
+        a, b = _coerce(self, other)
+        classes = {r: list(iv) for r, iv in a._classes.items()}  # type: typing.Dict[int, typing.List[Interval]]
+        for r, intervals in b._classes.items():
+            classes.setdefault(r, []).extend(intervals)
+        return _compact(ProgressionSet(a._period, classes))
+
+    __ror__ = __or__
+
+    def __contains__(self, item: typing.Any) -> bool:
+        if not isinstance(item, int):
+            return False
+        intervals = self._classes.get(item % self._period, ())
+        quotient = item // self._period
+        index = bisect.bisect_right(intervals, (quotient, math.inf))
+        return index > 0 and intervals[index - 1][1] >= quotient
+
+    def __len__(self) -> int:
+        return sum(hi - lo + 1 for intervals in self._classes.values() for lo, hi in intervals)
+
+    def __eq__(self, other: typing.Any) -> bool:
+        if not isinstance(other, ProgressionSet):
+            return NotImplemented
+        if self.min != other.min or self.max != other.max:
+            return False
+        a, b = _coerce(self, other)
+        return a._classes == b._classes
+
+    def __hash__(self) -> int:
+        return hash((self.min, self.max, len(self)))
+
+    def _elements(self) -> typing.Iterator[int]:
+        for r, intervals in self._classes.items():
+            for lo, hi in intervals:
+                yield from range(r + self._period * lo, r + self._period * (hi + 1), self._period)
+
+    def __repr__(self) -> str:
+        return "%s(%d, {%s})" % (
+            type(self).__name__,
+            self._period,
+            ", ".join("%d: %r" % (r, self._classes[r]) for r in sorted(self._classes)),
+        )
+
+
+class CompactSet:
+    """
+    A finite set of integers represented as a sorted sequence of runs ``(start, stride, count)``, where every run
+    is the arithmetic progression ``start, start + stride, ..., start + stride * (count - 1)``.
+    The runs are sorted by their start and do not share elements, but they may interleave.
+    They are kept in arrays of machine integers (unless the values do not fit), so the memory footprint is a few dozen
+    bytes per run regardless of the number of elements.
+    The elements are produced lazily in ascending order when iterated.
+
+    Instances are immutable.
+
+    >>> c = CompactSet.from_progressions(ProgressionSet.from_values([3, 5, 7, 16, 24, 32]))
+    >>> list(c.runs())
+    [(3, 2, 3), (16, 8, 3)]
+    >>> list(c), len(c), 24 in c, 25 in c
+    ([3, 5, 7, 16, 24, 32], 6, True, False)
+    """
+
+    def __init__(self, runs: typing.Iterable[typing.Tuple[int, int, int]]) -> None:
+        ordered = sorted(runs)
+        for start, stride, count in ordered:
+            if stride < 1 or count < 1:
+                raise ValueError("Invalid run: %r" % ((start, stride, count),))
+        self._starts = _pack(run[0] for run in ordered)
+        self._strides = _pack(run[1] for run in ordered)
+        self._counts = _pack(run[2] for run in ordered)
+
+    @staticmethod
+    def from_progressions(progressions: ProgressionSet) -> "CompactSet":
+        """
+        The progressions of the set become the runs; the isolated elements that follow a run with the matching stride
+        (or another isolated element) are merged into it, so that sparse sets are compact as well.
+        """
+        out = []  # type: typing.List[typing.List[int]]
+        period = progressions.period
+        for start, stride, count in sorted(
+            (r + period * lo, period, hi - lo + 1)
+            for r, intervals in progressions._classes.items()  # pylint: disable=protected-access
+            for lo, hi in intervals
+        ):
+            if count == 1 and out:
+                last = out[-1]
+                if last[2] == 1:
+                    last[1], last[2] = start - last[0], 2
+                    continue
+                if start == last[0] + last[1] * last[2]:
+                    last[2] += 1
+                    continue
+            out.append([start, stride, count])
+        return CompactSet(map(tuple, out))  # type: ignore
+
+    def runs(self) -> typing.Iterator[typing.Tuple[int, int, int]]:
+        """
+        The ``(start, stride, count)`` tuples in the order of their start.
+        """
+        return zip(self._starts, self._strides, self._counts)
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return heapq.merge(*(range(start, start + stride * count, stride) for start, stride, count in self.runs()))
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def __contains__(self, item: typing.Any) -> bool:
+        if not isinstance(item, int):
+            return False
+        end = bisect.bisect_right(self._starts, item)
+        return any(
+            (item - start) % stride == 0 and (item - start) // stride < count
+            for start, stride, count in itertools.islice(self.runs(), end)
+        )
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (type(self).__name__, list(self.runs()))
+
+
+def _coerce(a: ProgressionSet, b: typing.Union[ProgressionSet, int]) -> typing.Tuple[ProgressionSet, ProgressionSet]:
+    """
+    Refines both operands to a common period: the least common multiple of their periods or either of them,
+    whichever yields fewer progressions. E.g., a set of a few elements adopts the period of the other operand
+    instead of splitting its long progressions.
+    """
+    if isinstance(b, int):
+        b = ProgressionSet.from_values([b])
+    if not isinstance(b, ProgressionSet):
+        raise TypeError("Cannot combine a progression set with %r" % type(b).__name__)
+    candidates = a.period * b.period // math.gcd(a.period, b.period), a.period, b.period
+    period = min(candidates, key=lambda p: a.refinement_size(p) + b.refinement_size(p))
+    return a.refine(period), b.refine(period)
+
+
+def _compact(s: ProgressionSet) -> ProgressionSet:
+    """
+    A sparse set is represented with the period that is the greatest common divisor of the differences between
+    the elements, which may reveal the progressions; e.g., ``{0, 8, 16}`` with the period 1 consists of three
+    progressions but with the period 8 it is one.
+    """
+    return ProgressionSet.from_values(s._elements()) if s.sparse else s  # pylint: disable=protected-access
+
+
+def _pack(values: typing.Iterable[int]) -> typing.Sequence[int]:
+    """
+    Machine integers where possible; arbitrarily large bit lengths are still supported but take more memory.
+    """
+    items = list(values)
+    try:
+        return array.array("q", items)
+    except OverflowError:
+        return tuple(items)
+
+
+def _group(values: typing.Iterable[int], period: int) -> typing.Dict[int, typing.List[Interval]]:
+    out = {}  # type: typing.Dict[int, typing.List[Interval]]
+    for x in values:
+        q = x // period
+        out.setdefault(x % period, []).append((q, q))
+    return out
+
+
+def _merge_intervals(intervals: typing.Iterable[Interval]) -> typing.Tuple[Interval, ...]:
+    out = []  # type: typing.List[Interval]
+    for lo, hi in sorted(intervals):
+        if out and lo <= out[-1][1] + 1:
+            if hi > out[-1][1]:
+                out[-1] = out[-1][0], hi
+        else:
+            out.append((lo, hi))
+    return tuple(out)
+
+
+def _unittest_progression_set() -> None:
+    import random
+    from pytest import raises
+
+    def make(values: typing.Iterable[int]) -> ProgressionSet:
+        return ProgressionSet.from_values(values)
+
+    assert repr(make([5])) == "ProgressionSet(1, {0: ((5, 5),)})"
+    assert repr(make([3, 11, 27])) == "ProgressionSet(8, {3: ((0, 1), (3, 3))})"
+    assert make([3, 11, 27]) == ProgressionSet(4, {3: [(0, 0), (6, 6), (2, 2)]})
+    assert make([3, 11, 27]) != make([3, 11, 19, 27])
+    assert make([3, 11, 27]) != make([3, 27])
+    assert hash(make([3, 11, 27])) == hash(ProgressionSet(16, {3: [(0, 0)], 11: [(0, 0), (1, 1)]}))
+    assert make([1, 2]) + 1 == make([2, 3]) == 1 + make([1, 2])
+    assert make([1, 2]) | 7 == make([1, 2, 7]) == 7 | make([1, 2])
+    assert make([4]).repeat(0) == make([0])
+    assert make([1, 2]) != "12"
+    assert repr(make([0, 8, 16]).refine(12)) == "ProgressionSet(12, {0: ((0, 0),), 4: ((1, 1),), 8: ((0, 0),)})"
+    assert repr(make([0, 8]) | make([8, 16])) == "ProgressionSet(8, {0: ((0, 2),)})"  # Compacted.
+
+    # The common period is chosen to keep the forms small: these would take millions of progressions otherwise.
+    many = make(range(0, 10**6, 24))
+    assert many | make([3, 10**9 + 3]) == make(list(range(0, 10**6, 24)) + [3, 10**9 + 3])
+    assert len(many + make([0, 10**9 + 7])) == 2 * len(many)
+
+    with raises(ValueError):
+        make([])
+    with raises(ValueError):
+        ProgressionSet(0, {0: [(0, 0)]})
+    with raises(ValueError):
+        ProgressionSet(4, {4: [(0, 0)]})
+    with raises(ValueError):
+        ProgressionSet(4, {0: []})
+    with raises(ValueError):
+        make([0]).refine(0)
+    with raises(ValueError):
+        make([0]).pad_to_alignment(0)
+    with raises(TypeError):
+        make([0]) + "1"  # type: ignore  # pylint: disable=expression-not-assigned
+
+    # Compare the operations against the elementwise definitions, including refinement to coprime periods.
+    def values() -> typing.List[int]:
+        return [random.choice([0, 1, 2, 3, 5, 8, 16]) * random.randint(0, 6) for _ in range(random.randint(1, 5))]
+
+    for _ in range(300):
+        xs, ys = values(), values()
+        a, b = make(xs), make(ys)
+        assert a + b == make(x + y for x in xs for y in ys)
+        assert a | b == make(xs + ys)
+        alignment = random.randint(1, 12)
+        assert a.pad_to_alignment(alignment) == make(-(-x // alignment) * alignment for x in xs)
+        k = random.randint(0, 3)
+        assert a.repeat(k) == make(sum(c) for c in itertools.combinations_with_replacement(xs, k))
+        assert a.repeat_range(k) == make(
+            sum(c) for n in range(k + 1) for c in itertools.combinations_with_replacement(xs, n)
+        )
+        assert a.refine(a.period * random.randint(1, 5)) == a
+        assert (a.min, a.max, len(a)) == (min(xs), max(xs), len(set(xs)))
+        assert all((x in a) == (x in xs) for x in range(-2, 100))
+        compact = CompactSet.from_progressions(a | b)
+        assert list(compact) == sorted(set(xs + ys)) and len(compact) == len(set(xs + ys))
+        assert all((x in compact) == (x in xs or x in ys) for x in range(-2, 100))
+
+
+def _unittest_compact_set() -> None:
+    from pytest import raises
+
+    # The interleaving runs are merged when iterated.
+    c = CompactSet.from_progressions(ProgressionSet.from_values(range(0, 64, 8)) + ProgressionSet.from_values([0, 3]))
+    assert repr(c) == "CompactSet([(0, 8, 8), (3, 8, 8)])"
+    assert list(c) == sorted(x + y for x in range(0, 64, 8) for y in (0, 3))
+
+    # The values that do not fit into machine integers are supported.
+    huge = CompactSet([(2**70, 8, 3), (0, 1, 2)])
+    assert list(huge.runs()) == [(0, 1, 2), (2**70, 8, 3)]
+    assert list(huge) == [0, 1, 2**70, 2**70 + 8, 2**70 + 16]
+    assert 2**70 + 8 in huge and 2**70 + 4 not in huge and "0" not in huge
+
+    with raises(ValueError):
+        CompactSet([(0, 0, 1)])
+    with raises(ValueError):
+        CompactSet([(0, 1, 0)])
@@ -7,7 +7,8 @@ import abc
 import math
 import typing
 import logging
-import itertools
+import weakref
+from ._progression import ProgressionSet, CompactSet
 
 
 class Operator(abc.ABC):
@@ -15,8 +16,22 @@ class Operator(abc.ABC):
     Operators are immutable. This allows for aggressive caching and reference-sharing.
     """
 
-    @abc.abstractmethod
     def modulo(self, divisor: int) -> typing.Set[int]:
+        return mask_to_set(self.modulo_mask(divisor))
+
+    @abc.abstractmethod
+    def modulo_mask(self, divisor: int) -> int:
+        """
+        The same as :meth:`modulo` represented as an integer bitmask where bit ``r`` is set
+        iff the set contains at least one element ``x`` such that ``x % divisor == r``.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def progressions(self) -> ProgressionSet:
+        """
+        The exact canonical compressed form of the set (see :class:`ProgressionSet`) derived without expansion.
+        """
         raise NotImplementedError
 
     @property
@@ -29,6 +44,15 @@ class Operator(abc.ABC):
     def max(self) -> int:
         raise NotImplementedError
 
+    @property
+    @abc.abstractmethod
+    def structural_key(self) -> typing.Hashable:
+        """
+        Structurally identical operators have equal keys; see :func:`intern_operator`.
+        The children are referred to by identity, so the keys are only useful with interned children.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def expand(self) -> typing.Set[int]:
         """
@@ -38,6 +62,13 @@ class Operator(abc.ABC):
         """
         raise NotImplementedError
 
+    def expand_compact(self) -> CompactSet:
+        """
+        The same as :meth:`expand` in the compact form derived from :meth:`progressions`,
+        which is feasible also where the numerical expansion is not.
+        """
+        return CompactSet.from_progressions(self.progressions())
+
     @abc.abstractmethod
     def __repr__(self) -> str:
         raise NotImplementedError
@@ -56,8 +87,14 @@ class NullaryOperator(Operator):
             if not isinstance(x, int):
                 raise TypeError("Invalid element for nullary set operator: %r" % x)
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
-        return set(map(lambda x: x % divisor, self._value))
+    def modulo_mask(self, divisor: int) -> int:
+        out = 0
+        for x in self._value:
+            out |= 1 << (x % divisor)
+        return out
+
+    def progressions(self) -> ProgressionSet:
+        return ProgressionSet.from_values(self._value)
 
     @property
     def min(self) -> int:
@@ -67,6 +104,10 @@ class NullaryOperator(Operator):
     def max(self) -> int:
         return max(self._value)
 
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return NullaryOperator, frozenset(self._value)
+
     def expand(self) -> typing.Set[int]:
         return set(self._value)
 
@@ -85,16 +126,17 @@ class PaddingOperator(Operator):
         self._child = child
         self._padding = int(alignment)
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
-        r = self._padding
-        mx = self.max
-        lcm = least_common_multiple(r, divisor)
-        out = set()  # type: typing.Set[int]
-        for x in self._child.modulo(lcm):
-            assert x <= mx and x < lcm
-            out.add(self._pad(x) % divisor)
+    def modulo_mask(self, divisor: int) -> int:
+        # The padded value modulo the divisor depends only on the residue of the original value modulo the LCM.
+        lcm = least_common_multiple(self._padding, divisor)
+        out = 0
+        for x in mask_to_set(self._child.modulo_mask(lcm)):
+            out |= 1 << (self._pad(x) % divisor)
         return out
 
+    def progressions(self) -> ProgressionSet:
+        return self._child.progressions().pad_to_alignment(self._padding)
+
     @property
     def min(self) -> int:
         return self._pad(self._child.min)
@@ -103,6 +145,10 @@ class PaddingOperator(Operator):
     def max(self) -> int:
         return self._pad(self._child.max)
 
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return PaddingOperator, self._padding, self._child
+
     def expand(self) -> typing.Set[int]:
         return set(map(self._pad, self._child.expand()))
 
@@ -118,32 +164,74 @@ class ConcatenationOperator(Operator):
     """
     Given a set of children, transforms them into a single bit length set expression where each item is the
     elementwise sum of the cartesian product of the children's bit length sets.
+
+    The optional ``evaluate_as`` is an equivalent sequence of operands that is used instead of the children to find
+    the bounds and the residues; e.g., the operands before the nested concatenations were flattened, whose memoized
+    results can be reused. Being a sum, the result does not depend on the order of the operands.
     """
 
-    def __init__(self, children: typing.Iterable[Operator]) -> None:
+    def __init__(
+        self, children: typing.Iterable[Operator], evaluate_as: typing.Optional[typing.Iterable[Operator]] = None
+    ) -> None:
         self._children = list(children)
         if not self._children:
             raise ValueError("This operator is not defined on zero operands")
+        self._operands = list(evaluate_as) if evaluate_as is not None else self._children
+
+    def modulo_mask(self, divisor: int) -> int:
+        for ch in self._pending_operands(lambda x: divisor in x._modula):  # pylint: disable=protected-access
+            ch.modulo_mask(divisor)
+        out = 1  # The residue of the empty sum.
+        for ch in self._operands:
+            out = convolve_modulo_masks(out, ch.modulo_mask(divisor), divisor)
+        return out
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
-        # Take the modulus from each child and find all combinations.
-        # The computational complexity is tightly bounded because the cardinality of the modulus set is less than
-        # the bit length operand.
-        mods = [ch.modulo(divisor) for ch in self._children]
-        prod = itertools.product(*mods)
-        sums = set(map(sum, prod))
-        return {x % divisor for x in sums}
+    def progressions(self) -> ProgressionSet:
+        for ch in self._pending_operands(lambda x: x._progressions is not None):  # pylint: disable=protected-access
+            ch.progressions()
+        out = ProgressionSet.from_values([0])
+        for ch in self._operands:
+            out = out + ch.progressions()
+        return out
+
+    def _pending_operands(
+        self, evaluated: typing.Callable[["MemoizationOperator"], bool]
+    ) -> typing.List["MemoizationOperator"]:
+        """
+        The operands may be concatenations that are evaluated through their own operands, and so on, as deep as
+        the structure is long. This method finds the memoized ones that are not evaluated yet, innermost first,
+        so that the caller can evaluate them in this order to bound the stack depth.
+        """
+        pending = [self]  # type: typing.List[ConcatenationOperator]
+        nested = []  # type: typing.List[MemoizationOperator]
+        while pending:
+            for ch in pending.pop()._operands:  # pylint: disable=protected-access
+                if not isinstance(ch, MemoizationOperator) or evaluated(ch):
+                    continue
+                inner = ch._child  # pylint: disable=protected-access
+                if type(inner) is ConcatenationOperator:  # pylint: disable=unidiomatic-typecheck
+                    nested.append(ch)
+                    pending.append(inner)
+        nested.reverse()
+        return nested
 
     @property
     def min(self) -> int:
-        return sum(x.min for x in self._children)
+        return sum(x.min for x in self._operands)
 
     @property
     def max(self) -> int:
-        return sum(x.max for x in self._children)
+        return sum(x.max for x in self._operands)
+
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return (ConcatenationOperator,) + tuple(self._children)
 
     def expand(self) -> typing.Set[int]:
-        return {sum(el) for el in itertools.product(*(x.expand() for x in self._children))}
+        out = {0}
+        for x in self._children:
+            out = _sum_sets(out, x.expand())
+        return out
 
     def __repr__(self) -> str:
         return "concat(%s)" % ",".join(map(repr, self._children))
@@ -159,21 +247,11 @@ class RepetitionOperator(Operator):
         self._k = int(k)
         self._child = child
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
-        # Values of k > divisor will yield repeated entries so we can apply a reduction,
-        # but the equivalent k modulo divisor shall be the same as k modulo divisor.
-        # This is because the solution doesn't converge at k -> inf:
-        #   {sum(x) % 2 for x in combinations_with_replacement({1, 3}, 2)} == {0}
-        #   {sum(x) % 2 for x in combinations_with_replacement({1, 3}, 3)} == {1}
-        #   {sum(x) % 2 for x in combinations_with_replacement({1, 3}, 4)} == {0}
-        #   {sum(x) % 2 for x in combinations_with_replacement({1, 3}, 5)} == {1}
-        # etc.
-        equivalent_k = min(self._k, divisor + self._k % divisor)
-        assert (self._k % divisor) == (equivalent_k % divisor), (divisor, self._k)
-        return {
-            (sum(el) % divisor)
-            for el in itertools.combinations_with_replacement(self._child.modulo(divisor), equivalent_k)
-        }
+    def modulo_mask(self, divisor: int) -> int:
+        return power_modulo_mask(self._child.modulo_mask(divisor), self._k, divisor)
+
+    def progressions(self) -> ProgressionSet:
+        return self._child.progressions().repeat(self._k)
 
     @property
     def min(self) -> int:
@@ -183,8 +261,12 @@ class RepetitionOperator(Operator):
     def max(self) -> int:
         return self._child.max * self._k
 
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return RepetitionOperator, self._k, self._child
+
     def expand(self) -> typing.Set[int]:
-        return {sum(el) for el in itertools.combinations_with_replacement(self._child.expand(), self._k)}
+        return _power_set(self._child.expand(), self._k)
 
     def __repr__(self) -> str:
         return "repeat(%d,%r)" % (self._k, self._child)
@@ -200,18 +282,12 @@ class RangeRepetitionOperator(Operator):
         self._k_max = int(k_max)
         self._child = child
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
-        single = self._child.modulo(divisor)
-        assert isinstance(single, set)
-        # Values of k > divisor will yield repeated entries so we can apply a reduction (see non-range case above).
-        # This holds only if the argument does not contain repeated entries which is guaranteed by `set`.
-        equivalent_k_max = min(self._k_max, divisor + self._k_max % divisor)
-        assert (self._k_max % divisor) == (equivalent_k_max % divisor), (divisor, self._k_max)
-        out = set()  # type: typing.Set[int]
-        for k in range(equivalent_k_max + 1):
-            for el in itertools.combinations_with_replacement(single, k):
-                out.add(sum(el) % divisor)
-        return out
+    def modulo_mask(self, divisor: int) -> int:
+        # Up to k_max copies of the child is exactly k_max copies of the child extended with the zero residue.
+        return power_modulo_mask(self._child.modulo_mask(divisor) | 1, self._k_max, divisor)
+
+    def progressions(self) -> ProgressionSet:
+        return self._child.progressions().repeat_range(self._k_max)
 
     @property
     def min(self) -> int:
@@ -221,14 +297,12 @@ class RangeRepetitionOperator(Operator):
     def max(self) -> int:
         return self._child.max * self._k_max
 
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return RangeRepetitionOperator, self._k_max, self._child
+
     def expand(self) -> typing.Set[int]:
-        ch = self._child.expand()
-        assert isinstance(ch, set)
-        out = set()  # type: typing.Set[int]
-        for k in range(self._k_max + 1):
-            for el in itertools.combinations_with_replacement(ch, k):
-                out.add(sum(el))
-        return out
+        return _power_set(self._child.expand() | {0}, self._k_max)  # See modulo_mask().
 
     def __repr__(self) -> str:
         return "repeat(<=%d,%r)" % (self._k_max, self._child)
@@ -240,10 +314,16 @@ class UnionOperator(Operator):
         if not self._children:
             raise ValueError("This operator is not defined on zero operands")
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
-        out = set()  # type: typing.Set[int]
+    def modulo_mask(self, divisor: int) -> int:
+        out = 0
         for x in self._children:
-            out |= x.modulo(divisor)
+            out |= x.modulo_mask(divisor)
+        return out
+
+    def progressions(self) -> ProgressionSet:
+        out = self._children[0].progressions()
+        for x in self._children[1:]:
+            out = out | x.progressions()
         return out
 
     @property
@@ -254,6 +334,10 @@ class UnionOperator(Operator):
     def max(self) -> int:
         return max(x.max for x in self._children)
 
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return (UnionOperator,) + tuple(self._children)
+
     def expand(self) -> typing.Set[int]:
         out = set()  # type: typing.Set[int]
         for x in self._children:
@@ -274,16 +358,22 @@ class MemoizationOperator(Operator):
         self._child = child
         self._min = None  # type: typing.Optional[int]
         self._max = None  # type: typing.Optional[int]
-        self._modula = {}  # type: typing.Dict[int, typing.Set[int]]
+        self._modula = {}  # type: typing.Dict[int, int]
+        self._progressions = None  # type: typing.Optional[ProgressionSet]
         self._expansion = None  # type: typing.Optional[typing.Set[int]]
 
-    def modulo(self, divisor: int) -> typing.Set[int]:
+    def modulo_mask(self, divisor: int) -> int:
         try:
             return self._modula[divisor]
         except LookupError:
-            self._modula[divisor] = self._child.modulo(divisor)
+            self._modula[divisor] = self._child.modulo_mask(divisor)
         return self._modula[divisor]
 
+    def progressions(self) -> ProgressionSet:
+        if self._progressions is None:
+            self._progressions = self._child.progressions()
+        return self._progressions
+
     @property
     def min(self) -> int:
         if self._min is None:
@@ -296,6 +386,10 @@ class MemoizationOperator(Operator):
             self._max = self._child.max
         return self._max
 
+    @property
+    def structural_key(self) -> typing.Hashable:
+        return self._child.structural_key
+
     def expand(self) -> typing.Set[int]:
         if self._expansion is None:
             from time import monotonic
@@ -327,6 +421,98 @@ class MemoizationOperator(Operator):
         return repr(self._child)  # Not sure if we should indicate our presence considering that we're a no-op
 
 
+def simplify(op: Operator) -> Operator:
+    """
+    Rewrites the operator into a simpler equivalent one, assuming that its children are already simplified
+    (which is the case when the operators are constructed bottom-up), so only the top of the tree is examined:
+
+    - A fixed-length operator becomes a constant; e.g., ``repeat(k,{c})`` becomes ``{k*c}``.
+    - Padding of a child that is already aligned is removed.
+    - Nested concatenations and unions are flattened; their constant children are folded into one constant
+      as long as the result is not too large. A concatenation or a union of one operand is replaced with it.
+
+    >>> simplify(PaddingOperator(NullaryOperator([8, 24]), 8))
+    {8,24}
+    >>> simplify(RepetitionOperator(NullaryOperator([3]), 5))
+    {15}
+    >>> simplify(ConcatenationOperator([NullaryOperator([1, 2]), RangeRepetitionOperator(NullaryOperator([8]), 4),
+    ...                                 ConcatenationOperator([NullaryOperator([3]), NullaryOperator([0, 8])])]))
+    concat({4,5,12,13},repeat(<=4,{8}))
+    """
+    inner = _unwrap(op)
+    if isinstance(inner, NullaryOperator):
+        return op
+    if op.min == op.max:
+        return NullaryOperator([op.min])
+    if isinstance(inner, PaddingOperator):
+        if inner._child.modulo_mask(inner._padding) == 1:  # pylint: disable=protected-access
+            return inner._child  # pylint: disable=protected-access
+    elif isinstance(inner, (ConcatenationOperator, UnionOperator)):
+        kind = type(inner)
+        children = []  # type: typing.List[Operator]
+        variables = []  # type: typing.List[Operator]
+        constants = []  # type: typing.List[Operator]
+        for ch in inner._children:  # pylint: disable=protected-access
+            ch_inner = _unwrap(ch)
+            for x in ch_inner._children if type(ch_inner) is kind else [ch]:  # type: ignore
+                children.append(x)
+                if type(_unwrap(x)) is NullaryOperator:  # pylint: disable=unidiomatic-typecheck
+                    constants.append(_unwrap(x))
+                else:
+                    variables.append(x)
+        if len(constants) > 1:
+            if kind is UnionOperator:
+                folded = set().union(*(x.expand() for x in constants))  # type: typing.Set[int]
+            else:
+                folded = {0}
+                for x in constants:
+                    folded = {a + b for a in folded for b in x.expand()}
+                    if len(folded) > _CONSTANT_FOLDING_LIMIT:
+                        break
+            if len(folded) <= _CONSTANT_FOLDING_LIMIT:
+                children = [intern_operator(NullaryOperator(folded))] + variables
+        if len(children) == 1:
+            return children[0]
+        if children != inner._children:  # pylint: disable=protected-access
+            if kind is ConcatenationOperator:
+                return ConcatenationOperator(children, evaluate_as=inner._children)  # pylint: disable=protected-access
+            return kind(children)
+    return op
+
+
+def _unwrap(op: Operator) -> Operator:
+    while type(op) is MemoizationOperator:  # pylint: disable=unidiomatic-typecheck
+        op = op._child  # pylint: disable=protected-access
+    return op
+
+
+_CONSTANT_FOLDING_LIMIT = 1024
+"""
+Constant children of a concatenation are not folded if the result would contain more elements than this.
+"""
+
+
+def intern_operator(op: Operator) -> Operator:
+    """
+    Returns the memoized operator that is structurally identical to the argument, creating and registering
+    a new one if there is none; constants are not memoized because there is nothing to compute.
+    The operators built from the interned ones are interned in turn, so identical expressions (e.g., the layout
+    of a type that is used in many fields) are represented by a single shared node with a single set of memoized
+    results.
+    The registry does not keep the operators alive: an entry is dropped once its operator is no longer referenced.
+    """
+    key = op.structural_key
+    try:
+        return _interned_operators[key]
+    except LookupError:
+        pass
+    out = op if isinstance(op, (MemoizationOperator, NullaryOperator)) else MemoizationOperator(op)
+    return _interned_operators.setdefault(key, out)
+
+
+_interned_operators = weakref.WeakValueDictionary()  # type: weakref.WeakValueDictionary[typing.Hashable, Operator]
+
+
 def least_common_multiple(a: int, b: int) -> int:
     """
     This replicates :func:`math.lcm` to support Python <3.9.
@@ -334,6 +520,76 @@ def least_common_multiple(a: int, b: int) -> int:
     return abs(a * b) // math.gcd(a, b)
 
 
+def mask_to_set(mask: int) -> typing.Set[int]:
+    """
+    Converts a residue bitmask into the set of the indexes of its set bits.
+    """
+    out = set()  # type: typing.Set[int]
+    while mask:
+        low = mask & -mask
+        out.add(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+def convolve_modulo_masks(a: int, b: int, divisor: int) -> int:
+    """
+    Given the residue bitmasks of two sets, finds the residue bitmask of the sums of all pairs of their elements,
+    which is the OR of the cyclic rotations of one mask by every residue in the other.
+    The cost is linear in the number of residues in the sparser mask, each step being an operation on a
+    ``divisor``-bit integer.
+    """
+    if bin(a).count("1") > bin(b).count("1"):
+        a, b = b, a
+    full = (1 << divisor) - 1
+    out = 0
+    while a and out != full:
+        low = a & -a
+        shift = low.bit_length() - 1
+        out |= ((b << shift) | (b >> (divisor - shift))) & full
+        a ^= low
+    return out
+
+
+def power_modulo_mask(mask: int, k: int, divisor: int) -> int:
+    """
+    The residue bitmask of the sums of ``k`` elements of the set (repetitions allowed) via repeated squaring,
+    which takes ``O(log k)`` convolutions. The empty sum (``k = 0``) yields the zero residue.
+    """
+    out = 1
+    while k > 0:
+        if k & 1:
+            out = convolve_modulo_masks(out, mask, divisor)
+        k >>= 1
+        if k > 0:
+            mask = convolve_modulo_masks(mask, mask, divisor)
+    return out
+
+
+def _sum_sets(a: typing.Set[int], b: typing.Set[int]) -> typing.Set[int]:
+    """
+    The elementwise sums of all pairs; unlike enumerating the combinations of all operands at once,
+    this takes time proportional to the size of the result times the size of the smaller operand.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    return {x + y for x in a for y in b}
+
+
+def _power_set(s: typing.Set[int], k: int) -> typing.Set[int]:
+    """
+    The sums of ``k`` elements (repetitions allowed) via repeated squaring like :func:`power_modulo_mask`.
+    """
+    out = {0}
+    while k > 0:
+        if k & 1:
+            out = _sum_sets(out, s)
+        k >>= 1
+        if k > 0:
+            s = _sum_sets(s, s)
+    return out
+
+
 def validate_numerically(op: Operator) -> None:
     """
     Validates the correctness of symbolic derivations by comparing the results against reference values
@@ -346,6 +602,8 @@ def validate_numerically(op: Operator) -> None:
     assert max(s) == op.max
     for div in range(1, 65):
         assert op.modulo(div) == {x % div for x in s}, div
+    assert op.progressions() == ProgressionSet.from_values(s)
+    assert list(op.expand_compact()) == sorted(s)
 
 
 _POISON_SLOW_EXPANSION_SECONDS = float(os.environ.get("PYDSDL_POISON_SLOW_EXPANSION_SECONDS", "999999999"))
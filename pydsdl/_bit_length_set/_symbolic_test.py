@@ -5,6 +5,7 @@
 import typing
 import random
 import itertools
+import math
 from ._symbolic import NullaryOperator, validate_numerically
 
 
@@ -293,3 +294,128 @@ def _unittest_repr() -> None:
     )
     validate_numerically(op)
     assert repr(op) == "(pad(4,{1,2,3,4,5,6,7,8})|concat({8,16},{96,112,120},repeat(<=8,{64}))|repeat(2,({32}|{40})))"
+
+
+def _unittest_modulo_masks() -> None:
+    import time
+    from ._symbolic import (
+        Operator,
+        PaddingOperator,
+        ConcatenationOperator,
+        RepetitionOperator,
+        RangeRepetitionOperator,
+        UnionOperator,
+        mask_to_set,
+        convolve_modulo_masks,
+        power_modulo_mask,
+    )
+
+    assert mask_to_set(0) == set()
+    assert mask_to_set(0b1011) == {0, 1, 3}
+    assert convolve_modulo_masks(0b11, 0b101, 4) == 0b1111  # {0,1} + {0,2} = {0,1,2,3}
+    assert convolve_modulo_masks(0b1000, 0b1000, 4) == 0b100  # 3 + 3 = 6 = 2 (mod 4)
+    assert power_modulo_mask(0b1010, 0, 7) == 1
+    assert power_modulo_mask(0b10, 9, 7) == 1 << 2
+
+    def make(depth: int) -> Operator:
+        choice = random.randint(0, 5) if depth > 0 else 0
+        if choice == 0:
+            return NullaryOperator(random.randint(0, 40) for _ in range(random.randint(1, 4)))
+        if choice == 1:
+            return PaddingOperator(make(depth - 1), random.randint(1, 16))
+        if choice == 2:
+            return ConcatenationOperator(make(depth - 1) for _ in range(random.randint(1, 3)))
+        if choice == 3:
+            return RepetitionOperator(make(depth - 1), random.randint(0, 3))
+        if choice == 4:
+            return RangeRepetitionOperator(make(depth - 1), random.randint(0, 3))
+        return UnionOperator(make(depth - 1) for _ in range(random.randint(1, 3)))
+
+    for _ in range(30):
+        validate_numerically(make(3))
+
+    # These would be intractable with the combinatorial solution.
+    started_at = time.monotonic()
+    op = RangeRepetitionOperator(RepetitionOperator(NullaryOperator(range(8, 1000, 24)), 10**9), 10**12)
+    for div in range(1, 4097, 97):
+        assert op.modulo(div) == {x % div for x in range(0, 8 * div, math.gcd(8, div))}
+    assert set(RepetitionOperator(NullaryOperator([64]), 10**9 + 1).modulo(1000)) == {64 * (10**9 + 1) % 1000}
+    assert time.monotonic() - started_at < 10.0
+
+
+def _unittest_simplify() -> None:
+    from ._symbolic import (
+        Operator,
+        PaddingOperator,
+        ConcatenationOperator,
+        RepetitionOperator,
+        RangeRepetitionOperator,
+        UnionOperator,
+        simplify,
+    )
+
+    assert repr(simplify(RepetitionOperator(NullaryOperator([8]), 1000))) == "{8000}"
+    assert repr(simplify(RangeRepetitionOperator(NullaryOperator([0]), 1000))) == "{0}"
+    assert repr(simplify(PaddingOperator(RangeRepetitionOperator(NullaryOperator([16]), 4), 8))) == "repeat(<=4,{16})"
+    assert repr(simplify(PaddingOperator(RangeRepetitionOperator(NullaryOperator([12]), 4), 8))).startswith("pad(8,")
+    nested = UnionOperator([NullaryOperator([1]), UnionOperator([NullaryOperator([2]), NullaryOperator([3])])])
+    assert repr(simplify(nested)) == "{1,2,3}"
+    wide = ConcatenationOperator([RangeRepetitionOperator(NullaryOperator([8]), 2)])
+    assert repr(simplify(wide)) == "repeat(<=2,{8})"
+    big = [NullaryOperator(range(0, 1000, 7)), NullaryOperator(range(0, 10000, 1000)), wide]
+    assert repr(simplify(ConcatenationOperator(big))).count("{") == 3  # Too large to fold.
+
+    def make(depth: int) -> Operator:
+        choice = random.randint(0, 5) if depth > 0 else 0
+        if choice == 0:
+            op = NullaryOperator(random.randint(0, 16) for _ in range(random.randint(1, 3)))  # type: Operator
+        elif choice == 1:
+            op = PaddingOperator(make(depth - 1), random.choice([1, 2, 4, 8]))
+        elif choice == 2:
+            op = ConcatenationOperator(make(depth - 1) for _ in range(random.randint(1, 3)))
+        elif choice == 3:
+            op = RepetitionOperator(make(depth - 1), random.randint(0, 2))
+        elif choice == 4:
+            op = RangeRepetitionOperator(make(depth - 1), random.randint(0, 2))
+        else:
+            op = UnionOperator(make(depth - 1) for _ in range(random.randint(1, 3)))
+        out = simplify(op)
+        assert out.expand() == op.expand(), (out, op)
+        return out
+
+    for _ in range(100):
+        validate_numerically(make(3))
+
+    # A wide sealed structure of byte-aligned fields collapses into a shallow tree.
+    bls = NullaryOperator([0])  # type: Operator
+    for i in range(200):
+        field = NullaryOperator([8 * (1 + i % 4)]) if i % 3 else RangeRepetitionOperator(NullaryOperator([8]), 16)
+        bls = simplify(ConcatenationOperator([simplify(PaddingOperator(bls, 8)), field]))
+    assert repr(bls).startswith("concat({2656},repeat(<=16,{8}),") and repr(bls).count("(") == 1 + 67
+    assert (bls.min, bls.max) == (2656, 2656 + 67 * 16 * 8)
+    assert bls.modulo(8) == {0} and bls.modulo(16) == {0, 8}
+
+
+def _unittest_progressions() -> None:
+    import time
+    from ._progression import ProgressionSet
+    from ._symbolic import PaddingOperator, ConcatenationOperator, RangeRepetitionOperator, UnionOperator
+
+    # The numerical validation covers the random trees above; these would be intractable with expansion.
+    started_at = time.monotonic()
+    byte = NullaryOperator([8])
+    payload = ConcatenationOperator([NullaryOperator([16]), RangeRepetitionOperator(byte, 65535)])
+    delimited = ConcatenationOperator([NullaryOperator([32]), PaddingOperator(payload, 32)])
+    assert delimited.progressions() == ProgressionSet.from_values(range(32 + 32, 32 + 524320 + 1, 32))
+    assert 32 + 16 + 16 in delimited.progressions()
+    assert 32 + 16 + 8 not in delimited.progressions()
+
+    # The bounds and the residues are the same but the sets are not.
+    a = ConcatenationOperator([RangeRepetitionOperator(NullaryOperator([16]), 10**6), NullaryOperator([0, 24])])
+    b = RangeRepetitionOperator(byte, 2 * 10**6 + 3)
+    assert (a.min, a.max) == (b.min, b.max)
+    assert all(a.modulo(div) == b.modulo(div) for div in range(1, 65))
+    assert a.progressions() != b.progressions()
+    assert UnionOperator([a, NullaryOperator([8, 16 * 10**6 + 16])]).progressions() == b.progressions()
+    assert len(a.progressions()) == len(b.progressions()) - 2 == 2 * 10**6 + 2
+    assert time.monotonic() - started_at < 10.0
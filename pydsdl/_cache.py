@@ -0,0 +1,328 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+import io
+import os
+import time
+import pickle
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set, Tuple
+from ._serializable import CompositeType, Version
+from . import _dsdl_definition
+
+
+DependencyRecord = Tuple[str, int, int, str, str]
+"""Full name, major version, minor version, source file path, and content digest of a dependency."""
+
+PrintRecord = Tuple[int, str]
+"""Line number and text of a print directive that was evaluated while processing the definition."""
+
+
+class CachedDefinition:
+    """
+    The result of a successful cache lookup: the processed type along with the information that is needed
+    to make the cache hit indistinguishable from a normal read.
+    """
+
+    def __init__(
+        self,
+        composite: CompositeType,
+        dependencies: Sequence["_dsdl_definition.DSDLDefinition"],
+        printed: Sequence[PrintRecord],
+    ) -> None:
+        self.composite = composite
+        self.dependencies = list(dependencies)
+        self.printed = list(printed)
+
+
+class DefinitionCache:
+    """
+    A persistent on-disk cache of processed definitions.
+    Each entry is stored in a separate file named after the digest of the entry key, which includes the
+    library version, the cache format revision, the unregulated port-ID flag, the source file path, and the digest of
+    the source text. The entry also lists every definition it transitively depends on along with their digests;
+    the entry is considered stale if any of them have changed since the entry was stored.
+    The types of the dependencies are not stored in the entry; they are only referred to, and the references are
+    resolved on load to the types of the lookup definitions, so that a cache hit yields the same object graph
+    as a normal read (see :func:`dump_composite`).
+
+    Entries are written atomically (the data is stored into a temporary file which is then renamed),
+    so it is safe to share the same directory between multiple concurrent processes.
+    Entries that cannot be loaded for whatever reason (e.g., corrupted or written by a different version)
+    are silently discarded.
+
+    The cache directory contains pickled objects so it shall not be writeable by untrusted parties.
+    """
+
+    FORMAT_REVISION = 2
+
+    DEFAULT_SIZE_LIMIT = 256 * 1024**2
+    """The total size of the cache directory in bytes above which the least recently used entries are evicted."""
+
+    STALE_TEMPORARY_FILE_AGE = 600.0
+    """Temporary files older than this many seconds are left behind by crashed writers and are removed by trim()."""
+
+    _SUFFIX = ".pydsdl-cache"
+    _TEMPORARY_SUFFIX = ".tmp"
+
+    def __init__(self, directory: Path, size_limit: int = DEFAULT_SIZE_LIMIT) -> None:
+        self._directory = Path(directory).resolve()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._size_limit = int(size_limit)
+        if self._size_limit < 0:
+            raise ValueError("Invalid cache size limit: %r" % size_limit)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def load(
+        self,
+        definition: "_dsdl_definition.DSDLDefinition",
+        lookup_definitions: "_dsdl_definition.DefinitionIndex",
+        allow_unregulated_fixed_port_id: bool,
+        resolve: Callable[["_dsdl_definition.DSDLDefinition"], CompositeType],
+    ) -> Optional[CachedDefinition]:
+        """
+        Returns None if there is no valid entry for the specified definition.
+        The dependencies listed in the entry are mapped onto the lookup definitions;
+        if any of them is missing or differs from the cached version, the lookup is a miss.
+        The types of the dependencies that the stored type refers to are obtained from ``resolve``,
+        which normally reads the dependency; its errors are propagated.
+        """
+        path = self._get_entry_path(definition, allow_unregulated_fixed_port_id)
+        try:
+            with open(path, "rb") as f:
+                revision, dependencies, printed, referenced, data = pickle.load(f)
+            if revision != self.FORMAT_REVISION:
+                raise ValueError("Unexpected cache entry format")
+        except FileNotFoundError:
+            return None
+        except Exception as ex:  # pylint: disable=broad-except
+            _logger.info("Dropping invalid cache entry %s: %r", path, ex)
+            _unlink_quietly(path)
+            return None
+
+        resolved: List["_dsdl_definition.DSDLDefinition"] = []
+        for name, major, minor, file_path, digest in dependencies:
+            found = lookup_definitions.find(name, Version(major, minor))
+            dep = found[0] if len(found) == 1 else None
+            if dep is None or str(dep.file_path) != file_path or dep.content_digest != digest:
+                _logger.debug("%s: Cache entry is stale because of %s.%d.%d", definition, name, major, minor)
+                return None
+            resolved.append(dep)
+
+        references = {i: resolve(resolved[i]) for i in referenced}
+        try:
+            composite = load_composite(data, references.__getitem__)
+        except Exception as ex:  # pylint: disable=broad-except
+            _logger.info("Dropping invalid cache entry %s: %r", path, ex)
+            _unlink_quietly(path)
+            return None
+
+        try:
+            os.utime(path)  # Bump the access time for the LRU eviction policy.
+        except OSError:  # pragma: no cover
+            pass
+        return CachedDefinition(composite, resolved, printed)
+
+    def store(
+        self,
+        definition: "_dsdl_definition.DSDLDefinition",
+        allow_unregulated_fixed_port_id: bool,
+        composite: CompositeType,
+        dependencies: Iterable["_dsdl_definition.DSDLDefinition"],
+        printed: Sequence[PrintRecord],
+    ) -> None:
+        """
+        The dependencies shall be transitive, i.e., include the dependencies of dependencies.
+        Failures to write the entry are logged and otherwise ignored because the cache is not essential.
+        """
+        dependencies = list(dependencies)
+        records: List[DependencyRecord] = [
+            (d.full_name, d.version.major, d.version.minor, str(d.file_path), d.content_digest) for d in dependencies
+        ]
+        path = self._get_entry_path(definition, allow_unregulated_fixed_port_id)
+        try:
+            data, referenced = dump_composite(composite, [d.cached_type for d in dependencies])
+            fd, tmp = tempfile.mkstemp(dir=self._directory, prefix=path.stem, suffix=self._TEMPORARY_SUFFIX)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump((self.FORMAT_REVISION, records, list(printed), referenced, data), f)
+                os.replace(tmp, path)
+            except BaseException:
+                _unlink_quietly(Path(tmp))
+                raise
+        except (OSError, pickle.PicklingError) as ex:
+            _logger.warning("Could not store the cache entry for %s: %r", definition, ex)
+
+    def trim(self) -> None:
+        """
+        Removes the least recently used entries until the total size of the cache is within the limit.
+        Also removes the temporary files abandoned by writers that crashed before renaming them.
+        """
+        deadline = time.time() - self.STALE_TEMPORARY_FILE_AGE
+        for p in self._directory.glob("*" + self._TEMPORARY_SUFFIX):
+            try:
+                stale = p.stat().st_mtime < deadline
+            except OSError:  # pragma: no cover
+                continue  # Renamed concurrently.
+            if stale:
+                _unlink_quietly(p)
+                _logger.debug("Removed abandoned temporary file %s", p)
+        entries: List[Tuple[float, int, Path]] = []
+        for p in self._directory.glob("*" + self._SUFFIX):
+            try:
+                st = p.stat()
+            except OSError:  # pragma: no cover
+                continue  # Removed concurrently.
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        if total <= self._size_limit:
+            return
+        entries.sort()
+        for _, size, p in entries:
+            if total <= self._size_limit:
+                break
+            _unlink_quietly(p)
+            total -= size
+            _logger.debug("Evicted cache entry %s", p)
+
+    def _get_entry_path(self, definition: "_dsdl_definition.DSDLDefinition", allow_unregulated: bool) -> Path:
+        from . import __version__
+
+        key = "\n".join(
+            [
+                __version__,
+                str(self.FORMAT_REVISION),
+                str(bool(allow_unregulated)),
+                str(definition.file_path),
+                str(definition.root_namespace_path),
+                definition.content_digest,
+            ]
+        )
+        return self._directory / (hashlib.sha256(key.encode("utf8")).hexdigest() + self._SUFFIX)
+
+    def __repr__(self) -> str:
+        return "%s(directory=%s, size_limit=%d)" % (type(self).__name__, self._directory, self._size_limit)
+
+
+def dump_composite(composite: CompositeType, references: Sequence[Optional[CompositeType]]) -> Tuple[bytes, List[int]]:
+    """
+    Pickles the type such that the other types it refers to (e.g., the types of its fields) that are found among
+    the references (by identity) are not stored but replaced with their indices in the sequence;
+    the sequence may contain None, which is ignored.
+    Returns the pickled data and the sorted indices of the references that were actually used.
+    The data is loaded by :func:`load_composite`.
+    """
+    index_of = {id(x): i for i, x in enumerate(references) if x is not None}
+    referenced: Set[int] = set()
+
+    class Pickler(pickle.Pickler):
+        def persistent_id(self, obj: Any) -> Optional[int]:
+            index = index_of.get(id(obj)) if obj is not composite else None
+            if index is not None:
+                referenced.add(index)
+            return index
+
+    buffer = io.BytesIO()
+    Pickler(buffer, pickle.HIGHEST_PROTOCOL).dump(composite)
+    return buffer.getvalue(), sorted(referenced)
+
+
+def load_composite(data: bytes, resolve: Callable[[int], CompositeType]) -> CompositeType:
+    """
+    The inverse of :func:`dump_composite`: the references are replaced with the types returned by ``resolve``
+    for their indices, so that the loaded type refers to the same objects as the original one.
+    """
+
+    class Unpickler(pickle.Unpickler):
+        def persistent_load(self, pid: Any) -> CompositeType:
+            return resolve(int(pid))
+
+    out = Unpickler(io.BytesIO(data)).load()
+    if not isinstance(out, CompositeType):
+        raise ValueError("Expected a composite type, got %r" % type(out).__name__)
+    return out
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+_logger = logging.getLogger(__name__)
+
+
+def _unittest_cache() -> None:
+    import tempfile as _tempfile
+    from ._dsdl_definition import DSDLDefinition
+
+    with _tempfile.TemporaryDirectory() as directory:
+        di = Path(directory).resolve()
+        root = di / "ns"
+        root.mkdir()
+        (root / "A.1.0.dsdl").write_text("ns.B.1.0 b\n@print 123\n@sealed\n")
+        (root / "B.1.0.dsdl").write_text("uint8 x\n@sealed\n")
+
+        def read(name: str) -> Tuple[CompositeType, DSDLDefinition, List[PrintRecord]]:
+            defs = [DSDLDefinition(root / "A.1.0.dsdl", root), DSDLDefinition(root / "B.1.0.dsdl", root)]
+            target = [d for d in defs if d.short_name == name][0]
+            printed: List[PrintRecord] = []
+            cache = DefinitionCache(di / "cache")
+            out = target.read(defs, lambda ln, text: printed.append((ln, text)), False, cache)
+            cache.trim()
+            return out, target, printed
+
+        a_cold, _, printed = read("A")
+        assert printed == [(2, "123")]
+        assert len(list((di / "cache").iterdir())) == 2  # Both A and B are stored.
+
+        a_warm, a_def, printed = read("A")
+        assert printed == [(2, "123")]  # Replayed from the cache.
+        assert a_warm == a_cold
+        assert a_warm is not a_cold
+        assert [d.full_name for d in a_def.dependencies] == ["ns.B"]
+
+        # Invalidation: the dependency has changed, so the entry of A is stale.
+        (root / "B.1.0.dsdl").write_text("uint16 x\n@sealed\n")
+        a_new, _, _ = read("A")
+        assert a_new.bit_length_set.max == 16
+        assert len(list((di / "cache").iterdir())) == 3  # The entry of A is overwritten, the old B is orphaned.
+
+        # Corrupted entries are discarded.
+        for p in (di / "cache").iterdir():
+            p.write_bytes(b"garbage")
+        a_new, _, printed = read("A")
+        assert printed == [(2, "123")]
+        assert a_new.bit_length_set.max == 16
+
+        # Abandoned temporary files are removed once they are old enough; fresh ones may be in use by a writer.
+        stale, fresh = di / "cache" / "stale.tmp", di / "cache" / "fresh.tmp"
+        stale.write_bytes(b"partial")
+        fresh.write_bytes(b"partial")
+        old = time.time() - DefinitionCache.STALE_TEMPORARY_FILE_AGE - 1
+        os.utime(stale, (old, old))
+        DefinitionCache(di / "cache").trim()
+        assert not stale.exists()
+        assert fresh.exists()
+        fresh.unlink()
+
+        # The types of the dependencies are referred to rather than copied.
+        b_type = a_new.fields[0].data_type
+        data, referenced = dump_composite(a_new, [None, b_type])
+        assert referenced == [1]
+        assert len(data) < len(pickle.dumps(a_new))
+        loaded = load_composite(data, {1: b_type}.__getitem__)
+        assert loaded == a_new and loaded is not a_new
+        assert loaded.fields[0].data_type is b_type
+
+        # Eviction.
+        DefinitionCache(di / "cache", size_limit=0).trim()
+        assert not list((di / "cache").iterdir())
@@ -41,6 +41,13 @@ class DataSchemaBuilder:
         self._bit_length_computed_at_least_once = False
         self._doc = ""
 
+    def __copy__(self) -> "DataSchemaBuilder":
+        out = type(self).__new__(type(self))
+        out.__dict__.update(self.__dict__)
+        out._fields = list(self._fields)
+        out._constants = list(self._constants)
+        return out
+
     @property
     def fields(self) -> List[_serializable.Field]:
         assert all(map(lambda x: isinstance(x, _serializable.Field), self._fields))
@@ -2,7 +2,8 @@
 # This software is distributed under the terms of the MIT License.
 # Author: Pavel Kirienko <pavel@opencyphal.org>
 
-from typing import Optional, Callable, Iterable
+from typing import Optional, Callable, Iterable, List, Tuple, Union
+import copy
 import logging
 from pathlib import Path
 from . import _serializable
@@ -12,6 +13,7 @@ from . import _dsdl_definition
 from . import _parser
 from . import _data_schema_builder
 from . import _port_id_ranges
+from . import _cache
 
 
 class AssertionCheckFailureError(_error.InvalidDefinitionError):
@@ -45,24 +47,49 @@ class DataTypeBuilder(_parser.StatementStreamProcessor):
     def __init__(
         self,
         definition: _dsdl_definition.DSDLDefinition,
-        lookup_definitions: Iterable[_dsdl_definition.DSDLDefinition],
+        lookup_definitions: Union[_dsdl_definition.DefinitionIndex, Iterable[_dsdl_definition.DSDLDefinition]],
         print_output_handler: Callable[[int, str], None],
         allow_unregulated_fixed_port_id: bool,
+        cache: Optional[_cache.DefinitionCache] = None,
     ):
         self._definition = definition
-        self._lookup_definitions = list(lookup_definitions)
+        self._lookup_definitions = _dsdl_definition.DefinitionIndex.of(lookup_definitions)
         self._print_output_handler = print_output_handler
         self._allow_unregulated_fixed_port_id = allow_unregulated_fixed_port_id
-        self._element_callback = None  # type: Optional[Callable[[str], None]]
+        self._cache = cache
+        self._element_callback = None  # type: Optional[Callable[[str], _serializable.Attribute]]
+        self._dependencies = []  # type: List[_dsdl_definition.DSDLDefinition]
+        self._printed = []  # type: List[Tuple[int, str]]
 
         assert isinstance(self._definition, _dsdl_definition.DSDLDefinition)
-        assert all(map(lambda x: isinstance(x, _dsdl_definition.DSDLDefinition), lookup_definitions))
         assert callable(self._print_output_handler)
         assert isinstance(self._allow_unregulated_fixed_port_id, bool)
 
         self._structs = [_data_schema_builder.DataSchemaBuilder()]
         self._is_deprecated = False
 
+    def __copy__(self) -> "DataTypeBuilder":
+        """
+        An independent snapshot of the state of the builder; see :class:`_parser.StatementStreamProcessor`.
+        The lookup definitions and the output handler are shared with the original.
+        """
+        out = type(self).__new__(type(self))
+        out.__dict__.update(self.__dict__)
+        out._structs = [copy.copy(x) for x in self._structs]
+        out._dependencies = list(self._dependencies)
+        out._printed = list(self._printed)
+        return out
+
+    @property
+    def dependencies(self) -> List[_dsdl_definition.DSDLDefinition]:
+        """The definitions that were referred to directly from the processed definition so far."""
+        return list(self._dependencies)
+
+    @property
+    def printed(self) -> List[Tuple[int, str]]:
+        """Line number and text of every print directive evaluated so far."""
+        return list(self._printed)
+
     def finalize(self) -> _serializable.CompositeType:
         if len(self._structs) == 1:  # Structure type
             (builder,) = self._structs  # type: _data_schema_builder.DataSchemaBuilder,
@@ -133,19 +160,15 @@ class DataTypeBuilder(_parser.StatementStreamProcessor):
 
     def on_constant(self, constant_type: _serializable.SerializableType, name: str, value: _expression.Any) -> None:
         self._on_attribute()
-        self._queue_attribute(
-            lambda doc: self._structs[-1].add_constant(_serializable.Constant(constant_type, name, value, doc))
-        )
+        self._queue_attribute(lambda doc: _serializable.Constant(constant_type, name, value, doc))
 
     def on_field(self, field_type: _serializable.SerializableType, name: str) -> None:
         self._on_attribute()
-        self._queue_attribute(lambda doc: self._structs[-1].add_field(_serializable.Field(field_type, name, doc)))
+        self._queue_attribute(lambda doc: _serializable.Field(field_type, name, doc))
 
     def on_padding_field(self, padding_field_type: _serializable.VoidType) -> None:
         self._on_attribute()
-        self._queue_attribute(
-            lambda doc: self._structs[-1].add_field(_serializable.PaddingField(padding_field_type, doc))
-        )
+        self._queue_attribute(lambda doc: _serializable.PaddingField(padding_field_type, doc))
 
     def on_directive(
         self, line_number: int, directive_name: str, associated_expression_value: Optional[_expression.Any]
@@ -196,26 +219,9 @@ class DataTypeBuilder(_parser.StatementStreamProcessor):
             _logger.debug("The full name of a relatively referred type %r reconstructed as %r", name, full_name)
 
         del name
-        found = list(filter(lambda d: d.full_name == full_name and d.version == version, self._lookup_definitions))
+        found = self._lookup_definitions.find(full_name, version)
         if not found:
-            # Play Sherlock to help the user with mistakes like https://forum.opencyphal.org/t/904/2
-            requested_ns = full_name.split(_serializable.CompositeType.NAME_COMPONENT_SEPARATOR)[0]
-            lookup_nss = set(x.root_namespace for x in self._lookup_definitions)
-            subroot_ns = self._definition.name_components[1] if len(self._definition.name_components) > 2 else None
-            error_description = "Data type %s.%d.%d could not be found in the following root namespaces: %s. " % (
-                full_name,
-                version.major,
-                version.minor,
-                lookup_nss or "(empty set)",
-            )
-            if requested_ns not in lookup_nss and requested_ns == subroot_ns:
-                error_description += " Did you mean to use the directory %s instead of %s?" % (
-                    self._definition.root_namespace_path / subroot_ns,
-                    self._definition.root_namespace_path,
-                )
-            else:
-                error_description += " Please make sure that you specified the directories correctly."
-            raise UndefinedDataTypeError(error_description)
+            raise UndefinedDataTypeError(self._lookup_definitions.explain_missing(full_name, version, self._definition))
 
         if len(found) > 1:  # pragma: no cover
             raise _error.InternalError("Conflicting definitions: %r" % found)
@@ -225,19 +231,30 @@ class DataTypeBuilder(_parser.StatementStreamProcessor):
         assert target_definition.full_name == full_name
         assert target_definition.version == version
         # Recursion is cool.
-        return target_definition.read(
+        out = target_definition.read(
             lookup_definitions=self._lookup_definitions,
             print_output_handler=self._print_output_handler,
             allow_unregulated_fixed_port_id=self._allow_unregulated_fixed_port_id,
+            cache=self._cache,
         )
+        if target_definition not in self._dependencies:
+            self._dependencies.append(target_definition)
+        return out
 
-    def _queue_attribute(self, element_callback: Callable[[str], None]) -> None:
+    def _queue_attribute(self, element_callback: Callable[[str], _serializable.Attribute]) -> None:
+        # The callback constructs the attribute given its doc comment. It shall not refer to the builder
+        # so that it could be shared between the copies of the builder.
         self._flush_attribute("")
         self._element_callback = element_callback
 
     def _flush_attribute(self, comment: str) -> None:
         if self._element_callback is not None:
-            self._element_callback(comment)
+            attribute = self._element_callback(comment)
+            if isinstance(attribute, _serializable.Field):
+                self._structs[-1].add_field(attribute)
+            else:
+                assert isinstance(attribute, _serializable.Constant)
+                self._structs[-1].add_constant(attribute)
         self._element_callback = None
 
     def _on_attribute(self) -> None:
@@ -254,7 +271,9 @@ class DataTypeBuilder(_parser.StatementStreamProcessor):
             line_number,
             (": %s" % value) if value is not None else " (no value to print)",
         )
-        self._print_output_handler(line_number, str(value if value is not None else ""))
+        text = str(value if value is not None else "")
+        self._printed.append((line_number, text))
+        self._print_output_handler(line_number, text)
 
     def _on_assert_directive(self, line_number: int, value: Optional[_expression.Any]) -> None:
         if isinstance(value, _expression.Boolean):
@@ -3,12 +3,14 @@
 # Author: Pavel Kirienko <pavel@opencyphal.org>
 
 import time
-from typing import Iterable, Callable, Optional, List
+import hashlib
+from typing import Iterable, Iterator, Callable, Optional, List, Tuple, Set, Dict, FrozenSet, Union
 import logging
 from pathlib import Path
 from ._error import FrontendError, InvalidDefinitionError, InternalError
 from ._serializable import CompositeType, Version
 from . import _parser
+from . import _ast
 
 
 _logger = logging.getLogger(__name__)
@@ -23,6 +25,12 @@ class FileNameFormatError(InvalidDefinitionError):
         super().__init__(text=text, path=Path(path))
 
 
+class CircularDependencyError(InvalidDefinitionError):
+    """
+    Raised when a definition refers to itself, directly or through other definitions.
+    """
+
+
 class DSDLDefinition:
     """
     A DSDL type definition source abstracts the filesystem level details away, presenting a higher-level
@@ -30,14 +38,22 @@ class DSDLDefinition:
     Upper layers that operate on top of this abstraction do not concern themselves with the file system at all.
     """
 
-    def __init__(self, file_path: Path, root_namespace_path: Path):
-        # Normalizing the path and reading the definition text
+    def __init__(
+        self,
+        file_path: Path,
+        root_namespace_path: Path,
+        retain_text: bool = True,
+        parser_backend: Optional[str] = None,
+    ):
+        # Normalizing the path. The definition text is not read until it is needed because most of the lookup
+        # definitions are usually never used.
         self._file_path = Path(file_path)
         del file_path
         self._root_namespace_path = Path(root_namespace_path)
         del root_namespace_path
-        with open(self._file_path) as f:
-            self._text = str(f.read())
+        self._text: Optional[str] = None
+        self._retain_text = bool(retain_text)
+        self._parser_backend = _parser.resolve_parser_backend(parser_backend)
 
         # Checking the sanity of the root directory path - can't contain separators
         if CompositeType.NAME_COMPONENT_SEPARATOR in self._root_namespace_path.name:
@@ -85,12 +101,17 @@ class DSDLDefinition:
         self._name: str = CompositeType.NAME_COMPONENT_SEPARATOR.join(namespace_components + [str(short_name)])
 
         self._cached_type: Optional[CompositeType] = None
+        self._in_progress = False
+        self._dependencies: List["DSDLDefinition"] = []
+        self._content_digest: Optional[str] = None
+        self._ast: Optional[_ast.Definition] = None
 
     def read(
         self,
-        lookup_definitions: Iterable["DSDLDefinition"],
+        lookup_definitions: Union["DefinitionIndex", Iterable["DSDLDefinition"]],
         print_output_handler: Callable[[int, str], None],
         allow_unregulated_fixed_port_id: bool,
+        cache: Optional["_cache.DefinitionCache"] = None,
     ) -> CompositeType:
         """
         Reads the data type definition and returns its high-level data type representation.
@@ -101,9 +122,13 @@ class DSDLDefinition:
         Note, however, that this may lead to unexpected complications if one is attempting to re-read a definition
         with different inputs (e.g., different lookup paths) expecting to get a different result: caching would
         get in the way. That issue is easy to avoid by creating a new instance of the object.
-        :param lookup_definitions:              List of definitions available for referring to.
+        :param lookup_definitions:              Definitions available for referring to. Preferably, this should be
+                                                a :class:`DefinitionIndex` shared between all definitions read
+                                                together; other iterables are indexed on every invocation.
         :param print_output_handler:            Used for @print and for diagnostics: (line_number, text) -> None.
         :param allow_unregulated_fixed_port_id: Do not complain about fixed unregulated port IDs.
+        :param cache:                           If provided, the persistent cache is consulted before processing
+                                                the definition, and the result is stored there afterwards.
         :return: The data type representation.
         """
         log_prefix = "%s.%d.%d" % (self.full_name, self.version.major, self.version.minor)
@@ -111,29 +136,68 @@ class DSDLDefinition:
             _logger.debug("%s: Cache hit", log_prefix)
             return self._cached_type
 
-        started_at = time.monotonic()
+        # The definition is marked while it is being processed in order to detect self-referential definitions,
+        # which would otherwise cause infinite recursion.
+        if self._in_progress:
+            raise CircularDependencyError("Circular dependency: %s depends on itself" % log_prefix)
+
+        lookup = DefinitionIndex.of(lookup_definitions)
+        del lookup_definitions
+
+        if cache is not None:
+            # The dependencies referred to from the cached type are read the usual way (possibly from the cache too).
+            self._in_progress = True
+            try:
+                hit = cache.load(
+                    self,
+                    lookup,
+                    allow_unregulated_fixed_port_id,
+                    lambda dep: dep.read(lookup, print_output_handler, allow_unregulated_fixed_port_id, cache),
+                )
+            finally:
+                self._in_progress = False
+            if hit is not None:
+                _logger.debug("%s: Persistent cache hit", log_prefix)
+                for line_number, text in hit.printed:
+                    print_output_handler(line_number, text)
+                self._dependencies = hit.dependencies
+                self._cached_type = hit.composite
+                return self._cached_type
 
-        # Remove the target definition from the lookup list in order to prevent
-        # infinite recursion on self-referential definitions.
-        lookup_definitions = list(filter(lambda d: d != self, lookup_definitions))
+        started_at = time.monotonic()
+        self._in_progress = True
 
         _logger.debug(
             "%s: Starting processing with %d lookup definitions located in root namespaces: %s",
             log_prefix,
-            len(lookup_definitions),
-            ", ".join(set(sorted(map(lambda x: x.root_namespace, lookup_definitions)))),
+            len(lookup),
+            ", ".join(sorted(lookup.root_namespaces)),
         )
         try:
             builder = _data_type_builder.DataTypeBuilder(
                 definition=self,
-                lookup_definitions=lookup_definitions,
+                lookup_definitions=lookup,
                 print_output_handler=print_output_handler,
                 allow_unregulated_fixed_port_id=allow_unregulated_fixed_port_id,
+                cache=cache,
             )
-            with open(self.file_path) as f:
-                _parser.parse(f.read(), builder)
+            _parser.evaluate(self.ast, builder)
 
             self._cached_type = builder.finalize()
+            self._dependencies = _collect_transitive_dependencies(builder.dependencies)
+            if not self._retain_text:
+                # The digest identifies the processed text, so it shall not be computed from a newer text later.
+                _ = self.content_digest
+                self._text = None
+                self._ast = None
+            if cache is not None:
+                cache.store(
+                    self,
+                    allow_unregulated_fixed_port_id,
+                    self._cached_type,
+                    self._dependencies,
+                    builder.printed,
+                )
 
             _logger.info(
                 "%s: Processed in %.0f ms; category: %s, fixed port ID: %s",
@@ -150,6 +214,41 @@ class DSDLDefinition:
             raise
         except Exception as ex:  # pragma: no cover
             raise InternalError(culprit=ex, path=self.file_path) from ex
+        finally:
+            self._in_progress = False
+
+    def set_cached_type(self, composite_type: CompositeType, dependencies: Iterable["DSDLDefinition"]) -> None:
+        """
+        Populates the output cache with a type that was processed elsewhere (e.g., in a different process);
+        the following invocations of :meth:`read` will return it without processing the definition.
+        The dependencies shall be transitive.
+        """
+        assert isinstance(composite_type, CompositeType)
+        assert composite_type.full_name == self.full_name and composite_type.version == self.version
+        self._cached_type = composite_type
+        self._dependencies = list(dependencies)
+
+    def invalidate(self) -> None:
+        """
+        Drops the output of the last :meth:`read` so that the next invocation processes the definition again,
+        e.g., because one of its dependencies has changed. The syntax tree is kept, so only the semantic analysis
+        is repeated, unless the syntax tree was dropped along with the text (see ``retain_text``).
+        """
+        self._cached_type = None
+        self._dependencies = []
+
+    def get_referenced_names(self) -> List[Tuple[str, Version]]:
+        """
+        Full names and versions of the data types referred to from this definition, obtained by a cheap lexical scan
+        of the source text without parsing it (see :func:`_parser.extract_versioned_type_references`).
+        Relative references are resolved against the namespace of this definition.
+        """
+        out: List[Tuple[str, Version]] = []
+        for name, version in _parser.extract_versioned_type_references(self.text):
+            if CompositeType.NAME_COMPONENT_SEPARATOR not in name:
+                name = CompositeType.NAME_COMPONENT_SEPARATOR.join([self.full_namespace, name])
+            out.append((name, version))
+        return out
 
     @property
     def full_name(self) -> str:
@@ -178,9 +277,62 @@ class DSDLDefinition:
 
     @property
     def text(self) -> str:
-        """The source text in its raw unprocessed form (with comments, formatting intact, and everything)"""
+        """
+        The source text in its raw unprocessed form (with comments, formatting intact, and everything).
+        The file is read on first access. If the definition was constructed with ``retain_text=False``,
+        the text is dropped once the definition is processed and the file is read again on the next access.
+        """
+        if self._text is None:
+            with open(self._file_path) as f:
+                self._text = str(f.read())
         return self._text
 
+    @property
+    def ast(self) -> _ast.Definition:
+        """
+        The abstract syntax tree of the text; it is constructed on first access and kept while the text is kept.
+        Raises :class:`pydsdl.FrontendError` if the text is not a syntactically valid definition.
+        """
+        if self._ast is None:
+            try:
+                self._ast = _parser.parse_ast(self.text, self._parser_backend)
+            except FrontendError as ex:
+                ex.set_error_location_if_unknown(path=self.file_path)
+                raise ex
+        return self._ast
+
+    def check_syntax(self) -> None:
+        """
+        Raises :class:`pydsdl.FrontendError` if the text is not a syntactically valid definition.
+        Unlike :attr:`ast`, this also detects the malformed string literals, which are otherwise reported
+        only when the definition is read.
+        """
+        try:
+            _parser.check_string_literals(self.ast)
+        except FrontendError as ex:
+            ex.set_error_location_if_unknown(path=self.file_path)
+            raise ex
+
+    @property
+    def content_digest(self) -> str:
+        """SHA-256 hex digest of the source text; used for detecting changes in the definition."""
+        if self._content_digest is None:
+            self._content_digest = hashlib.sha256(self.text.encode("utf8")).hexdigest()
+        return self._content_digest
+
+    @property
+    def cached_type(self) -> Optional[CompositeType]:
+        """The result of the last successful :meth:`read` (or :meth:`set_cached_type`); None if there was none."""
+        return self._cached_type
+
+    @property
+    def dependencies(self) -> List["DSDLDefinition"]:
+        """
+        The definitions that this one depends on, directly or transitively, sorted by name and version.
+        Empty until the definition is read.
+        """
+        return list(self._dependencies)
+
     @property
     def version(self) -> Version:
         return self._version
@@ -202,6 +354,11 @@ class DSDLDefinition:
     def root_namespace_path(self) -> Path:
         return self._root_namespace_path
 
+    @property
+    def parser_backend(self) -> str:
+        """One of :data:`_parser.PARSER_BACKENDS` that is used for constructing :attr:`ast`."""
+        return self._parser_backend
+
     def __eq__(self, other: object) -> bool:
         """
         Two definitions will compare equal if they share the same name AND version number.
@@ -222,6 +379,172 @@ class DSDLDefinition:
     __repr__ = __str__
 
 
+class DefinitionIndex:
+    """
+    An immutable collection of definitions indexed by full name and version, so that a data type reference
+    is resolved in constant time regardless of the number of available definitions.
+    The index is supposed to be built once and then shared between all definitions that are read together.
+    """
+
+    def __init__(self, definitions: Iterable[DSDLDefinition]) -> None:
+        self._definitions = tuple(definitions)
+        self._by_key: Dict[Tuple[str, Version], List[DSDLDefinition]] = {}
+        for d in self._definitions:
+            assert isinstance(d, DSDLDefinition)
+            self._by_key.setdefault((d.full_name, d.version), []).append(d)
+        self._root_namespaces = frozenset(d.root_namespace for d in self._definitions)
+
+    @staticmethod
+    def of(definitions: Union["DefinitionIndex", Iterable[DSDLDefinition]]) -> "DefinitionIndex":
+        """Returns the argument as-is if it is already an index; otherwise, builds a new index."""
+        return definitions if isinstance(definitions, DefinitionIndex) else DefinitionIndex(definitions)
+
+    def find(self, full_name: str, version: Version) -> List[DSDLDefinition]:
+        """
+        All definitions under the specified name and version; normally, there is at most one.
+        """
+        return list(self._by_key.get((full_name, version), []))
+
+    @property
+    def root_namespaces(self) -> FrozenSet[str]:
+        """Names of the root namespaces that contain at least one of the indexed definitions."""
+        return self._root_namespaces
+
+    def explain_missing(self, full_name: str, version: Version, referrer: Optional[DSDLDefinition]) -> str:
+        """
+        Constructs a human-readable explanation of why the specified data type referred to from the referrer
+        could not be found, with a hint on how to fix the problem if the cause appears to be obvious.
+        The referrer is None if the data type was requested directly rather than referred to from a definition.
+        """
+        # Play Sherlock to help the user with mistakes like https://forum.opencyphal.org/t/904/2
+        requested_ns = full_name.split(CompositeType.NAME_COMPONENT_SEPARATOR)[0]
+        subroot_ns = None
+        if referrer is not None and len(referrer.name_components) > 2:
+            subroot_ns = referrer.name_components[1]
+        out = "Data type %s.%d.%d could not be found in the following root namespaces: %s. " % (
+            full_name,
+            version.major,
+            version.minor,
+            set(self._root_namespaces) or "(empty set)",
+        )
+        if requested_ns not in self._root_namespaces and requested_ns == subroot_ns:
+            assert referrer is not None
+            out += " Did you mean to use the directory %s instead of %s?" % (
+                referrer.root_namespace_path / subroot_ns,
+                referrer.root_namespace_path,
+            )
+        else:
+            out += " Please make sure that you specified the directories correctly."
+        return out
+
+    def __iter__(self) -> Iterator[DSDLDefinition]:
+        return iter(self._definitions)
+
+    def __len__(self) -> int:
+        return len(self._definitions)
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (type(self).__name__, list(self))
+
+
+def _collect_transitive_dependencies(direct: Iterable[DSDLDefinition]) -> List[DSDLDefinition]:
+    out: List[DSDLDefinition] = []
+    seen: Set[Tuple[str, Version]] = set()
+    for d in direct:
+        for x in [d] + d.dependencies:
+            key = x.full_name, x.version
+            if key not in seen:
+                seen.add(key)
+                out.append(x)
+    return list(sorted(out, key=lambda x: (x.full_name, x.version)))
+
+
 # Moved this import here to break recursive dependency.
 # Maybe I have messed up the architecture? Should think about it later.
 from . import _data_type_builder  # pylint: disable=wrong-import-position
+from . import _cache  # pylint: disable=wrong-import-position
+
+
+def _unittest_definition_index() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory).resolve() / "ns"
+        (root / "sub").mkdir(parents=True)
+        for rel in ["A.1.0.dsdl", "A.1.1.dsdl", "sub/B.2.0.dsdl"]:
+            (root / rel).write_text("@sealed")
+        defs = [DSDLDefinition(root / rel, root) for rel in ["A.1.0.dsdl", "A.1.1.dsdl", "sub/B.2.0.dsdl"]]
+
+        index = DefinitionIndex(defs)
+        assert DefinitionIndex.of(index) is index
+        assert len(index) == 3
+        assert index.root_namespaces == {"ns"}
+        assert index.find("ns.A", Version(1, 1)) == [defs[1]]
+        assert index.find("ns.A", Version(1, 2)) == []
+        assert index.find("ns.sub.B", Version(2, 0)) == [defs[2]]
+
+        assert list(index) == defs
+
+        explanation = index.explain_missing("sub.C", Version(1, 0), defs[0])
+        assert "sub.C.1.0" in explanation and "Please make sure" in explanation
+        explanation = DefinitionIndex([]).explain_missing("sub.C", Version(1, 0), defs[2])
+        assert "(empty set)" in explanation and "Did you mean" in explanation
+        explanation = index.explain_missing("ns.C", Version(1, 0), None)
+        assert "ns.C.1.0" in explanation and "Please make sure" in explanation
+
+
+def _unittest_lazy_text() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        root.mkdir()
+        (root / "A.1.0.dsdl").write_text("uint8 a\n@sealed\n")
+        # The file is not read on construction, so it may not even exist yet.
+        missing = DSDLDefinition(root / "Missing.1.0.dsdl", root)
+        assert missing.full_name == "ns.Missing"
+
+        a = DSDLDefinition(root / "A.1.0.dsdl", root)
+        assert a._text is None  # pylint: disable=protected-access
+        assert a.text == "uint8 a\n@sealed\n"
+        a.read([a], lambda *_: None, False)
+        assert a._text is not None  # pylint: disable=protected-access
+
+        a = DSDLDefinition(root / "A.1.0.dsdl", root, retain_text=False)
+        digest = a.content_digest
+        assert a.read([a], lambda *_: None, False).bit_length_set.max == 8
+        assert a._text is None  # pylint: disable=protected-access
+        (root / "A.1.0.dsdl").write_text("uint16 a\n@sealed\n")
+        assert a.content_digest == digest  # Describes the processed text.
+        assert a.text == "uint16 a\n@sealed\n"  # Loaded again on demand.
+
+
+def _unittest_invalidate() -> None:
+    import tempfile
+    from pytest import raises
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory, "ns")
+        root.mkdir()
+        (root / "A.1.0.dsdl").write_text("uint8 a\n@sealed\n")
+        (root / "B.1.0.dsdl").write_text("A.1.0 a\n@sealed\n")
+        a = DSDLDefinition(root / "A.1.0.dsdl", root)
+        b = DSDLDefinition(root / "B.1.0.dsdl", root)
+        first = b.read([a, b], lambda *_: None, False)
+        assert b.dependencies == [a]
+        tree = b.ast
+
+        # Only the semantic analysis is repeated; the syntax tree is reused.
+        a.invalidate()
+        b.invalidate()
+        assert b.cached_type is None and b.dependencies == []
+        a._text = "uint16 a\n@sealed\n"  # pylint: disable=protected-access
+        a._ast = None  # pylint: disable=protected-access
+        second = b.read([a, b], lambda *_: None, False)
+        assert b.ast is tree
+        assert first.bit_length_set.max == 8 and second.bit_length_set.max == 16
+
+        (root / "C.1.0.dsdl").write_text("uint8 a\n\nuint8 b = ")
+        with raises(FrontendError) as ei:
+            _ = DSDLDefinition(root / "C.1.0.dsdl", root).ast
+        assert ei.value.path == root / "C.1.0.dsdl" and ei.value.line == 3
@@ -0,0 +1,550 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+A hand-written recursive descent implementation of the grammar defined in ``grammar.parsimonious``.
+
+The generic packrat matcher memoizes every rule at every position of the text and builds a full parse tree
+that is then walked using reflective dispatch, which is expensive. This module implements the same PEG rules
+directly: every ordered choice, optional, and repetition is tried in the same order with the same backtracking,
+so the accepted language, the location of syntax errors, and the resulting abstract syntax tree
+(see :mod:`pydsdl._ast`) are exactly the same.
+
+Expressions are not parsed by the Python call stack because they can be nested arbitrarily deep
+(see :data:`_Routine`); the binary operators of all precedence levels from comparison to multiplication
+are parsed by a single precedence climbing loop rather than by one rule per level.
+"""
+
+import re
+import typing
+import fractions
+from typing import List, Optional, Tuple
+from . import _ast
+from ._parser import DSDLSyntaxError
+
+
+def parse_ast(text: str) -> _ast.Definition:
+    """
+    Same as :func:`pydsdl._parser.parse_ast` with the parsimonious backend.
+    """
+    return _SyntaxParser(text).parse()
+
+
+_Result = Optional[Tuple[typing.Any, int]]
+"""The matched node and the position where the match has ended, or None if there is no match."""
+
+_Routine = typing.Generator[typing.Any, _Result, _Result]
+"""
+A rule that may contain nested expressions is a generator that yields the routines of the nested rules whose results
+it needs instead of invoking them directly; the results are sent back. The routines are run by :func:`_run`.
+"""
+
+
+def _run(routine: _Routine) -> _Result:
+    """
+    Runs the routine to completion. The suspended routines are kept on an explicit stack, so the depth of nesting
+    of the text is limited by the available memory rather than by the depth of the Python call stack.
+    """
+    stack = [routine]
+    result: _Result = None
+    while True:
+        try:
+            nested = stack[-1].send(result)
+        except StopIteration as ex:
+            stack.pop()
+            result = ex.value
+            if not stack:
+                return result
+        else:
+            stack.append(nested)
+            result = None
+
+
+_match_whitespace = re.compile(r"[ \t]+").match
+_match_identifier = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*").match
+_match_comment = re.compile(r"#[^\r\n]*").match
+_match_marker = re.compile(r"---+").match
+_match_bit_length = re.compile(r"[1-9]\d*").match
+_match_decimal = re.compile(r"(0(_?0)*)+|([1-9](_?[0-9])*)").match
+_match_integer = re.compile(  # The alternatives are ordered as in the grammar.
+    r"0[bB](_?(0|1))+|0[oO](_?[0-7])+|0[xX](_?[0-9a-fA-F])+|(0(_?0)*)+|([1-9](_?[0-9])*)"
+).match
+_match_real_digits = re.compile(r"[0-9](_?[0-9])*").match
+_match_real_exponent = re.compile(r"[eE][+-]?").match
+_match_string = re.compile(r"""'[^'\\]*(\\[^\r\n][^'\\]*)*'|"[^"\\]*(\\[^\r\n][^"\\]*)*\"""").match
+
+# Operators that share a common prefix are arranged so that the longest form is specified first.
+_OPERATORS_LOGICAL = ("||", "&&")
+_OPERATORS_COMPARISON = ("==", ">=", "<=", "!=", "<", ">")
+_OPERATORS_BITWISE = ("|", "^", "&")
+_OPERATORS_ADDITIVE = ("+", "-")
+_OPERATORS_MULTIPLICATIVE = ("*", "/", "%")
+
+# The levels handled by the precedence climbing loop, from the loosest binding to the tightest.
+_OPERATORS_BINARY = (_OPERATORS_COMPARISON, _OPERATORS_BITWISE, _OPERATORS_ADDITIVE, _OPERATORS_MULTIPLICATIVE)
+_OPERATOR_LEVELS_TIGHTEST_FIRST = tuple(reversed(range(len(_OPERATORS_BINARY))))
+
+_PRIMITIVE_NAMES = ("uint", "int", "float")
+
+
+class _SyntaxParser:
+    """
+    Each rule method accepts the position where the rule is to be matched and returns the node with the position
+    where the match has ended, or None if the rule does not match. The text is processed as a whole rather than
+    line by line because string literals may contain line breaks.
+    """
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._line_number = 1  # Lines are numbered from one
+        self._line_start = 0  # The position of the beginning of the current line in the text
+
+    def parse(self) -> _ast.Definition:
+        text = self._text
+        lines: List[_ast.Line] = []
+        pos = 0
+        while True:
+            start = pos
+            statement: Optional[_ast.Statement] = None
+            result = self._statement(pos)
+            if result is not None:
+                statement, pos = result
+            pos = self._skip(pos)
+            comment: Optional[str] = None
+            m = _match_comment(text, pos)
+            if m is not None:
+                comment, pos = m.group(), m.end()
+                comment = comment[2:] if comment.startswith("# ") else comment[1:]
+            lines.append(_ast.Line(self._line_number, statement, comment, pos == start))
+            if pos == len(text):
+                return _ast.Definition(lines)
+            if text.startswith("\n", pos):
+                pos += 1
+            elif text.startswith("\r\n", pos):
+                pos += 2
+            else:
+                raise DSDLSyntaxError("Syntax error", line=text.count("\n", 0, pos) + 1)
+            self._line_number += 1
+            self._line_start = pos
+
+    def _at(self, pos: int) -> Tuple[int, int]:
+        """The line and column numbers of the position."""
+        return self._line_number, pos - self._line_start + 1
+
+    def _skip(self, pos: int) -> int:
+        m = _match_whitespace(self._text, pos)
+        return m.end() if m is not None else pos
+
+    # ================================================== Statements ==================================================
+
+    def _statement(self, pos: int) -> _Result:
+        text = self._text
+        if text.startswith("@", pos):
+            m = _match_identifier(text, pos + 1)
+            if m is None:
+                return None  # No other statement begins with "@".
+            w = _match_whitespace(text, m.end())
+            if w is not None:
+                result = _run(self._expression(w.end()))
+                if result is not None:
+                    return _ast.Directive(*self._at(pos), m.group(), result[0]), result[1]
+            return _ast.Directive(*self._at(pos), m.group(), None), m.end()
+        m = _match_marker(text, pos)
+        if m is not None:
+            return _ast.ServiceResponseMarker(*self._at(pos)), m.end()
+        return self._attribute(pos)
+
+    def _attribute(self, pos: int) -> _Result:
+        text = self._text
+        result = self._type_scalar(pos)
+        if result is not None and text.startswith("[", self._skip(result[1])):
+            result = _run(self._type(pos))  # Only the array types contain nested expressions.
+        if result is not None:  # The constant and the field share the prefix.
+            ty, end = result
+            w = _match_whitespace(text, end)
+            if w is not None:
+                m = _match_identifier(text, w.end())
+                if m is not None:
+                    name, end = m.group(), m.end()
+                    eq = self._skip(end)
+                    if text.startswith("=", eq):
+                        result = _run(self._expression(self._skip(eq + 1)))
+                        if result is not None:
+                            return _ast.Constant(*self._at(pos), ty, name, result[0]), result[1]
+                    return _ast.Field(*self._at(pos), ty, name), end
+        void = self._void(pos)
+        if void is not None:
+            return _ast.PaddingField(*self._at(pos), void[0]), void[1]
+        return None
+
+    # ================================================== Data types ==================================================
+
+    def _type(self, pos: int) -> _Routine:
+        text = self._text
+        result = self._type_scalar(pos)
+        if result is None:
+            return None
+        element, end = result
+        bracket = self._skip(end)
+        if text.startswith("[", bracket):
+            bracket = self._skip(bracket + 1)
+            for mode in ("<=", "<", ""):
+                if text.startswith(mode, bracket):
+                    capacity = yield self._expression(self._skip(bracket + len(mode)))
+                    if capacity is not None:
+                        closing = self._skip(capacity[1])
+                        if text.startswith("]", closing):
+                            return _ast.ArrayType(*self._at(pos), element, mode, capacity[0]), closing + 1
+        return result
+
+    def _type_scalar(self, pos: int) -> _Result:
+        text = self._text
+        m = _match_identifier(text, pos)
+        if m is None:
+            return None  # All scalar types begin with an identifier-like token.
+        names = [m.group()]
+        end = m.end()
+        while text.startswith(".", end):
+            m = _match_identifier(text, end + 1)
+            if m is None:
+                break
+            names.append(m.group())
+            end = m.end()
+        if text.startswith(".", end):
+            major = _match_decimal(text, end + 1)
+            if major is not None and text.startswith(".", major.end()):
+                minor = _match_decimal(text, major.end() + 1)
+                if minor is not None:
+                    version = int(major.group().replace("_", "")), int(minor.group().replace("_", ""))
+                    return _ast.VersionedType(*self._at(pos), names, *version), minor.end()
+        return self._primitive(pos) or self._void(pos)
+
+    def _primitive(self, pos: int) -> _Result:
+        text = self._text
+        for cast_mode in ("truncated", "saturated"):
+            if text.startswith(cast_mode, pos):
+                w = _match_whitespace(text, pos + len(cast_mode))
+                if w is not None:
+                    result = self._primitive_name(pos, w.end(), cast_mode)
+                    if result is not None:
+                        return result
+        return self._primitive_name(pos, pos, "saturated")
+
+    def _primitive_name(self, start: int, pos: int, cast_mode: str) -> _Result:
+        text = self._text
+        if text.startswith("bool", pos):
+            return _ast.PrimitiveType(*self._at(start), cast_mode, "bool", None), pos + 4
+        for name in _PRIMITIVE_NAMES:
+            if text.startswith(name, pos):
+                m = _match_bit_length(text, pos + len(name))
+                if m is not None:
+                    return _ast.PrimitiveType(*self._at(start), cast_mode, name, int(m.group())), m.end()
+        return None
+
+    def _void(self, pos: int) -> _Result:
+        if self._text.startswith("void", pos):
+            m = _match_bit_length(self._text, pos + 4)
+            if m is not None:
+                return _ast.VoidType(*self._at(pos), int(m.group())), m.end()
+        return None
+
+    # ================================================== Expressions ==================================================
+
+    def _expression(self, pos: int) -> _Routine:
+        result = yield self._logical_not(pos)
+        if result is None:
+            return None
+        text = self._text
+        operands, end = [result[0]], result[1]
+        symbols: List[str] = []
+        while True:
+            op_pos = self._skip(end)
+            for symbol in _OPERATORS_LOGICAL:
+                if text.startswith(symbol, op_pos):
+                    break
+            else:
+                break
+            result = yield self._logical_not(self._skip(op_pos + len(symbol)))
+            if result is None:
+                break  # Backtrack to before the whitespace preceding the operator.
+            operands.append(result[0])
+            symbols.append(symbol)
+            end = result[1]
+        return (_ast.OperatorChain(*self._at(pos), operands, symbols) if symbols else operands[0]), end
+
+    def _logical_not(self, pos: int) -> _Routine:
+        text = self._text
+        if text.startswith("!", pos):
+            result = yield self._logical_not(self._skip(pos + 1))
+            if result is not None:
+                return _ast.UnaryOperator(*self._at(pos), "!", result[0]), result[1]
+            return None  # No other operand begins with "!".
+        # The rules from ex_comparison to ex_multiplicative. Like in the grammar, after every operand the levels
+        # are tried from the tightest binding to the loosest; a level is terminated at an operator that is not
+        # followed by a valid operand, and the next looser level tries its operators at the same position.
+        result = yield self._inversion(pos)
+        if result is None:
+            return None
+        operand, end = result
+        start = pos
+        # The chains that are not terminated yet, from the loosest binding to the tightest:
+        # the level, the position of the first operand, the operands except the current one, and the operators.
+        chains: List[Tuple[int, int, List[_ast.Expression], List[str]]] = []
+        while True:
+            op_pos = self._skip(end)
+            for level in _OPERATOR_LEVELS_TIGHTEST_FIRST:
+                for symbol in _OPERATORS_BINARY[level]:
+                    if text.startswith(symbol, op_pos):
+                        break
+                else:
+                    continue
+                operand_pos = self._skip(op_pos + len(symbol))
+                result = yield self._inversion(operand_pos)
+                if result is not None:
+                    break
+            else:
+                break  # Backtrack to before the whitespace preceding the operator.
+            while chains and chains[-1][0] > level:
+                operand, start = self._terminate(chains.pop(), operand)
+            if chains and chains[-1][0] == level:
+                chains[-1][2].append(operand)
+                chains[-1][3].append(symbol)
+            else:
+                chains.append((level, start, [operand], [symbol]))
+            operand, end = result
+            start = operand_pos
+        while chains:
+            operand, start = self._terminate(chains.pop(), operand)
+        return operand, end
+
+    def _terminate(
+        self, chain: Tuple[int, int, List[_ast.Expression], List[str]], last: _ast.Expression
+    ) -> Tuple[_ast.Expression, int]:
+        _, start, operands, symbols = chain
+        return _ast.OperatorChain(*self._at(start), operands + [last], symbols), start
+
+    def _inversion(self, pos: int) -> _Routine:
+        """The rules ex_inversion, ex_exponential, ex_attribute, and expression_atom."""
+        text = self._text
+        start = pos
+        sign = text[pos : pos + 1]
+        if sign in ("+", "-"):
+            pos = self._skip(pos + 1)
+
+        if text.startswith("(", pos):
+            result = yield self._expression(self._skip(pos + 1))
+            if result is None:
+                return None
+            closing = self._skip(result[1])
+            if not text.startswith(")", closing):
+                return None  # No other atom begins with "(".
+            result = result[0], closing + 1
+        elif text.startswith("{", pos):
+            result = yield self._set(pos)
+            if result is None:
+                return None  # No other atom begins with "{".
+        else:
+            result = self._type_scalar(pos)
+            if result is not None and text.startswith("[", self._skip(result[1])):
+                result = yield self._type(pos)  # Only the array types contain nested expressions.
+            result = result or self._literal(pos)
+            if result is None:
+                m = _match_identifier(text, pos)
+                if m is None:
+                    return None
+                result = _ast.Identifier(*self._at(pos), m.group()), m.end()
+
+        operands, end = [result[0]], result[1]
+        while True:
+            op_pos = self._skip(end)
+            if not text.startswith(".", op_pos):
+                break
+            name_pos = self._skip(op_pos + 1)
+            m = _match_identifier(text, name_pos)
+            if m is None:
+                break
+            operands.append(_ast.AttributeName(*self._at(name_pos), m.group()))
+            end = m.end()
+        out = operands[0]
+        if len(operands) > 1:
+            out = _ast.OperatorChain(*self._at(pos), operands, ["."] * (len(operands) - 1))
+
+        op_pos = self._skip(end)
+        if text.startswith("**", op_pos):
+            right = yield self._inversion(self._skip(op_pos + 2))  # Right recursion.
+            if right is not None:
+                out, end = _ast.OperatorChain(*self._at(pos), [out, right[0]], ["**"]), right[1]
+
+        if sign in ("+", "-"):
+            out = _ast.UnaryOperator(*self._at(start), sign, out)
+        return out, end
+
+    # ================================================== Literals ==================================================
+
+    def _literal(self, pos: int) -> _Result:
+        """All literals except the set literal, which may contain nested expressions."""
+        text = self._text
+        end = self._real(pos)
+        if end is not None:
+            value = fractions.Fraction(text[pos:end].replace("_", ""))
+            return _ast.RationalLiteral(*self._at(pos), value), end
+        m = _match_integer(text, pos)
+        if m is not None:
+            value = fractions.Fraction(int(m.group().replace("_", ""), base=0))
+            return _ast.RationalLiteral(*self._at(pos), value), m.end()
+        m = _match_string(text, pos)
+        if m is not None:
+            return _ast.StringLiteral(*self._at(pos), m.group()), m.end()
+        if text.startswith("true", pos):
+            return _ast.BooleanLiteral(*self._at(pos), True), pos + 4
+        if text.startswith("false", pos):
+            return _ast.BooleanLiteral(*self._at(pos), False), pos + 5
+        return None
+
+    def _set(self, pos: int) -> _Routine:
+        text = self._text
+        elements: List[_ast.Expression] = []
+        end = self._skip(pos + 1)
+        result = yield self._expression(end)
+        if result is not None:
+            elements.append(result[0])
+            end = result[1]
+            while True:
+                comma = self._skip(end)
+                if not text.startswith(",", comma):
+                    break
+                result = yield self._expression(self._skip(comma + 1))
+                if result is None:
+                    break
+                elements.append(result[0])
+                end = result[1]
+        closing = self._skip(end)
+        if text.startswith("}", closing):
+            return _ast.SetLiteral(*self._at(pos), elements), closing + 1
+        return None
+
+    def _real(self, pos: int) -> Optional[int]:
+        """Returns the end position of the real literal or None."""
+        text = self._text
+        mantissa = self._real_point_notation(pos)
+        if mantissa is None:
+            m = _match_real_digits(text, pos)
+            mantissa = m.end() if m is not None else None
+        if mantissa is not None:
+            m = _match_real_exponent(text, mantissa)
+            if m is not None:
+                m = _match_real_digits(text, m.end())
+                if m is not None:
+                    return m.end()
+        return self._real_point_notation(pos)
+
+    def _real_point_notation(self, pos: int) -> Optional[int]:
+        text = self._text
+        digits = _match_real_digits(text, pos)
+        fraction = digits.end() if digits is not None else pos
+        if text.startswith(".", fraction):
+            m = _match_real_digits(text, fraction + 1)
+            if m is not None:
+                return m.end()
+        if digits is not None and text.startswith(".", digits.end()):
+            return digits.end() + 1
+        return None
+
+
+def _unittest_handwritten_parser() -> None:
+    from pytest import raises
+    from . import _parser
+
+    def both(text: str) -> typing.Union[_ast.Definition, int]:
+        """Returns the tree or the line number of the syntax error."""
+        outcomes: typing.List[typing.Union[_ast.Definition, int]] = []
+        for fun in (lambda: _parser.parse_ast(text, backend="parsimonious"), lambda: parse_ast(text)):
+            try:
+                outcomes.append(fun())
+            except DSDLSyntaxError as ex:
+                assert ex.text == "Syntax error" and ex.line is not None
+                outcomes.append(ex.line)
+        assert outcomes[0] == outcomes[1], "\n%r\n%r" % tuple(outcomes)
+        return outcomes[0]
+
+    assert both("") == _ast.Definition([_ast.Line(1, None, None, True)])
+    tree = both("# Header\n#Second line\n\nuint8 a  =  B # Doc\n")
+    assert isinstance(tree, _ast.Definition)
+    assert [(x.line, x.comment, x.empty) for x in tree.lines] == [
+        (1, "Header", False),
+        (2, "Second line", False),
+        (3, None, True),
+        (4, "Doc", False),
+        (5, None, True),
+    ]
+    constant = tree.lines[3].statement
+    assert isinstance(constant, _ast.Constant) and constant.name == "a"
+    assert (constant.line, constant.column) == (4, 1)
+    assert (constant.value.line, constant.value.column) == (4, 13)
+
+    both("@sealed\r\ntruncated float16[<=3] x = 1\t**-2 ** 2 ** ab\n---\n# Response\nvoid3\n@extent 8 * ab")
+    both("bool[<xyz + 1] x\nint2[ 2 ] y = {1, 2.5e-1, .5, 1., 0x_1_0, 0b1, 0o7, 00, 'a', \"b\\n\", true}.min")
+    both("@print 1 + 2 * 3 - 4 / 5 % 6 | 7 ^ 8 & 9 == !false != (true || false && true) >= 1 <= 2 < 3 > 4")
+    both("uint8 A = 'multi\nline' + B\nuint8 B = 'x\\z'\nuint8 C = B\n")  # String literal spanning lines.
+    both("uint8 a\nns.Type.1_0.0 b\nsaturated bool[<=  ns.Type.1.0.X] c")
+    both("@assert a.b.c . d\n@assert uint8.MAX + (1)\n@print\n----\n")
+
+    # Syntax errors, including those where the error is detected after a partial match.
+    for text in [
+        "uint8x a",
+        "uint8 a\nuint8 b = \n",
+        "truex",
+        "uint8 A = 'x\ny' junk",
+        "@",
+        "bool a\r\r\n",
+        "void8[3]",
+        "uint8 A = 1 +",
+        "uint8[<= ] a",
+        "uint8 a = {1,}",
+        "uint8 a = (1",
+    ]:
+        assert isinstance(both(text), int)
+
+    with raises(ValueError):
+        _parser.parse_ast("", backend="nonexistent")
+
+
+def _unittest_handwritten_parser_random_expressions() -> None:
+    import random
+    from . import _parser
+
+    rng = random.Random(42)
+    atoms = ["1", "0x1F", ".5e1", "true", "'s'", '"\\t"', "ab", "a.b", "{}", "uint8", "int3[<4]", "ns.T.1.0"]
+    unary = ["!", "-", "+"]
+    binary = ["||", "&&", "==", "!=", "<=", ">=", "<", ">", "|", "^", "&", "+", "-", "*", "/", "%", "**"]
+
+    def generate(depth: int) -> str:
+        choice = rng.randrange(6) if depth > 0 else 0
+        if choice == 0:
+            return rng.choice(atoms)
+        if choice == 1:
+            return rng.choice(unary) + generate(depth - 1)
+        if choice == 2:
+            return "(" + generate(depth - 1) + ")"
+        if choice == 3:
+            return "{" + ", ".join(generate(depth - 1) for _ in range(rng.randrange(1, 4))) + "}"
+        if choice == 4:
+            return generate(depth - 1) + "." + rng.choice(["x", "min", "count"])
+        out = generate(depth - 1)
+        for _ in range(rng.randrange(1, 5)):
+            out += rng.choice(["", " "]) + rng.choice(binary) + rng.choice(["", " "]) + generate(depth - 1)
+        return out
+
+    for _ in range(500):
+        text = "@assert " + generate(5)
+        if rng.random() < 0.3:  # Mutate to cover the error paths as well.
+            cut = rng.randrange(len(text))
+            text = text[:cut] + rng.choice(["", "(", ")", "!", "*", "{", ",", " ", "."]) + text[cut + 1 :]
+        outcomes: typing.List[typing.Any] = []
+        for backend in _parser.PARSER_BACKENDS:
+            try:
+                outcomes.append(_parser.parse_ast(text, backend=backend))
+            except DSDLSyntaxError as ex:
+                outcomes.append(ex.line)
+        assert outcomes[0] == outcomes[1], text
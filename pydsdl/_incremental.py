@@ -0,0 +1,288 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Incremental parsing for editor integrations. After an edit, only the affected lines are parsed again while the
+syntax trees of the other lines are reused. The semantic analysis is resumed from the last checkpoint preceding
+the first affected line rather than started over; it cannot be limited to the affected lines because the meaning
+of a statement depends on the preceding ones (constants, ``_offset_``, etc.).
+The outcome is always the same as if the new text was parsed and evaluated from scratch.
+The public entry point is :func:`pydsdl.parse_incremental`.
+"""
+
+import copy
+import typing
+from typing import Callable, List, Optional, Tuple
+from pathlib import Path
+from . import _ast
+from . import _error
+from ._serializable import CompositeType
+from ._parser import DSDLSyntaxError, Evaluator, StatementStreamProcessor, parse_ast, resolve_parser_backend
+
+_CHECKPOINT_INTERVAL = 32
+"""
+The state of the semantic analysis is saved before every N-th line. A greater interval requires less memory
+but more lines may have to be evaluated again.
+"""
+
+_Checkpoint = Tuple[Tuple[int, str, bool], StatementStreamProcessor]
+"""The state of the evaluator and a snapshot of the statement stream processor."""
+
+_Finalizer = Callable[[StatementStreamProcessor], Optional[CompositeType]]
+"""Constructs the data type from the processor that has been fed with the entire text without errors."""
+
+
+class ParseResult:
+    """
+    The outcome of :func:`pydsdl.parse_incremental` or :meth:`reparse`: the diagnostics of one version of the text
+    of a definition that is being edited. Results are immutable; the same result can be reparsed any number of times
+    (e.g., to try out different edits), and the outcome is always the same as if the new text was parsed from scratch.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        definition: Optional[_ast.Definition],
+        statement_stream_processor: StatementStreamProcessor,
+        error: Optional[_error.FrontendError],
+        checkpoints: List[_Checkpoint],
+        context: "_Context",
+    ) -> None:
+        self._text = text
+        self._definition = definition
+        self._statement_stream_processor = statement_stream_processor
+        self._checkpoints = checkpoints
+        self._context = context
+        self._composite_type = None  # type: Optional[CompositeType]
+        if error is None:
+            try:
+                self._composite_type = context.finalize(statement_stream_processor)
+            except _error.FrontendError as ex:
+                error = ex
+        if error is not None and context.path is not None:
+            error.set_error_location_if_unknown(path=context.path)
+        self._error = error
+
+    @property
+    def text(self) -> str:
+        """The text of the definition this result pertains to."""
+        return self._text
+
+    @property
+    def error(self) -> Optional[_error.FrontendError]:
+        """
+        The syntax or semantic error that has stopped the processing of the text; None if the definition is valid.
+        The line number, if known, refers to :attr:`text`.
+        """
+        return self._error
+
+    @property
+    def composite_type(self) -> Optional[CompositeType]:
+        """The data type defined by the text; None if there is an error."""
+        return self._composite_type
+
+    def reparse(self, start: int, end: int, replacement: str) -> "ParseResult":
+        """
+        Returns the result for the new text obtained by replacing the characters of :attr:`text` in ``[start, end)``
+        with the replacement; e.g., ``reparse(n, n, "x")`` inserts a character at the index n.
+        Only the affected lines are parsed again, and the semantic analysis is resumed from the checkpoint preceding
+        the first affected line rather than started over, which may invoke the print output handler again.
+
+        :raises: :class:`ValueError` if the range is not within the text.
+        """
+        old_text = self._text
+        if not 0 <= start <= end <= len(old_text):
+            raise ValueError("Invalid edit range [%d, %d) of a text of length %d" % (start, end, len(old_text)))
+        text = old_text[:start] + replacement + old_text[end:]
+        first = old_text.count("\n", 0, start)
+        last = first + old_text.count("\n", start, end)
+        line_delta = replacement.count("\n") - (last - first)
+        tree = self._definition
+        # A string literal may span multiple lines, in which case the lines of the syntax tree do not match the lines
+        # of the text; this is rare enough to not be worth handling specially.
+        if tree is None or len(tree.lines) != old_text.count("\n") + 1:
+            return _evaluate(text, self._context.parse_ast(text), self._checkpoints[:1], 0, self._context)
+
+        lines = tree.lines[:first]
+        pos = old_text.rfind("\n", 0, start) + 1  # The beginning of the first affected line is not affected.
+        for index in range(first, last + line_delta + 1):
+            eol = text.find("\n", pos)
+            line_text = text[pos:eol] if eol >= 0 else text[pos:]
+            if eol >= 0 and line_text.endswith("\r"):
+                line_text = line_text[:-1]  # The end of line is CR LF.
+            pos = eol + 1
+            try:
+                (line,) = parse_ast(line_text, self._context.backend).lines
+            except DSDLSyntaxError:
+                # Either a genuine syntax error or a string literal that spans multiple lines. Either way, the exact
+                # outcome can only be obtained by parsing the text from scratch.
+                return _evaluate(text, self._context.parse_ast(text), self._checkpoints[:1], 0, self._context)
+            lines.append(line.shifted(index) if index > 0 else line)
+        lines += [x.shifted(line_delta) if line_delta else x for x in tree.lines[last + 1 :]]
+        return _evaluate(text, _ast.Definition(lines), self._checkpoints, first, self._context)
+
+    def __repr__(self) -> str:
+        return "%s(error=%r, composite_type=%s)" % (type(self).__name__, self._error, self._composite_type)
+
+
+class _Context:
+    """The parameters shared by all results derived from the same :func:`parse`."""
+
+    def __init__(self, finalize: Optional[_Finalizer], path: Optional[Path], backend: Optional[str]) -> None:
+        self.finalize = finalize or (lambda _: None)  # type: _Finalizer
+        self.path = path
+        self.backend = resolve_parser_backend(backend)
+
+    def parse_ast(self, text: str) -> typing.Union[_ast.Definition, DSDLSyntaxError]:
+        try:
+            return parse_ast(text, self.backend)
+        except DSDLSyntaxError as ex:
+            return ex
+
+
+def parse(
+    text: str,
+    statement_stream_processor: StatementStreamProcessor,
+    finalize: Optional[_Finalizer] = None,
+    path: Optional[Path] = None,
+    backend: Optional[str] = None,
+) -> ParseResult:
+    """
+    Same as :func:`pydsdl._parser.parse` except that the error is returned rather than raised
+    and the result can be updated using :meth:`ParseResult.reparse`.
+    The processor is not modified; the results operate on its copies.
+    The finalizer is applied to the processor once the entire text is processed without errors;
+    the errors are attributed to the path, if given.
+    """
+    context = _Context(finalize, path, backend)
+    checkpoint = Evaluator(statement_stream_processor).state, copy.copy(statement_stream_processor)
+    return _evaluate(text, context.parse_ast(text), [checkpoint], 0, context)
+
+
+def _evaluate(
+    text: str,
+    definition: typing.Union[_ast.Definition, DSDLSyntaxError],
+    checkpoints: List[_Checkpoint],
+    first_line_index: int,
+    context: _Context,
+) -> ParseResult:
+    """
+    Evaluates the definition starting from the last checkpoint that precedes the first line that has changed.
+    The checkpoints that follow it are no longer valid and are replaced with new ones.
+    """
+    if isinstance(definition, DSDLSyntaxError):
+        return ParseResult(text, None, copy.copy(checkpoints[0][1]), definition, checkpoints[:1], context)
+    checkpoints = checkpoints[: first_line_index // _CHECKPOINT_INTERVAL + 1]
+    state, snapshot = checkpoints[-1]
+    ssp = copy.copy(snapshot)
+
+    evaluator = Evaluator(ssp)
+    evaluator.state = state
+    first = (len(checkpoints) - 1) * _CHECKPOINT_INTERVAL
+
+    def lines() -> typing.Iterator[_ast.Line]:
+        for index in range(first, len(definition.lines)):
+            if index > first and index % _CHECKPOINT_INTERVAL == 0:
+                checkpoints.append((evaluator.state, copy.copy(ssp)))
+            yield definition.lines[index]
+
+    error: Optional[_error.FrontendError] = None
+    try:
+        evaluator.run(lines())
+    except _error.FrontendError as ex:
+        error = ex
+    return ParseResult(text, definition, ssp, error, checkpoints, context)
+
+
+def _unittest_incremental() -> None:  # pylint: disable=protected-access
+    import random
+    from pytest import raises
+    from . import _expression
+    from . import _serializable
+
+    class Recorder(StatementStreamProcessor):
+        def __init__(self) -> None:
+            self.log: List[str] = []
+
+        def __copy__(self) -> "Recorder":
+            out = Recorder()
+            out.log = list(self.log)
+            return out
+
+        def on_header_comment(self, comment: str) -> None:
+            self.log.append("header %r" % comment)
+
+        def on_attribute_comment(self, comment: str) -> None:
+            self.log.append("attribute %r" % comment)
+
+        def on_constant(self, constant_type: typing.Any, name: str, value: _expression.Any) -> None:
+            self.log.append("constant %s %s %s" % (constant_type, name, value))
+
+        def on_field(self, field_type: typing.Any, name: str) -> None:
+            self.log.append("field %s %s" % (field_type, name))
+
+        def on_padding_field(self, padding_field_type: typing.Any) -> None:
+            self.log.append("padding %s" % padding_field_type)
+
+        def on_directive(self, line_number: int, directive_name: str, associated_expression_value: typing.Any) -> None:
+            self.log.append("directive %d %s %s" % (line_number, directive_name, associated_expression_value))
+            if directive_name == "assert" and associated_expression_value != _expression.Boolean(True):
+                raise _error.InvalidDefinitionError("Assertion failed")
+
+        def on_service_response_marker(self) -> None:
+            self.log.append("marker")
+
+        def resolve_top_level_identifier(self, name: str) -> _expression.Any:
+            return _expression.Rational(sum(x.startswith(("field", "padding")) for x in self.log))
+
+        def resolve_versioned_data_type(self, name: str, version: _serializable.Version) -> typing.Any:
+            raise _error.InvalidDefinitionError("Not found")  # pragma: no cover
+
+    def check(result: ParseResult) -> ParseResult:
+        reference = parse(result.text, Recorder())
+        assert result._definition == reference._definition
+        assert (
+            typing.cast(Recorder, result._statement_stream_processor).log
+            == typing.cast(Recorder, reference._statement_stream_processor).log
+        )
+        assert repr(result.error) == repr(reference.error)
+        return result
+
+    initial = Recorder()
+    result = check(parse("# Header\n\nuint8 a # A\n# More\n@assert _offset_ == 1\n@sealed", initial))
+    assert initial.log == [] and result.error is None
+    # Insert a field before the assertion, breaking it; the lines below are shifted.
+    result = check(result.reparse(22, 22, "uint8 b\r\nvoid2\n"))
+    assert result.text == "# Header\n\nuint8 a # A\nuint8 b\r\nvoid2\n# More\n@assert _offset_ == 1\n@sealed"
+    assert isinstance(result.error, _error.InvalidDefinitionError) and result.error.line == 7
+    offset = result.text.index("== 1") + 3
+    result = check(result.reparse(offset, offset + 1, "3"))
+    assert result.error is None
+    result = check(result.reparse(0, 0, "uint8 x = 'a\nb'\n"))  # Multi-line string literal
+    result = check(result.reparse(0, 2, ""))
+    assert isinstance(result.error, DSDLSyntaxError) and result._definition is None
+    result = check(result.reparse(0, 0, "ui"))
+    assert result.error is None
+    with raises(ValueError):
+        result.reparse(0, len(result.text) + 1, "")
+
+    # Random edits of a long definition covering multiple checkpoints. The edits that replace whole lines keep
+    # the text valid, mostly; the other edits are likely to break it, so they are reverted afterwards.
+    rng = random.Random(0)
+    statements = ["uint8 a", "void1", "# Doc", "", "uint8 C = _offset_ + 1", "@print C", "@assert _offset_ < 99", "---"]
+    result = check(parse("\n".join(rng.choice(statements[:-1]) for _ in range(200)), Recorder()))
+    for _ in range(100):
+        line_starts = [0] + [i + 1 for i, c in enumerate(result.text) if c == "\n"]
+        if rng.random() < 0.7:
+            start, end = sorted(rng.choices(line_starts, k=2))
+            end = max(start, end - 1) if rng.random() < 0.5 else end  # Keep the last end of line.
+            replacement = "".join(x + "\n" for x in rng.choices(statements, k=rng.randint(0, 3)))
+            result = check(result.reparse(start, end, replacement))
+        else:
+            start = rng.randint(0, len(result.text))
+            end = min(len(result.text), start + rng.choice([0, 1, 5]))
+            original = result.text[start:end]
+            replacement = rng.choice(["", "\n", "8", "#", "'"])
+            result = check(result.reparse(start, end, replacement))
+            result = check(result.reparse(start, start + len(replacement), original))
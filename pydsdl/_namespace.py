@@ -4,13 +4,21 @@
 
 # pylint: disable=logging-not-lazy
 
-from typing import Iterable, Callable, DefaultDict, List, Optional, Union, Set, Dict
+from typing import Any, Iterable, Callable, DefaultDict, List, Optional, Union, Set, Dict, Tuple, cast
 import logging
+import fnmatch
+import itertools
 import collections
 from pathlib import Path
 from . import _serializable
 from . import _dsdl_definition
+from . import _data_type_builder
+from . import _parser
 from . import _error
+from . import _cache
+from . import _incremental
+from . import _parallel
+from . import _scanner
 
 
 class RootNamespaceNameCollisionError(_error.InvalidDefinitionError):
@@ -63,6 +71,28 @@ class ExtentConsistencyError(_error.InvalidDefinitionError):
     """
 
 
+class CollectedErrors(_error.FrontendError):
+    """
+    Raised by :func:`read_namespace` in the ``errors="collect"`` mode once the whole namespace is processed
+    if any errors were encountered. Carries all of them along with the data types that were processed successfully.
+    """
+
+    def __init__(self, errors: List[_error.FrontendError], types: List[_serializable.CompositeType]):
+        super().__init__("%d errors:\n%s" % (len(errors), "\n".join(map(str, errors))))
+        self._errors = list(errors)
+        self._types = list(types)
+
+    @property
+    def errors(self) -> List[_error.FrontendError]:
+        """All encountered errors sorted by path and line number."""
+        return list(self._errors)
+
+    @property
+    def types(self) -> List[_serializable.CompositeType]:
+        """The data types that were processed successfully, ordered like the output of :func:`read_namespace`."""
+        return list(self._types)
+
+
 class SealingConsistencyError(_error.InvalidDefinitionError):
     """
     Different sealing status under the same major version.
@@ -79,6 +109,12 @@ def read_namespace(
     print_output_handler: Optional[PrintOutputHandler] = None,
     allow_unregulated_fixed_port_id: bool = False,
     allow_root_namespace_name_collision: bool = True,
+    cache_dir: Union[None, Path, str] = None,
+    jobs: Optional[int] = 1,
+    exclude_patterns: Iterable[str] = (),
+    errors: str = "raise",
+    cache_size_limit: int = _cache.DefinitionCache.DEFAULT_SIZE_LIMIT,
+    parser_backend: Optional[str] = None,
 ) -> List[_serializable.CompositeType]:
     """
     This function is the main entry point of the library.
@@ -108,6 +144,34 @@ def read_namespace(
              the same root namespace name multiple times in the lookup dirs. This will enable defining a namespace
              partially and let other entities define new messages or new sub-namespaces in the same root namespace.
 
+    :param cache_dir: If provided, processed definitions are stored in this directory (it will be created if needed)
+        and reused by subsequent invocations, so that definitions that did not change (along with everything they
+        depend on) are not processed again. The directory can be shared between concurrent invocations.
+        Stale entries are invalidated automatically; the least recently used entries are evicted once the size of
+        the directory exceeds the limit. The directory shall not be writeable by untrusted parties.
+
+    :param jobs: The number of worker processes used for processing the definitions; None means one per CPU core.
+        Independent definitions are processed concurrently, dependencies first.
+        The output and the reported errors are the same regardless of the number of jobs, but the print output
+        (see ``print_output_handler``) is delivered only after the processing of the namespace is finished.
+        This is also the number of threads used for listing the directories.
+
+    :param exclude_patterns: Glob patterns of files and directories that are not searched for DSDL definitions,
+        such as ``.git`` or ``build``. A pattern is matched against the name and the path relative to the root
+        namespace directory (with forward slashes); for example, ``*/tmp*`` matches ``foo/tmp123``.
+
+    :param errors: Either ``"raise"`` (default) to raise the first encountered error, or ``"collect"`` to keep going
+        past failed definitions and raise :class:`pydsdl.CollectedErrors` that carries all errors along with the
+        successfully processed types at the end. In the latter case, the definitions that depend on a failed one
+        are skipped instead of being reported as well.
+
+    :param cache_size_limit: The total size of the ``cache_dir`` in bytes above which the least recently used
+        entries are evicted. Ignored if there is no ``cache_dir``.
+
+    :param parser_backend: Either ``"parsimonious"`` or ``"handwritten"``; both produce the same output.
+        If not specified, it is taken from the environment variable ``PYDSDL_PARSER_BACKEND``,
+        defaulting to parsimonious.
+
     :return: A list of :class:`pydsdl.CompositeType` sorted lexicographically by full data type name,
              then by major version (newest version first), then by minor version (newest version first).
              The ordering guarantee allows the caller to always find the newest version simply by picking
@@ -117,6 +181,487 @@ def read_namespace(
         :class:`OSError` if directories do not exist or inaccessible,
         :class:`ValueError`/:class:`TypeError` if the arguments are invalid.
     """
+    jobs = _parallel.resolve_job_count(jobs)
+    parser_backend = _parser.resolve_parser_backend(parser_backend)
+    if errors not in ("raise", "collect"):
+        raise ValueError("The error handling mode shall be either 'raise' or 'collect', not %r" % errors)
+    scanner = _scanner.FileSystemScanner(exclude_patterns, threads=jobs)
+    root_namespace_directory, lookup_directories_path_list = _prepare_directories(
+        root_namespace_directory, lookup_directories, allow_root_namespace_name_collision, scanner
+    )
+
+    # Construct DSDL definitions from the target and the lookup dirs.
+    target_dsdl_definitions = _construct_dsdl_definitions_from_namespace(
+        root_namespace_directory, scanner=scanner, parser_backend=parser_backend
+    )
+    if not target_dsdl_definitions:
+        _logger.info("The namespace at %s is empty", root_namespace_directory)
+        return []
+    lookup_dsdl_definitions = _construct_lookup_definitions(
+        root_namespace_directory,
+        target_dsdl_definitions,
+        lookup_directories_path_list,
+        scanner=scanner,
+        parser_backend=parser_backend,
+    )
+
+    return _read_and_check(
+        target_dsdl_definitions,
+        lookup_dsdl_definitions,
+        print_output_handler,
+        allow_unregulated_fixed_port_id,
+        _make_cache(cache_dir, cache_size_limit),
+        jobs,
+        collect_errors=errors == "collect",
+    )
+
+
+def read_types(
+    names_and_versions: Iterable[Union[str, Tuple[str, _serializable.Version]]],
+    lookup_directories: Union[Path, str, Iterable[Union[Path, str]]],
+    print_output_handler: Optional[PrintOutputHandler] = None,
+    allow_unregulated_fixed_port_id: bool = False,
+    allow_root_namespace_name_collision: bool = True,
+    cache_dir: Union[None, Path, str] = None,
+    jobs: Optional[int] = 1,
+    exclude_patterns: Iterable[str] = (),
+    cache_size_limit: int = _cache.DefinitionCache.DEFAULT_SIZE_LIMIT,
+    parser_backend: Optional[str] = None,
+) -> List[_serializable.CompositeType]:
+    """
+    A lightweight alternative to :func:`read_namespace` for applications that need only a few specific data types.
+    The requested definitions are located by their file names, and only they and the definitions they depend on
+    (directly or indirectly) are read; the rest of the lookup directories is not processed at all.
+    The processed types are validated the same way as the types of a namespace read by :func:`read_namespace`.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as di:
+    ...     (Path(di) / "ns").mkdir()
+    ...     _ = (Path(di) / "ns/A.1.0.dsdl").write_text("ns.B.1.0 b\\n@sealed")
+    ...     _ = (Path(di) / "ns/B.1.0.dsdl").write_text("@sealed")
+    ...     _ = (Path(di) / "ns/C.1.0.dsdl").write_text("@sealed")
+    ...     [str(t) for t in read_types(["ns.A.1.0"], Path(di) / "ns")]
+    ['ns.A.1.0', 'ns.B.1.0']
+
+    :param names_and_versions: The data types to read, each specified either as a string containing the full name
+        followed by the major and minor version numbers (like ``uavcan.node.Heartbeat.1.0``) or as a tuple of the
+        full name and :class:`pydsdl.Version`.
+
+    :param lookup_directories: The root namespace directories containing the requested data types and everything
+        they depend on.
+
+    The other parameters are the same as those of :func:`read_namespace`.
+
+    :return: A list of the requested types and their dependencies sorted in the same order as the output of
+        :func:`read_namespace`.
+
+    :raises: Same as :func:`read_namespace`. If a requested data type cannot be found, a
+        :class:`pydsdl.InvalidDefinitionError` is raised.
+    """
+    requested = []  # type: List[Tuple[str, _serializable.Version]]
+    for item in names_and_versions:
+        if isinstance(item, str):
+            try:
+                full_name, major, minor = item.rsplit(_serializable.CompositeType.NAME_COMPONENT_SEPARATOR, 2)
+                requested.append((full_name, _serializable.Version(int(major), int(minor))))
+            except ValueError:
+                raise ValueError("Invalid data type specifier, expected a full name with version: %r" % item) from None
+        else:
+            full_name, version = item
+            requested.append((str(full_name), _serializable.Version(*version)))
+    if not requested:
+        return []
+
+    jobs = _parallel.resolve_job_count(jobs)
+    parser_backend = _parser.resolve_parser_backend(parser_backend)
+    scanner = _scanner.FileSystemScanner(exclude_patterns, threads=jobs)
+    lookup_directories_path_list = _prepare_lookup_directories(
+        lookup_directories, allow_root_namespace_name_collision, scanner=scanner
+    )
+    lookup_dsdl_definitions = []  # type: List[_dsdl_definition.DSDLDefinition]
+    for ld in lookup_directories_path_list:
+        lookup_dsdl_definitions += _construct_dsdl_definitions_from_namespace(
+            ld, scanner=scanner, parser_backend=parser_backend
+        )
+    lookup_index = _dsdl_definition.DefinitionIndex(lookup_dsdl_definitions)
+
+    target_dsdl_definitions = []  # type: List[_dsdl_definition.DSDLDefinition]
+    for full_name, version in requested:
+        found = lookup_index.find(full_name, version)
+        if not found:
+            raise _data_type_builder.UndefinedDataTypeError(lookup_index.explain_missing(full_name, version, None))
+        target_dsdl_definitions += [d for d in found[:1] if all(d is not x for x in target_dsdl_definitions)]
+
+    # The definitions that will be processed are estimated by a lexical scan so that they could be checked for
+    # collisions before processing, same as in read_namespace(). Whatever was missed by the estimate is checked after.
+    closure = _find_dependency_closure(target_dsdl_definitions, lookup_index)
+    _ensure_no_collisions(closure, lookup_dsdl_definitions)
+    _logger.info(
+        "Reading %d requested definitions (%d with dependencies) out of %d lookup definitions",
+        len(target_dsdl_definitions),
+        len(closure),
+        len(lookup_dsdl_definitions),
+    )
+
+    cache = _make_cache(cache_dir, cache_size_limit)
+    _read_namespace_definitions(
+        target_dsdl_definitions,
+        lookup_dsdl_definitions,
+        print_output_handler,
+        allow_unregulated_fixed_port_id,
+        cache,
+        jobs,
+    )
+    if cache is not None:
+        cache.trim()
+
+    processed = {id(d): d for d in target_dsdl_definitions}
+    for d in target_dsdl_definitions:
+        processed.update((id(x), x) for x in d.dependencies)
+    missed = [d for d in processed.values() if all(d is not x for x in closure)]
+    _ensure_no_collisions(missed, lookup_dsdl_definitions)
+
+    types = []  # type: List[_serializable.CompositeType]
+    for d in sorted(processed.values(), key=lambda d: (d.full_name, -d.version.major, -d.version.minor)):
+        assert d.cached_type is not None
+        types.append(d.cached_type)
+    _ensure_no_fixed_port_id_collisions(types)
+    _ensure_minor_version_compatibility(types)
+    return types
+
+
+def check_syntax(
+    root_namespace_directory: Union[Path, str],
+    jobs: Optional[int] = 1,
+    exclude_patterns: Iterable[str] = (),
+    parser_backend: Optional[str] = None,
+) -> List[_error.InvalidDefinitionError]:
+    """
+    A fast syntax-only check of all definitions in the root namespace directory intended for linters and
+    pre-commit hooks. Unlike :func:`read_namespace`, this function does not resolve the referenced data types,
+    evaluate expressions, or check anything but the syntax; hence, a definition that passes this check may still be
+    rejected by :func:`read_namespace`. All syntax errors are collected rather than raised.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as di:
+    ...     (Path(di) / "ns").mkdir()
+    ...     _ = (Path(di) / "ns/A.1.0.dsdl").write_text("uint8 a\\nuint8 b = (1\\n@sealed")
+    ...     _ = (Path(di) / "ns/B.1.0.dsdl").write_text("Undefined.1.0 x\\n@sealed")  # Not checked.
+    ...     [(e.path.name, e.line, e.text) for e in check_syntax(Path(di) / "ns")]
+    [('A.1.0.dsdl', 2, 'Syntax error')]
+
+    :param root_namespace_directory: Same as in :func:`read_namespace`.
+
+    :param jobs: The number of worker processes used for parsing the definitions; None means one per CPU core.
+        The output is the same regardless of the number of jobs.
+
+    :param exclude_patterns: Same as in :func:`read_namespace`.
+
+    :param parser_backend: Same as in :func:`read_namespace`.
+
+    :return: The syntax errors sorted in the same order as the definitions are sorted in the output of
+        :func:`read_namespace`; at most one error per definition. Empty if all definitions are valid.
+
+    :raises: Errors that are not syntax errors are raised the same way as in :func:`read_namespace`,
+        e.g., if a file is named incorrectly.
+    """
+    jobs = _parallel.resolve_job_count(jobs)
+    parser_backend = _parser.resolve_parser_backend(parser_backend)
+    scanner = _scanner.FileSystemScanner(exclude_patterns, threads=jobs)
+    root_namespace_directory, _ = _prepare_directories(root_namespace_directory, None, True, scanner)
+    definitions = _construct_dsdl_definitions_from_namespace(
+        root_namespace_directory, scanner=scanner, parser_backend=parser_backend
+    )
+    return list(_parallel.find_syntax_errors(definitions, jobs))
+
+
+def parse_incremental(
+    text: str,
+    file_path: Union[Path, str],
+    root_namespace_directory: Union[Path, str],
+    lookup_directories: Union[None, Path, str, Iterable[Union[Path, str]]] = None,
+    print_output_handler: Optional[PrintOutputHandler] = None,
+    allow_unregulated_fixed_port_id: bool = False,
+    allow_root_namespace_name_collision: bool = True,
+    exclude_patterns: Iterable[str] = (),
+    parser_backend: Optional[str] = None,
+) -> _incremental.ParseResult:
+    """
+    Processes the text of a definition that is being edited, e.g., in an editor, and returns its diagnostics.
+    The result is updated after every edit using :meth:`pydsdl.ParseResult.reparse`, which processes only the part
+    of the text affected by the edit as far as possible; this is much faster than processing the text from scratch.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as di:
+    ...     (Path(di) / "ns").mkdir()
+    ...     _ = (Path(di) / "ns/B.1.0.dsdl").write_text("uint8 VALUE = 42\\n@sealed")
+    ...     text = "uint8 a\\n@assert B.1.0.VALUE == 4\\n@sealed"
+    ...     result = parse_incremental(text, Path(di) / "ns/A.1.0.dsdl", Path(di) / "ns")
+    ...     (result.error.line, result.error.text)
+    ...     result = result.reparse(text.index("4") + 1, text.index("4") + 1, "2")  # Insert the missing digit.
+    ...     (result.error, str(result.composite_type))
+    (2, 'Assertion check has failed')
+    (None, 'ns.A.1.0')
+
+    :param text: The text of the definition; the file itself is not read and need not exist.
+
+    :param file_path: The path of the definition file inside the root namespace directory; the name, version,
+        and fixed port-ID of the definition are derived from it the same way as from the name of a file.
+
+    :param root_namespace_directory: The root namespace directory the definition belongs to. The other definitions
+        in it are available to the edited definition along with those in the lookup directories, as they are
+        on the disk. They are read when they are needed, at most once per this invocation;
+        the results of :meth:`pydsdl.ParseResult.reparse` share them.
+
+    The other parameters are the same as those of :func:`read_namespace`.
+
+    :return: The result for the text, which can be updated with :meth:`pydsdl.ParseResult.reparse`.
+        The errors in the text are not raised but reported via :attr:`pydsdl.ParseResult.error`,
+        including those found in the definitions it depends on.
+
+    :raises: Errors that are not related to the text are raised the same way as in :func:`read_namespace`,
+        e.g., if the file is named incorrectly or the directories do not exist.
+    """
+    parser_backend = _parser.resolve_parser_backend(parser_backend)
+    scanner = _scanner.FileSystemScanner(exclude_patterns)
+    root_namespace_directory, lookup_directories_path_list = _prepare_directories(
+        root_namespace_directory, lookup_directories, allow_root_namespace_name_collision, scanner
+    )
+    definition = _dsdl_definition.DSDLDefinition(
+        Path(file_path).resolve(), root_namespace_directory, parser_backend=parser_backend
+    )
+    # The version of the edited definition stored on the disk is not available for lookup because it is outdated.
+    # A definition that refers to itself, directly or indirectly, is then reported as referring to an undefined type.
+    target_definitions = [
+        d
+        for d in _construct_dsdl_definitions_from_namespace(
+            root_namespace_directory, scanner=scanner, parser_backend=parser_backend
+        )
+        if d.file_path != definition.file_path
+    ]
+    lookup_index = _dsdl_definition.DefinitionIndex(
+        _construct_lookup_definitions(
+            root_namespace_directory,
+            target_definitions,
+            lookup_directories_path_list,
+            scanner=scanner,
+            parser_backend=parser_backend,
+        )
+    )
+
+    def handle_print(line_number: int, text: str) -> None:
+        if print_output_handler:
+            print_output_handler(definition.file_path, line_number, text)
+
+    builder = _data_type_builder.DataTypeBuilder(
+        definition, lookup_index, handle_print, allow_unregulated_fixed_port_id
+    )
+    return _incremental.parse(
+        text,
+        builder,
+        lambda ssp: cast(_data_type_builder.DataTypeBuilder, ssp).finalize(),
+        definition.file_path,
+        parser_backend,
+    )
+
+
+class NamespaceSession:
+    """
+    A long-lived counterpart of :func:`read_namespace` intended for build daemons, editor integrations, and
+    similar applications that need to re-read the same namespace repeatedly as the files are being edited.
+
+    The session keeps the processed definitions between invocations of :meth:`refresh` along with the graph of
+    dependencies between them. Each refresh re-scans the directories and checks the size and modification time
+    of every file; only the definitions that were added or changed, plus those that depend on them directly
+    or indirectly, are processed again. Everything else is reused as-is, so the unchanged types are returned
+    as the same objects as before.
+
+    The arguments are the same as those of :func:`read_namespace`. The directories are checked once on construction;
+    nothing is read until the first :meth:`refresh`.
+    If ``retain_source_text`` is False, the source text of each definition is released once the definition is
+    processed, which reduces the memory footprint of the session.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as di:
+    ...     root = Path(di, "ns")
+    ...     root.mkdir()
+    ...     _ = (root / "A.1.0.dsdl").write_text("@sealed")
+    ...     session = NamespaceSession(root)
+    ...     [str(t) for t in session.refresh()], [str(t) for t in session.rebuilt]
+    ...     [str(t) for t in session.refresh()], [str(t) for t in session.rebuilt]
+    (['ns.A.1.0'], ['ns.A.1.0'])
+    (['ns.A.1.0'], [])
+    """
+
+    def __init__(
+        self,
+        root_namespace_directory: Union[Path, str],
+        lookup_directories: Union[None, Path, str, Iterable[Union[Path, str]]] = None,
+        print_output_handler: Optional[PrintOutputHandler] = None,
+        allow_unregulated_fixed_port_id: bool = False,
+        allow_root_namespace_name_collision: bool = True,
+        cache_dir: Union[None, Path, str] = None,
+        jobs: Optional[int] = 1,
+        exclude_patterns: Iterable[str] = (),
+        retain_source_text: bool = True,
+        cache_size_limit: int = _cache.DefinitionCache.DEFAULT_SIZE_LIMIT,
+        parser_backend: Optional[str] = None,
+    ) -> None:
+        self._exclude_patterns = list(exclude_patterns)
+        self._jobs = _parallel.resolve_job_count(jobs)
+        self._parser_backend = _parser.resolve_parser_backend(parser_backend)
+        self._root_namespace_directory, self._lookup_directories = _prepare_directories(
+            root_namespace_directory,
+            lookup_directories,
+            allow_root_namespace_name_collision,
+            _scanner.FileSystemScanner(self._exclude_patterns, threads=self._jobs),
+        )
+        self._print_output_handler = print_output_handler
+        self._allow_unregulated_fixed_port_id = bool(allow_unregulated_fixed_port_id)
+        self._cache = _make_cache(cache_dir, cache_size_limit)
+        self._retain_source_text = bool(retain_source_text)
+
+        self._definitions = {}  # type: Dict[Path, _dsdl_definition.DSDLDefinition]
+        self._file_stats = {}  # type: Dict[Path, Tuple[int, int]]
+        self._dependents = {}  # type: Dict[Path, Set[Path]]
+        self._types = []  # type: List[_serializable.CompositeType]
+        self._rebuilt = []  # type: List[_serializable.CompositeType]
+
+    def refresh(self) -> List[_serializable.CompositeType]:
+        """
+        Brings the session up to date with the file system.
+
+        :return: Same as :func:`read_namespace`. Types that did not have to be rebuilt are the same objects as
+            returned by the previous invocation.
+
+        :raises: Same as :func:`read_namespace`. The session remains usable after an error; the definitions that
+            could not be processed will be processed again on the next invocation.
+        """
+        scanner = _scanner.FileSystemScanner(self._exclude_patterns, threads=self._jobs)
+        file_stats = {}  # type: Dict[Path, Tuple[int, int]]
+        for directory in self._lookup_directories:
+            for fp in _find_dsdl_source_files(directory, scanner):
+                st = scanner.stat(fp)
+                file_stats[fp] = st.st_mtime_ns, st.st_size
+
+        changed = {
+            fp for fp in self._file_stats.keys() | file_stats.keys() if self._file_stats.get(fp) != file_stats.get(fp)
+        }
+        stale = set(changed)
+        for fp in changed:
+            stale |= self._dependents.get(fp, set())
+        _logger.debug("Session refresh: %d files changed, %d definitions are stale", len(changed), len(stale))
+        reusable = {fp: d for fp, d in self._definitions.items() if fp not in changed}
+        for fp in stale - changed:
+            if fp in reusable:
+                reusable[fp].invalidate()  # The text is unchanged, so the syntax tree is reused.
+
+        target_dsdl_definitions = _construct_dsdl_definitions_from_namespace(
+            self._root_namespace_directory, reusable, self._retain_source_text, scanner, self._parser_backend
+        )
+        lookup_dsdl_definitions = _construct_lookup_definitions(
+            self._root_namespace_directory,
+            target_dsdl_definitions,
+            self._lookup_directories,
+            reusable,
+            self._retain_source_text,
+            scanner,
+            self._parser_backend,
+        )
+        self._file_stats = file_stats
+        self._definitions = {d.file_path: d for d in lookup_dsdl_definitions}
+        pending = [d for d in target_dsdl_definitions if d.cached_type is None]
+        try:
+            if target_dsdl_definitions:
+                self._types = _read_and_check(
+                    target_dsdl_definitions,
+                    lookup_dsdl_definitions,
+                    self._print_output_handler,
+                    self._allow_unregulated_fixed_port_id,
+                    self._cache,
+                    self._jobs,
+                )
+            else:
+                self._types = []
+        finally:
+            # Processed definitions are recorded even if the refresh failed halfway, so that they are reused next time.
+            self._dependents = {}
+            for d in lookup_dsdl_definitions:
+                if d.cached_type is not None:
+                    for dep in d.dependencies:
+                        self._dependents.setdefault(dep.file_path, set()).add(d.file_path)
+        self._rebuilt = [d.cached_type for d in pending if d.cached_type is not None]
+        return self.types
+
+    @property
+    def types(self) -> List[_serializable.CompositeType]:
+        """The output of the last successful :meth:`refresh`; empty if there was none."""
+        return list(self._types)
+
+    @property
+    def rebuilt(self) -> List[_serializable.CompositeType]:
+        """
+        The subset of :attr:`types` that were processed anew by the last successful :meth:`refresh`,
+        in the same order. This allows the downstream tools (e.g., code generators) to skip the unchanged types.
+        Types that were removed from the namespace can be found by comparing :attr:`types` before and after.
+        """
+        return list(self._rebuilt)
+
+    @property
+    def root_namespace_directory(self) -> Path:
+        return self._root_namespace_directory
+
+    @property
+    def lookup_directories(self) -> List[Path]:
+        """Normalized lookup directories including the root namespace directory."""
+        return list(self._lookup_directories)
+
+    def __repr__(self) -> str:
+        return "%s(root_namespace_directory=%s, lookup_directories=%s)" % (
+            type(self).__name__,
+            self._root_namespace_directory,
+            self._lookup_directories,
+        )
+
+
+DSDL_FILE_GLOB = "*.dsdl"
+DSDL_FILE_GLOB_LEGACY = "*.uavcan"
+_LOG_LIST_ITEM_PREFIX = " " * 4
+
+_logger = logging.getLogger(__name__)
+
+
+def _make_cache(cache_dir: Union[None, Path, str], size_limit: int) -> Optional[_cache.DefinitionCache]:
+    return _cache.DefinitionCache(Path(cache_dir), size_limit) if cache_dir is not None else None
+
+
+def _prepare_directories(
+    root_namespace_directory: Union[Path, str],
+    lookup_directories: Union[None, Path, str, Iterable[Union[Path, str]]],
+    allow_root_namespace_name_collision: bool,
+    scanner: Optional[_scanner.FileSystemScanner] = None,
+) -> Tuple[Path, List[Path]]:
+    """
+    Normalizes the directories and checks them for common errors.
+    :return: The resolved root namespace directory and the sorted list of unique resolved lookup directories
+        which always includes the root namespace directory.
+    """
+    root_namespace_directory = Path(root_namespace_directory).resolve()
+    return root_namespace_directory, _prepare_lookup_directories(
+        lookup_directories, allow_root_namespace_name_collision, root_namespace_directory, scanner
+    )
+
+
+def _prepare_lookup_directories(
+    lookup_directories: Union[None, Path, str, Iterable[Union[Path, str]]],
+    allow_root_namespace_name_collision: bool,
+    root_namespace_directory: Optional[Path] = None,
+    scanner: Optional[_scanner.FileSystemScanner] = None,
+) -> List[Path]:
+    """
+    Normalizes the lookup directories and checks them for common errors.
+    :return: The sorted list of unique resolved lookup directories plus the root namespace directory, if given.
+    """
     # Add the own root namespace to the set of lookup directories, sort lexicographically, remove duplicates.
     # We'd like this to be an iterable list of strings but we handle the common practice of passing in a single path.
     if lookup_directories is None:
@@ -132,8 +677,8 @@ def read_namespace(
         _logger.debug(_LOG_LIST_ITEM_PREFIX + str(a))
 
     # Normalize paths and remove duplicates. Resolve symlinks to avoid ambiguities.
-    root_namespace_directory = Path(root_namespace_directory).resolve()
-    lookup_directories_path_list.append(root_namespace_directory)
+    if root_namespace_directory is not None:
+        lookup_directories_path_list.append(root_namespace_directory)
     lookup_directories_path_list = list(sorted({x.resolve() for x in lookup_directories_path_list}))
     _logger.debug("Lookup directories are listed below:")
     for a in lookup_directories_path_list:
@@ -143,44 +688,85 @@ def read_namespace(
     _ensure_no_common_usage_errors(root_namespace_directory, lookup_directories_path_list, _logger.warning)
 
     # Check the namespaces.
-    _ensure_no_nested_root_namespaces(lookup_directories_path_list)
+    _ensure_no_nested_root_namespaces(lookup_directories_path_list, scanner)
 
     if not allow_root_namespace_name_collision:
-        _ensure_no_namespace_name_collisions(lookup_directories_path_list)
+        _ensure_no_namespace_name_collisions(lookup_directories_path_list, scanner)
 
-    # Construct DSDL definitions from the target and the lookup dirs.
-    target_dsdl_definitions = _construct_dsdl_definitions_from_namespace(root_namespace_directory)
-    if not target_dsdl_definitions:
-        _logger.info("The namespace at %s is empty", root_namespace_directory)
-        return []
+    return lookup_directories_path_list
+
+
+def _construct_lookup_definitions(
+    root_namespace_directory: Path,
+    target_definitions: List[_dsdl_definition.DSDLDefinition],
+    lookup_directories: List[Path],
+    reusable: Optional[Dict[Path, _dsdl_definition.DSDLDefinition]] = None,
+    retain_text: bool = True,
+    scanner: Optional[_scanner.FileSystemScanner] = None,
+    parser_backend: Optional[str] = None,
+) -> List[_dsdl_definition.DSDLDefinition]:
     _logger.debug("Target DSDL definitions are listed below:")
-    for x in target_dsdl_definitions:
+    for x in target_definitions:
         _logger.debug(_LOG_LIST_ITEM_PREFIX + str(x))
 
-    lookup_dsdl_definitions = []  # type: List[_dsdl_definition.DSDLDefinition]
-    for ld in lookup_directories_path_list:
-        lookup_dsdl_definitions += _construct_dsdl_definitions_from_namespace(ld)
+    # The target namespace is always among the lookup directories. Its definitions are reused rather than constructed
+    # anew so that there is exactly one instance per definition: each definition is then processed at most once.
+    lookup_definitions = []  # type: List[_dsdl_definition.DSDLDefinition]
+    for ld in lookup_directories:
+        if ld == root_namespace_directory:
+            lookup_definitions += target_definitions
+        else:
+            lookup_definitions += _construct_dsdl_definitions_from_namespace(
+                ld, reusable, retain_text, scanner, parser_backend
+            )
+    return lookup_definitions
+
+
+def _read_and_check(
+    target_definitions: List[_dsdl_definition.DSDLDefinition],
+    lookup_definitions: List[_dsdl_definition.DSDLDefinition],
+    print_output_handler: Optional[PrintOutputHandler],
+    allow_unregulated_fixed_port_id: bool,
+    cache: Optional[_cache.DefinitionCache],
+    jobs: int,
+    collect_errors: bool = False,
+) -> List[_serializable.CompositeType]:
+    errors = []  # type: List[_error.FrontendError]
+    on_error = errors.append if collect_errors else None
 
     # Check for collisions against the lookup definitions also.
-    _ensure_no_collisions(target_dsdl_definitions, lookup_dsdl_definitions)
+    # In the collect mode, the colliding targets are reported here and then skipped instead of being read.
+    collisions = []  # type: List[_error.FrontendError]
+    _ensure_no_collisions(target_definitions, lookup_definitions, collisions.append if collect_errors else None)
+    errors += collisions
+    colliding = {ex.path for ex in collisions}
 
     _logger.debug("Lookup DSDL definitions are listed below:")
-    for x in lookup_dsdl_definitions:
+    for x in lookup_definitions:
         _logger.debug(_LOG_LIST_ITEM_PREFIX + str(x))
 
     _logger.info(
         "Reading %d definitions from the root namespace %s, "
         "with %d lookup definitions located in root namespaces: %s",
-        len(target_dsdl_definitions),
-        list(set(map(lambda t: t.root_namespace, target_dsdl_definitions)))[0],
-        len(lookup_dsdl_definitions),
-        ", ".join(set(sorted(map(lambda t: t.root_namespace, lookup_dsdl_definitions)))),
+        len(target_definitions),
+        list(set(map(lambda t: t.root_namespace, target_definitions)))[0],
+        len(lookup_definitions),
+        ", ".join(set(sorted(map(lambda t: t.root_namespace, lookup_definitions)))),
     )
 
     # Read the constructed definitions.
     types = _read_namespace_definitions(
-        target_dsdl_definitions, lookup_dsdl_definitions, print_output_handler, allow_unregulated_fixed_port_id
+        target_definitions,
+        lookup_definitions,
+        print_output_handler,
+        allow_unregulated_fixed_port_id,
+        cache,
+        jobs,
+        on_error,
+        [d for d in target_definitions if d.file_path in colliding],
     )
+    if cache is not None:
+        cache.trim()
 
     # Note that we check for collisions in the read namespace only.
     # We intentionally ignore (do not check for) possible collisions in the lookup directories,
@@ -188,31 +774,40 @@ def read_namespace(
     # directories may contain issues and mistakes that are outside of the control of the user (e.g.,
     # they could be managed by a third party) -- the user shouldn't be affected by mistakes committed
     # by the third party.
-    _ensure_no_fixed_port_id_collisions(types)
-    _ensure_minor_version_compatibility(types)
+    _ensure_no_fixed_port_id_collisions(types, on_error)
+    _ensure_minor_version_compatibility(types, on_error)
 
+    if errors:
+        errors.sort(key=lambda e: (e.path.as_posix() if e.path else "", e.line or 0))
+        raise CollectedErrors(errors, types)
     return types
 
 
-DSDL_FILE_GLOB = "*.dsdl"
-DSDL_FILE_GLOB_LEGACY = "*.uavcan"
-_LOG_LIST_ITEM_PREFIX = " " * 4
-
-_logger = logging.getLogger(__name__)
-
-
 def _read_namespace_definitions(
     target_definitions: List[_dsdl_definition.DSDLDefinition],
     lookup_definitions: List[_dsdl_definition.DSDLDefinition],
     print_output_handler: Optional[PrintOutputHandler] = None,
     allow_unregulated_fixed_port_id: bool = False,
+    cache: Optional[_cache.DefinitionCache] = None,
+    jobs: int = 1,
+    on_error: Optional[Callable[[_error.FrontendError], None]] = None,
+    failed_definitions: Iterable[_dsdl_definition.DSDLDefinition] = (),
 ) -> List[_serializable.CompositeType]:
     """
     Construct type descriptors from the specified target definitions.
     Allow the target definitions to use the lookup definitions within themselves.
     :param target_definitions:  Which definitions to read.
     :param lookup_definitions:  Which definitions can be used by the processed definitions.
-    :return: A list of types.
+    :param cache:               The persistent cache to consult, if any.
+    :param jobs:                If greater than one, the definitions are processed in a process pool first;
+                                those that could not be processed there are then processed sequentially.
+    :param on_error:            If provided, errors are passed here instead of being raised, and the processing
+                                continues. The definitions are then processed dependencies first, so that
+                                the definitions that refer to a failed one (per the lexical scan) can be skipped
+                                instead of failing again; each error is reported once.
+    :param failed_definitions:  The target definitions whose errors have already been reported; they are skipped
+                                along with the definitions that refer to them. Only used with on_error.
+    :return: A list of types that were processed successfully.
     """
 
     def make_print_handler(definition: _dsdl_definition.DSDLDefinition) -> Callable[[int, str], None]:
@@ -224,13 +819,43 @@ def _read_namespace_definitions(
 
         return handler
 
+    excluded = {d.file_path for d in failed_definitions}
+    assert on_error is not None or not excluded
+    replay = None  # type: Optional[Callable[[_dsdl_definition.DSDLDefinition, Callable[[int, str], None]], None]]
+    pending = [d for d in target_definitions if d.cached_type is None and d.file_path not in excluded]
+    if jobs > 1 and len(pending) > 1:
+        replay = _parallel.process_in_parallel(
+            pending, lookup_definitions, allow_unregulated_fixed_port_id, cache, jobs
+        )
+
+    # The index is shared between all definitions, so that the data type references are resolved in constant time.
+    lookup_index = _dsdl_definition.DefinitionIndex(lookup_definitions)
+
+    ordered = _order_dependencies_first(target_definitions) if on_error is not None else target_definitions
+    by_path = {d.file_path: d for d in itertools.chain(lookup_definitions, target_definitions)}
+    failed = {(d.full_name, d.version) for d in failed_definitions}  # type: Set[Tuple[str, _serializable.Version]]
+
     types = []  # type: List[_serializable.CompositeType]
-    for tdd in target_definitions:
+    for tdd in ordered:
+        if tdd.file_path in excluded:
+            continue
+        if replay is not None:
+            replay(tdd, make_print_handler(tdd))
+        if on_error is not None and tdd.cached_type is None and not failed.isdisjoint(tdd.get_referenced_names()):
+            _logger.info("%s: Skipped because some of its dependencies could not be processed", tdd.file_path)
+            failed.add((tdd.full_name, tdd.version))
+            continue
         try:
-            dt = tdd.read(lookup_definitions, make_print_handler(tdd), allow_unregulated_fixed_port_id)
-        except _error.FrontendError as ex:  # pragma: no cover
+            dt = tdd.read(lookup_index, make_print_handler(tdd), allow_unregulated_fixed_port_id, cache)
+        except _error.FrontendError as ex:
             ex.set_error_location_if_unknown(path=tdd.file_path)
-            raise ex
+            if on_error is None:
+                raise ex
+            # The error may have occurred in a dependency that is not among the targets (or in a dependency cycle).
+            culprit = by_path.get(ex.path, tdd) if ex.path is not None else tdd
+            if (culprit.full_name, culprit.version) not in failed:
+                on_error(ex)
+            failed.update([(culprit.full_name, culprit.version), (tdd.full_name, tdd.version)])
         except (MemoryError, SystemError):  # pragma: no cover
             raise
         except Exception as ex:  # pragma: no cover
@@ -238,69 +863,130 @@ def _read_namespace_definitions(
         else:
             types.append(dt)
 
+    if on_error is not None:  # Restore the original order.
+        restored = (d.cached_type for d in target_definitions if d.file_path not in excluded)
+        types = [t for t in restored if t is not None]
     return types
 
 
 def _ensure_no_collisions(
     target_definitions: List[_dsdl_definition.DSDLDefinition],
     lookup_definitions: List[_dsdl_definition.DSDLDefinition],
+    on_error: Optional[Callable[[_error.FrontendError], None]] = None,
 ) -> None:
+    """
+    Checks every target definition against every lookup definition, raising the same error that a pairwise comparison
+    of the definitions in their original order would raise first. If the error handler is provided, the first error
+    of every target definition is passed there instead of being raised. Instead of comparing all pairs, the candidates
+    are located via case-folded indexes:
+
+    - By full name, which yields both the case-only collisions and the redefinitions.
+    - By every namespace prefix, which is a flattened namespace trie; this yields the lookup types whose namespace
+      is nested in the target type.
+
+    The namespace of the target type conflicting with a lookup type is found by looking up each prefix of the
+    target namespace in the full name index. Hence, the total cost is linear in the number of definitions times
+    the depth of the namespace hierarchy.
+    """
+    sep = _serializable.CompositeType.NAME_COMPONENT_SEPARATOR
+    by_name = collections.defaultdict(list)  # type: DefaultDict[str, List[int]]
+    first_by_namespace_prefix = {}  # type: Dict[str, int]
+    for index, lu in enumerate(lookup_definitions):
+        by_name[lu.full_name.lower()].append(index)
+        components = lu.full_namespace.lower().split(sep)
+        for depth in range(1, len(components) + 1):
+            first_by_namespace_prefix.setdefault(sep.join(components[:depth]), index)
+
     for tg in target_definitions:
-        tg_full_namespace_period = tg.full_namespace.lower() + "."
-        tg_full_name_period = tg.full_name.lower() + "."
-        for lu in lookup_definitions:
-            lu_full_namespace_period = lu.full_namespace.lower() + "."
-            lu_full_name_period = lu.full_name.lower() + "."
-            # This is to allow the following messages to coexist happily:
-            #   zubax/non_colliding/iceberg/Ice.0.1.dsdl
-            #   zubax/non_colliding/IceB.0.1.dsdl
-            # The following is still not allowed:
-            #   zubax/colliding/iceberg/Ice.0.1.dsdl
-            #   zubax/colliding/Iceberg.0.1.dsdl
-            if tg.full_name != lu.full_name and tg.full_name.lower() == lu.full_name.lower():
-                raise DataTypeNameCollisionError(
-                    "Full name of this definition differs from %s only by letter case, "
-                    "which is not permitted" % lu.file_path,
-                    path=tg.file_path,
-                )
-            if (tg_full_namespace_period).startswith(lu_full_name_period):
-                raise DataTypeNameCollisionError(
-                    "The namespace of this type conflicts with %s" % lu.file_path, path=tg.file_path
-                )
-            if (lu_full_namespace_period).startswith(tg_full_name_period):
-                raise DataTypeNameCollisionError(
-                    "This type conflicts with the namespace of %s" % lu.file_path, path=tg.file_path
-                )
-            if (
-                tg_full_name_period == lu_full_name_period
-                and tg.version == lu.version
-                and not tg.file_path.samefile(lu.file_path)
-            ):  # https://github.com/OpenCyphal/pydsdl/issues/94
-                raise DataTypeCollisionError("This type is redefined in %s" % lu.file_path, path=tg.file_path)
+        name = tg.full_name.lower()
+        candidates = []  # type: List[int]
+        # Same name with different letter case, or same name and version in a different file.
+        for index in by_name.get(name, []):
+            lu = lookup_definitions[index]
+            if tg.full_name != lu.full_name or tg.version == lu.version and not tg.file_path.samefile(lu.file_path):
+                candidates.append(index)
+                break
+        # The namespace of the target type is also the name of a lookup type.
+        components = tg.full_namespace.lower().split(sep)
+        for depth in range(1, len(components) + 1):
+            candidates += by_name.get(sep.join(components[:depth]), [])[:1]
+        # The target type is also a namespace of a lookup type.
+        if name in first_by_namespace_prefix:
+            candidates.append(first_by_namespace_prefix[name])
+        if candidates:
+            try:
+                _ensure_no_collisions_pairwise(tg, lookup_definitions[min(candidates)])
+            except _error.FrontendError as ex:
+                if on_error is None:
+                    raise
+                on_error(ex)
+
+
+def _ensure_no_collisions_pairwise(tg: _dsdl_definition.DSDLDefinition, lu: _dsdl_definition.DSDLDefinition) -> None:
+    tg_full_namespace_period = tg.full_namespace.lower() + "."
+    tg_full_name_period = tg.full_name.lower() + "."
+    lu_full_namespace_period = lu.full_namespace.lower() + "."
+    lu_full_name_period = lu.full_name.lower() + "."
+    # This is to allow the following messages to coexist happily:
+    #   zubax/non_colliding/iceberg/Ice.0.1.dsdl
+    #   zubax/non_colliding/IceB.0.1.dsdl
+    # The following is still not allowed:
+    #   zubax/colliding/iceberg/Ice.0.1.dsdl
+    #   zubax/colliding/Iceberg.0.1.dsdl
+    if tg.full_name != lu.full_name and tg.full_name.lower() == lu.full_name.lower():
+        raise DataTypeNameCollisionError(
+            "Full name of this definition differs from %s only by letter case, "
+            "which is not permitted" % lu.file_path,
+            path=tg.file_path,
+        )
+    if (tg_full_namespace_period).startswith(lu_full_name_period):
+        raise DataTypeNameCollisionError(
+            "The namespace of this type conflicts with %s" % lu.file_path, path=tg.file_path
+        )
+    if (lu_full_namespace_period).startswith(tg_full_name_period):
+        raise DataTypeNameCollisionError(
+            "This type conflicts with the namespace of %s" % lu.file_path, path=tg.file_path
+        )
+    if (
+        tg_full_name_period == lu_full_name_period
+        and tg.version == lu.version
+        and not tg.file_path.samefile(lu.file_path)
+    ):  # https://github.com/OpenCyphal/pydsdl/issues/94
+        raise DataTypeCollisionError("This type is redefined in %s" % lu.file_path, path=tg.file_path)
 
 
-def _ensure_no_fixed_port_id_collisions(types: List[_serializable.CompositeType]) -> None:
+def _ensure_no_fixed_port_id_collisions(
+    types: List[_serializable.CompositeType], on_error: Optional[Callable[[_error.FrontendError], None]] = None
+) -> None:
+    # Only the types that share the same fixed port ID can collide, so they are grouped into buckets first.
+    # Port ID sets of subjects and services are orthogonal, so the kind is part of the bucket key.
+    buckets = collections.defaultdict(list)  # type: DefaultDict[Tuple[bool, int], List[_serializable.CompositeType]]
+    for t in types:
+        if t.has_fixed_port_id:
+            buckets[isinstance(t, _serializable.ServiceType), t.fixed_port_id].append(t)
+
     for a in types:
-        for b in types:
+        if not a.has_fixed_port_id:
+            continue
+        for b in buckets[isinstance(a, _serializable.ServiceType), a.fixed_port_id]:
             different_names = a.full_name != b.full_name
             different_major_versions = a.version.major != b.version.major
-            # Must be the same kind because port ID sets of subjects and services are orthogonal
-            same_kind = isinstance(a, _serializable.ServiceType) == isinstance(b, _serializable.ServiceType)
             # Data types where the major version is zero are allowed to collide
             both_released = (a.version.major > 0) and (b.version.major > 0)
-
-            fpid_must_be_different = same_kind and (different_names or (different_major_versions and both_released))
-
-            if fpid_must_be_different:
-                if a.has_fixed_port_id and b.has_fixed_port_id:
-                    if a.fixed_port_id == b.fixed_port_id:
-                        raise FixedPortIDCollisionError(
-                            "The fixed port ID of this definition is also used in %s" % b.source_file_path,
-                            path=a.source_file_path,
-                        )
+            if different_names or (different_major_versions and both_released):
+                ex = FixedPortIDCollisionError(
+                    "The fixed port ID of this definition is also used in %s" % b.source_file_path,
+                    path=a.source_file_path,
+                )
+                if on_error is None:
+                    raise ex
+                on_error(ex)
+                break
 
 
-def _ensure_minor_version_compatibility(types: List[_serializable.CompositeType]) -> None:
+def _ensure_minor_version_compatibility(
+    types: List[_serializable.CompositeType], on_error: Optional[Callable[[_error.FrontendError], None]] = None
+) -> None:
     by_name = collections.defaultdict(list)  # type: DefaultDict[str, List[_serializable.CompositeType]]
     for t in types:
         by_name[t.full_name].append(t)
@@ -313,9 +999,14 @@ def _ensure_minor_version_compatibility(types: List[_serializable.CompositeType]
         for subject_to_check in by_major.values():
             _logger.debug("Minor version compatibility check amongst: %s", [str(x) for x in subject_to_check])
             for a in subject_to_check:
-                for b in subject_to_check:
-                    if a is not b:
-                        _ensure_minor_version_compatibility_pairwise(a, b)
+                try:
+                    for b in subject_to_check:
+                        if a is not b:
+                            _ensure_minor_version_compatibility_pairwise(a, b)
+                except _error.FrontendError as ex:
+                    if on_error is None:
+                        raise
+                    on_error(ex)
 
 
 def _ensure_minor_version_compatibility_pairwise(
@@ -375,7 +1066,7 @@ def _ensure_minor_version_compatibility_pairwise(
 
 
 def _ensure_no_common_usage_errors(
-    root_namespace_directory: Path, lookup_directories: Iterable[Path], reporter: Callable[[str], None]
+    root_namespace_directory: Optional[Path], lookup_directories: Iterable[Path], reporter: Callable[[str], None]
 ) -> None:
     suspicious_base_names = [
         "public_regulated_data_types",
@@ -391,7 +1082,9 @@ def _ensure_no_common_usage_errors(
             return True
 
     # resolve() will also normalize the case in case-insensitive filesystems.
-    all_paths = {root_namespace_directory.resolve()} | {x.resolve() for x in lookup_directories}
+    all_paths = {x.resolve() for x in lookup_directories}
+    if root_namespace_directory is not None:
+        all_paths.add(root_namespace_directory.resolve())
     for p in all_paths:
         try:
             candidates = [x for x in p.iterdir() if x.is_dir() and is_valid_name(x.name)]
@@ -408,11 +1101,14 @@ def _ensure_no_common_usage_errors(
             reporter(report)
 
 
-def _ensure_no_nested_root_namespaces(directories: Iterable[Path]) -> None:
+def _ensure_no_nested_root_namespaces(
+    directories: Iterable[Path], scanner: Optional[_scanner.FileSystemScanner] = None
+) -> None:
+    scanner = _scanner.make_scanner(scanner)
     dirs = {x.resolve() for x in directories}  # normalize the case in case-insensitive filesystems
     for a in dirs:
         for b in dirs:
-            if a.samefile(b):
+            if scanner.samefile(a, b):
                 continue
             try:
                 a.relative_to(b)
@@ -424,35 +1120,108 @@ def _ensure_no_nested_root_namespaces(directories: Iterable[Path]) -> None:
                 )
 
 
-def _ensure_no_namespace_name_collisions(directories: Iterable[Path]) -> None:
+def _ensure_no_namespace_name_collisions(
+    directories: Iterable[Path], scanner: Optional[_scanner.FileSystemScanner] = None
+) -> None:
+    scanner = _scanner.make_scanner(scanner)
     directories = {x.resolve() for x in directories}  # normalize the case in case-insensitive filesystems
     for a in directories:
         for b in directories:
-            if a.samefile(b):
+            if scanner.samefile(a, b):
                 continue
             if a.name.lower() == b.name.lower():
                 _logger.info("Collision: %r [%r] == %r [%r]", a, a.name, b, b.name)
                 raise RootNamespaceNameCollisionError("The name of this namespace conflicts with %s" % b, path=a)
 
 
-def _construct_dsdl_definitions_from_namespace(root_namespace_path: Path) -> List[_dsdl_definition.DSDLDefinition]:
+def _find_dsdl_source_files(
+    root_namespace_path: Path, scanner: Optional[_scanner.FileSystemScanner] = None
+) -> List[Path]:
+    """
+    Returns the sorted list of all DSDL source files located under the specified directory, including those that use
+    the deprecated file extension (a warning is logged for those).
+    """
+    source_file_paths = _scanner.make_scanner(scanner).find_files(
+        root_namespace_path, [DSDL_FILE_GLOB, DSDL_FILE_GLOB_LEGACY]
+    )
+    for p in source_file_paths:
+        if fnmatch.fnmatch(p.name, DSDL_FILE_GLOB_LEGACY):
+            _logger.warning(
+                "File uses deprecated extension %r, please rename to use %r: %s",
+                DSDL_FILE_GLOB_LEGACY,
+                DSDL_FILE_GLOB,
+                p,
+            )
+    return source_file_paths
+
+
+def _find_dependency_closure(
+    definitions: List[_dsdl_definition.DSDLDefinition], lookup: _dsdl_definition.DefinitionIndex
+) -> List[_dsdl_definition.DSDLDefinition]:
+    """
+    The specified definitions plus the lookup definitions they refer to directly or indirectly,
+    as estimated by :meth:`_dsdl_definition.DSDLDefinition.get_referenced_names` without processing.
+    """
+    out = {}  # type: Dict[int, _dsdl_definition.DSDLDefinition]
+    pending = list(definitions)
+    while pending:
+        d = pending.pop()
+        if id(d) not in out:
+            out[id(d)] = d
+            for name, version in d.get_referenced_names():
+                pending += lookup.find(name, version)
+    return list(out.values())
+
+
+def _order_dependencies_first(
+    definitions: List[_dsdl_definition.DSDLDefinition],
+) -> List[_dsdl_definition.DSDLDefinition]:
+    """
+    The same definitions reordered such that each one follows the definitions it refers to, as estimated by
+    :meth:`_dsdl_definition.DSDLDefinition.get_referenced_names`; otherwise, the original order is preserved.
+    Reference cycles are broken at the first definition of the cycle in the original order.
+    """
+    by_key = {(d.full_name, d.version): d for d in definitions}
+    out = []  # type: List[_dsdl_definition.DSDLDefinition]
+    seen = set()  # type: Set[Tuple[str, _serializable.Version]]
+    for root in definitions:
+        if (root.full_name, root.version) in seen:
+            continue
+        seen.add((root.full_name, root.version))
+        stack = [(root, iter(root.get_referenced_names()))]
+        while stack:
+            d, references = stack[-1]
+            for key in references:
+                if key in by_key and key not in seen:
+                    seen.add(key)
+                    stack.append((by_key[key], iter(by_key[key].get_referenced_names())))
+                    break
+            else:
+                stack.pop()
+                out.append(d)
+    return out
+
+
+def _construct_dsdl_definitions_from_namespace(
+    root_namespace_path: Path,
+    reusable: Optional[Dict[Path, _dsdl_definition.DSDLDefinition]] = None,
+    retain_text: bool = True,
+    scanner: Optional[_scanner.FileSystemScanner] = None,
+    parser_backend: Optional[str] = None,
+) -> List[_dsdl_definition.DSDLDefinition]:
     """
     Accepts a directory path, returns a sorted list of abstract DSDL file representations. Those can be read later.
     The definitions are sorted by name lexicographically, then by major version (greatest version first),
     then by minor version (same ordering as the major version).
+    If the file path is found in the reusable mapping, the existing definition is returned instead of a new one.
+    The source files are not read here; see :class:`_dsdl_definition.DSDLDefinition`.
     """
-    source_file_paths: Set[Path] = set()
-    for p in root_namespace_path.rglob(DSDL_FILE_GLOB):
-        source_file_paths.add(p)
-    for p in root_namespace_path.rglob(DSDL_FILE_GLOB_LEGACY):
-        source_file_paths.add(p)
-        _logger.warning(
-            "File uses deprecated extension %r, please rename to use %r: %s", DSDL_FILE_GLOB_LEGACY, DSDL_FILE_GLOB, p
-        )
-
+    reusable = reusable or {}
     output = []  # type: List[_dsdl_definition.DSDLDefinition]
-    for fp in sorted(source_file_paths):
-        dsdl_def = _dsdl_definition.DSDLDefinition(fp, root_namespace_path)
+    for fp in _find_dsdl_source_files(root_namespace_path, scanner):
+        dsdl_def = reusable.get(fp) or _dsdl_definition.DSDLDefinition(
+            fp, root_namespace_path, retain_text, parser_backend
+        )
         output.append(dsdl_def)
 
     # Lexicographically by name, newest version first.
@@ -663,3 +1432,523 @@ def _unittest_issue_71() -> None:  # https://github.com/OpenCyphal/pydsdl/issues
         (real / "Msg.0.1.dsdl").write_text("@sealed")
         assert len(read_namespace(real, [real, link])) == 1
         assert len(read_namespace(link, [real, link])) == 1
+
+
+def _unittest_cache_dir() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "ns").mkdir()
+        (di / "ns/A.1.0.dsdl").write_text("ns.B.1.0 b\n@print _offset_\n@sealed")
+        (di / "ns/B.1.0.dsdl").write_text("uint8 x\n@sealed")
+        printed = []  # type: List[str]
+        cold = read_namespace(di / "ns", cache_dir=di / "cache", print_output_handler=lambda *a: printed.append(a[2]))
+        warm = read_namespace(di / "ns", cache_dir=di / "cache", print_output_handler=lambda *a: printed.append(a[2]))
+        assert cold == warm
+        assert [str(x) for x in cold] == [str(x) for x in warm]
+        assert len(printed) == 2 and printed[0] == printed[1]
+        assert len(list((di / "cache").iterdir())) == 2
+        # The fields refer to the returned types rather than to their private copies stored in the cache.
+        assert warm[0].fields[0].data_type is warm[1]
+
+        session = NamespaceSession(di / "ns", cache_dir=di / "cache")
+        a, b = session.refresh()
+        assert a.fields[0].data_type is b
+
+        read_namespace(di / "ns", cache_dir=di / "cache", cache_size_limit=0)
+        assert not list((di / "cache").iterdir())
+
+        (di / "ns/B.1.0.dsdl").write_text("uint8 x\nuint8 y\n@sealed")
+        (a, b) = read_namespace(di / "ns", cache_dir=str(di / "cache"))
+        assert a.bit_length_set.max == b.bit_length_set.max == 16
+
+
+def _unittest_parallel() -> None:
+    import os
+    import tempfile
+    from pytest import raises
+    from ._data_type_builder import AssertionCheckFailureError
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "ns/sub").mkdir(parents=True)
+        (di / "ns/A.1.0.dsdl").write_text("ns.sub.B.1.0 b\nC.1.0[<=3] c\n@print 'A'\n@sealed")
+        (di / "ns/sub/B.1.0.dsdl").write_text("ns.C.1.0 c  # D.1.0 is not a dependency\n@print 'B'\n@sealed")
+        (di / "ns/C.1.0.dsdl").write_text("uint8 x\n@print 'C'\n@sealed")
+        for i in range(10):
+            (di / f"ns/Leaf{i}.1.0.dsdl").write_text(f"uint{i + 1} x\n@sealed")
+        printed_serial = []  # type: List[Tuple[str, int, str]]
+        printed_parallel = []  # type: List[Tuple[str, int, str]]
+        serial = read_namespace(di / "ns", print_output_handler=lambda *a: printed_serial.append(a), jobs=1)
+        parallel = read_namespace(di / "ns", print_output_handler=lambda *a: printed_parallel.append(a), jobs=3)
+        assert [str(x) for x in serial] == [str(x) for x in parallel]
+        assert serial == parallel
+        assert sorted(printed_serial) == sorted(printed_parallel)
+        assert len(printed_parallel) == 3  # Each definition is processed only once.
+        assert read_namespace(di / "ns", jobs=None) == serial
+        # The types refer to each other the same way as in the sequential mode rather than to private copies.
+        for types in (serial, parallel):
+            by_name = {str(t): t for t in types}
+            assert by_name["ns.A.1.0"].fields[0].data_type is by_name["ns.sub.B.1.0"]
+            assert by_name["ns.A.1.0"].fields[1].data_type.element_type is by_name["ns.C.1.0"]
+            assert by_name["ns.sub.B.1.0"].fields[0].data_type is by_name["ns.C.1.0"]
+
+        # The types processed by an earlier refresh are shipped to the workers and bound back to the same objects.
+        session = NamespaceSession(di / "ns", jobs=3)
+        before = {str(t): t for t in session.refresh()}
+        for name in ("A", "Leaf0"):  # More than one, otherwise the pool is not used.
+            os.utime(di / f"ns/{name}.1.0.dsdl", ns=(0, 0))
+        after = {str(t): t for t in session.refresh()}
+        assert [str(t) for t in session.rebuilt] == ["ns.A.1.0", "ns.Leaf0.1.0"]
+        assert after["ns.A.1.0"] is not before["ns.A.1.0"]
+        assert after["ns.A.1.0"].fields[0].data_type is before["ns.sub.B.1.0"] is after["ns.sub.B.1.0"]
+
+        # The error shall be the same as in the sequential mode: the first failure in the sorted order.
+        (di / "ns/Leaf3.1.0.dsdl").write_text("@assert false\n@sealed")
+        (di / "ns/Leaf7.1.0.dsdl").write_text("@assert false\n@sealed")
+        (di / "ns/sub/B.1.0.dsdl").write_text("ns.C.1.0 c\n@assert false\n@sealed")
+        for jobs in (1, 4):
+            with raises(AssertionCheckFailureError) as ex:
+                read_namespace(di / "ns", jobs=jobs)
+            assert ex.value.path is not None and ex.value.path.name == "B.1.0.dsdl"
+
+        with raises(ValueError):
+            read_namespace(di / "ns", jobs=0)
+
+
+def _unittest_collect_errors() -> None:
+    import tempfile
+    from pytest import raises
+    from ._data_type_builder import AssertionCheckFailureError
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "ns/sub").mkdir(parents=True)
+        (di / "other").mkdir()
+        (di / "ns/A.1.0.dsdl").write_text("uint8 x\n@assert false\n@sealed")
+        (di / "ns/B.1.0.dsdl").write_text("ns.A.1.0 a\n@sealed")  # Skipped because A is broken.
+        (di / "ns/sub/C.1.0.dsdl").write_text("ns.B.1.0 b\n@sealed")  # Skipped because B is skipped.
+        (di / "ns/D.1.0.dsdl").write_text("uint8 x\nuint8 x\n@sealed")
+        (di / "ns/E.1.0.dsdl").write_text("uint8 x = \n@sealed")
+        (di / "ns/F.1.0.dsdl").write_text("uint8 x\n@sealed")
+        (di / "ns/G.1.0.dsdl").write_text("other.X.1.0 x\n@sealed")
+        (di / "ns/H.1.0.dsdl").write_text("other.X.1.0 x\n@sealed")  # Skipped because X is broken.
+        (di / "ns/100.P.1.0.dsdl").write_text("@sealed")
+        (di / "ns/100.Q.1.0.dsdl").write_text("@sealed")
+        (di / "other/X.1.0.dsdl").write_text("@assert false\n@sealed")
+
+        outputs = []
+        for jobs in (1, 3):
+            with raises(CollectedErrors) as ex:
+                read_namespace(
+                    di / "ns", di / "other", allow_unregulated_fixed_port_id=True, jobs=jobs, errors="collect"
+                )
+            assert [str(x) for x in ex.value.types] == ["ns.F.1.0", "ns.P.1.0", "ns.Q.1.0"]
+            locations = [(e.path.relative_to(di).as_posix() if e.path else "", e.line) for e in ex.value.errors]
+            assert locations == [
+                ("ns/100.P.1.0.dsdl", None),
+                ("ns/100.Q.1.0.dsdl", None),
+                ("ns/A.1.0.dsdl", 2),
+                ("ns/D.1.0.dsdl", None),
+                ("ns/E.1.0.dsdl", 1),
+                ("other/X.1.0.dsdl", 1),
+            ]
+            assert str(ex.value).startswith("6 errors:\n")
+            outputs.append([str(e) for e in ex.value.errors])
+        assert outputs[0] == outputs[1]
+
+        with raises(AssertionCheckFailureError) as ex_raise:
+            read_namespace(di / "ns", di / "other", allow_unregulated_fixed_port_id=True)
+        assert ex_raise.value.path == di / "ns/A.1.0.dsdl"
+
+        for p in ["A", "B", "sub/C", "D", "E", "G", "H", "100.Q"]:
+            (di / "ns" / (p + ".1.0.dsdl")).unlink()
+        (di / "ns/AA.1.0.dsdl").write_text("ns.F.1.0 f\n@sealed")  # Processed after F but still listed first.
+        types = read_namespace(di / "ns", allow_unregulated_fixed_port_id=True, errors="collect")
+        assert [str(x) for x in types] == ["ns.AA.1.0", "ns.F.1.0", "ns.P.1.0"]
+
+        # The colliding definitions are reported and not read.
+        (di / "ns/Aa.1.0.dsdl").write_text("uint8 x\n@sealed")
+        for jobs in (1, 3):
+            with raises(CollectedErrors) as ex:
+                read_namespace(di / "ns", allow_unregulated_fixed_port_id=True, jobs=jobs, errors="collect")
+            assert [str(x) for x in ex.value.types] == ["ns.F.1.0", "ns.P.1.0"]
+            assert [e.path.name if e.path else "" for e in ex.value.errors] == ["AA.1.0.dsdl", "Aa.1.0.dsdl"]
+            assert all(isinstance(e, DataTypeNameCollisionError) for e in ex.value.errors)
+        (di / "ns/Aa.1.0.dsdl").unlink()
+
+        with raises(ValueError):
+            read_namespace(di / "ns", errors="ignore")
+
+
+def _unittest_collisions_indexed() -> None:
+    import random
+    import tempfile
+    from typing import NamedTuple
+    from pytest import raises
+
+    class Def(NamedTuple):
+        full_name: str
+        full_namespace: str
+        version: _serializable.Version
+        file_path: Path
+
+    def brute_force(tgs: List[Def], lus: List[Def]) -> None:
+        for tg in tgs:
+            for lu in lus:
+                _ensure_no_collisions_pairwise(tg, lu)  # type: ignore
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = [Path(directory, str(x)) for x in range(2)]
+        for f in files:
+            f.touch()
+        rng = random.Random(0)
+        names = ["a", "A", "b", "B", "c"]
+        for _ in range(300):
+            defs = []
+            for _ in range(rng.randint(1, 8)):
+                full_name = ".".join(rng.choice(names) for _ in range(rng.randint(2, 4)))
+                defs.append(
+                    Def(
+                        full_name,
+                        full_name.rsplit(".", 1)[0],
+                        _serializable.Version(1, rng.randint(0, 1)),
+                        rng.choice(files),
+                    )
+                )
+            targets = rng.sample(defs, rng.randint(1, len(defs)))
+            try:
+                brute_force(targets, defs)
+            except _error.InvalidDefinitionError as ex:
+                with raises(type(ex)) as ex_info:
+                    _ensure_no_collisions(targets, defs)  # type: ignore
+                assert str(ex_info.value) == str(ex)
+            else:
+                _ensure_no_collisions(targets, defs)  # type: ignore
+
+
+def _unittest_fixed_port_id_collisions_bucketed() -> None:
+    import random
+    from pytest import raises
+
+    def brute_force(types: List[_serializable.CompositeType]) -> None:
+        for a in types:
+            for b in types:
+                different_names = a.full_name != b.full_name
+                different_major_versions = a.version.major != b.version.major
+                same_kind = isinstance(a, _serializable.ServiceType) == isinstance(b, _serializable.ServiceType)
+                both_released = (a.version.major > 0) and (b.version.major > 0)
+                if same_kind and (different_names or (different_major_versions and both_released)):
+                    if a.has_fixed_port_id and b.has_fixed_port_id and a.fixed_port_id == b.fixed_port_id:
+                        raise FixedPortIDCollisionError(
+                            "The fixed port ID of this definition is also used in %s" % b.source_file_path,
+                            path=a.source_file_path,
+                        )
+
+    def make(index: int, service: bool, name: str, version: _serializable.Version, port_id: Optional[int]) -> Any:
+        path = Path("%d.dsdl" % index)  # Distinct paths make the error messages identify the offending pair.
+        if not service:
+            return _serializable.StructureType(name, version, [], False, port_id, path, False)
+        request, response = [
+            _serializable.StructureType(name + suffix, version, [], False, None, path, True)
+            for suffix in (".Request", ".Response")
+        ]
+        return _serializable.ServiceType(request, response, port_id)
+
+    rng = random.Random(0)
+    for _ in range(1000):
+        types = [
+            make(
+                index,
+                rng.random() < 0.5,
+                "ns." + rng.choice("ABC"),
+                _serializable.Version(rng.randint(0, 2), rng.randint(1, 2)),
+                rng.choice([None, 1, 2, 3]),
+            )
+            for index in range(rng.randint(1, 8))
+        ]
+        try:
+            brute_force(types)
+        except FixedPortIDCollisionError as ex:
+            with raises(FixedPortIDCollisionError) as ex_info:
+                _ensure_no_fixed_port_id_collisions(types)
+            assert str(ex_info.value) == str(ex)
+        else:
+            _ensure_no_fixed_port_id_collisions(types)
+
+
+def _unittest_session() -> None:
+    import os
+    import tempfile
+    from pytest import raises
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory).resolve()
+        root = di / "ns"
+        (root / "sub").mkdir(parents=True)
+        other = di / "other"
+        other.mkdir()
+
+        def write(path: Path, text: str) -> None:
+            path.write_text(text)
+            st = path.stat()  # Make sure the change is detected even if the file system timestamps are coarse.
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        write(root / "A.1.0.dsdl", "ns.sub.B.1.0 b\n@sealed\n")
+        write(root / "sub/B.1.0.dsdl", "other.C.1.0 c\n@sealed\n")
+        write(root / "D.1.0.dsdl", "@print 123\n@sealed\n")
+        write(other / "C.1.0.dsdl", "uint8 x\n@sealed\n")
+
+        printed = []  # type: List[Tuple[Path, int, str]]
+        session = NamespaceSession(root, [other], print_output_handler=lambda *x: printed.append(x))
+        assert session.types == []
+        assert session.root_namespace_directory == root
+        assert session.lookup_directories == [root, other]
+        assert "NamespaceSession" in repr(session)
+
+        first = session.refresh()
+        assert [str(t) for t in first] == ["ns.A.1.0", "ns.D.1.0", "ns.sub.B.1.0"]
+        assert session.rebuilt == first
+        assert printed == [(root / "D.1.0.dsdl", 1, "123")]
+
+        # Nothing changed, nothing rebuilt, nothing printed.
+        printed.clear()
+        assert session.refresh() == first
+        assert all(a is b for a, b in zip(session.types, first))
+        assert session.rebuilt == []
+        assert printed == []
+
+        # A change in a lookup directory affects the dependents only.
+        write(other / "C.1.0.dsdl", "uint16 x\n@sealed\n")
+        second = session.refresh()
+        assert [str(t) for t in session.rebuilt] == ["ns.A.1.0", "ns.sub.B.1.0"]
+        assert second[0].bit_length_set.max == 16
+        assert second[1] is first[1]
+        assert printed == []
+
+        # New definitions are picked up, removed ones are forgotten.
+        write(root / "E.1.0.dsdl", "ns.D.1.0 d\n@sealed\n")
+        (root / "sub/B.1.0.dsdl").unlink()
+        write(root / "A.1.0.dsdl", "@sealed\n")
+        third = session.refresh()
+        assert [str(t) for t in third] == ["ns.A.1.0", "ns.D.1.0", "ns.E.1.0"]
+        assert [str(t) for t in session.rebuilt] == ["ns.A.1.0", "ns.E.1.0"]
+        assert third[1] is first[1]
+
+        # The session survives errors.
+        write(root / "D.1.0.dsdl", "bad syntax\n")
+        with raises(_error.FrontendError):
+            session.refresh()
+        assert session.types == third  # Unchanged.
+        write(root / "D.1.0.dsdl", "@print 456\n@sealed\n")
+        printed.clear()
+        fourth = session.refresh()
+        assert [str(t) for t in session.rebuilt] == ["ns.D.1.0", "ns.E.1.0"]
+        assert fourth[0] is third[0]
+        assert printed == [(root / "D.1.0.dsdl", 1, "456")]
+
+        # The parallel mode reuses the unchanged definitions as well.
+        write(root / "A.1.0.dsdl", "other.C.1.0 c\n@sealed\n")
+        session = NamespaceSession(root, [other], jobs=2)
+        assert [str(t) for t in session.refresh()] == ["ns.A.1.0", "ns.D.1.0", "ns.E.1.0"]
+        write(root / "D.1.0.dsdl", "@sealed\n")
+        write(root / "A.1.0.dsdl", "other.C.1.0 c\nuint8 a\n@sealed\n")
+        assert [str(t) for t in session.refresh()] == ["ns.A.1.0", "ns.D.1.0", "ns.E.1.0"]
+        assert [str(t) for t in session.rebuilt] == ["ns.A.1.0", "ns.D.1.0", "ns.E.1.0"]
+
+        # Empty namespace.
+        for p in root.rglob("*.dsdl"):
+            p.unlink()
+        assert session.refresh() == []
+        assert session.rebuilt == []
+
+
+def _unittest_read_types() -> None:
+    import tempfile
+    from pytest import raises
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory).resolve()
+        (di / "ns/sub").mkdir(parents=True)
+        (di / "other").mkdir()
+        (di / "ns/A.1.0.dsdl").write_text("ns.sub.B.1.0 b\nother.C.1.0 c\n@sealed\n")
+        (di / "ns/sub/B.1.0.dsdl").write_text("C.1.0 c  # Not a reference to other.C; comments are ignored.\n@sealed\n")
+        (di / "ns/sub/C.1.0.dsdl").write_text("@print 123\n@sealed\n")
+        (di / "ns/Broken.1.0.dsdl").write_text("this is not processed\n")
+        (di / "other/C.1.0.dsdl").write_text("@sealed\n")
+        (di / "other/C.1.1.dsdl").write_text("@sealed\n")
+        lookup = [di / "ns", di / "other"]
+
+        printed = []  # type: List[Tuple[Path, int, str]]
+        types = read_types(
+            ["ns.A.1.0", ("ns.A", _serializable.Version(1, 0))],
+            lookup,
+            print_output_handler=lambda *x: printed.append(x),
+            jobs=None,
+        )
+        assert [str(t) for t in types] == ["ns.A.1.0", "ns.sub.B.1.0", "ns.sub.C.1.0", "other.C.1.0"]
+        assert printed == [(di / "ns/A.1.0.dsdl", 1, "123")]  # Attributed to the referrer as usual.
+        assert types[0].fields[0].data_type is types[1]
+
+        # Same output as read_namespace() for the subset.
+        full = read_namespace(di / "other")
+        assert [str(t) for t in read_types(["other.C.1.1", "other.C.1.0"], di / "other")] == [str(t) for t in full]
+        assert read_types([], lookup) == []
+
+        with raises(_data_type_builder.UndefinedDataTypeError, match=r".*ns\.A\.2\.0 could not be found.*"):
+            read_types(["ns.A.2.0"], lookup)
+        with raises(ValueError):
+            read_types(["ns.A"], lookup)
+        with raises(_error.InvalidDefinitionError):
+            read_types(["ns.Broken.1.0"], lookup)
+
+        # Validation of the processed subset.
+        (di / "ns/sub/c.1.0.dsdl").write_text("@sealed\n")
+        read_types(["other.C.1.0"], lookup)  # Unrelated to the collision.
+        with raises(DataTypeNameCollisionError):
+            read_types(["ns.sub.B.1.0"], lookup)
+        (di / "ns/sub/c.1.0.dsdl").unlink()
+        (di / "other/C.1.1.dsdl").write_text("uint8 x\n@extent 64\n")
+        with raises(ExtentConsistencyError):
+            read_types(["other.C.1.0", "other.C.1.1"], lookup)
+        read_types(["ns.A.1.0"], lookup)  # The inconsistency is outside of the processed subset.
+
+
+def _unittest_exclude_patterns() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory).resolve()
+        for rel in ["ns/A.1.0.dsdl", "ns/build/B.1.0.dsdl", "ns/.git/C.1.0.dsdl", "ns/sub/tmp/D.1.0.dsdl"]:
+            (di / rel).parent.mkdir(parents=True, exist_ok=True)
+            (di / rel).write_text("@sealed\n")
+        (di / "ns/build/B.1.0.dsdl").write_text("this is a broken leftover\n")
+
+        assert [p.relative_to(di / "ns").as_posix() for p in _find_dsdl_source_files(di / "ns")] == [
+            ".git/C.1.0.dsdl",
+            "A.1.0.dsdl",
+            "build/B.1.0.dsdl",
+            "sub/tmp/D.1.0.dsdl",
+        ]
+        types = read_namespace(di / "ns", exclude_patterns=[".git", "build", "sub/tmp"], jobs=2)
+        assert [str(t) for t in types] == ["ns.A.1.0"]
+        types = read_namespace(di / "ns", exclude_patterns=[".*", "build", "*/tmp"])
+        assert [str(t) for t in types] == ["ns.A.1.0"]
+        session = NamespaceSession(di / "ns", exclude_patterns=[".git", "build"])
+        assert [str(t) for t in session.refresh()] == ["ns.A.1.0", "ns.sub.tmp.D.1.0"]
+
+
+def _unittest_parser_backend() -> None:
+    import tempfile
+    from unittest import mock
+    from pytest import raises
+    from . import _handwritten_parser
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "ns").mkdir()
+        (di / "ns/A.1.0.dsdl").write_text("ns.B.1.0 b\n@sealed\n")
+        (di / "ns/B.1.0.dsdl").write_text("uint8 x\n@sealed\n")
+        with mock.patch.object(_handwritten_parser, "parse_ast", wraps=_handwritten_parser.parse_ast) as spy:
+            types = read_namespace(di / "ns", parser_backend="parsimonious")
+            assert spy.call_count == 0
+            assert read_namespace(di / "ns", parser_backend="handwritten") == types
+            assert spy.call_count == 2
+            assert read_types(["ns.A.1.0"], di / "ns", parser_backend="handwritten") == types
+            assert spy.call_count == 4
+            assert NamespaceSession(di / "ns", parser_backend="handwritten").refresh() == types
+            assert spy.call_count == 6
+            assert check_syntax(di / "ns", parser_backend="handwritten") == []
+            assert spy.call_count == 8
+        for fun in (read_namespace, check_syntax, NamespaceSession):
+            with raises(ValueError):
+                fun(di / "ns", parser_backend="bogus")  # type: ignore
+
+
+def _unittest_check_syntax() -> None:
+    import tempfile
+    from pytest import raises
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "ns/sub").mkdir(parents=True)
+        (di / "ns/A.1.0.dsdl").write_text("uint8 a\n@sealed\n")
+        (di / "ns/B.1.0.dsdl").write_text("# Header\n\nuint8[<] b\n@sealed\n")
+        (di / "ns/sub/C.1.0.dsdl").write_text("@sealed\nuint8 c = 'unterminated\n")
+        (di / "ns/sub/D.1.0.dsdl").write_text("uint8 d = 1 / 0\n@sealed\n")  # Semantic errors are not detected.
+        (di / "ns/sub/E.1.0.dsdl").write_text("@sealed\n@print 'bad \\z escape'\n")  # Interpreted when read.
+        expected = [("B.1.0.dsdl", 3), ("C.1.0.dsdl", 2), ("E.1.0.dsdl", 2)]
+        for jobs in (1, 3):
+            errors = check_syntax(di / "ns", jobs=jobs)
+            assert [(e.path.name if e.path else "", e.line) for e in errors] == expected
+            assert all(isinstance(e, _error.InvalidDefinitionError) for e in errors)
+            assert "Invalid escape sequence" in errors[-1].text
+        assert check_syntax(di / "ns", exclude_patterns=["B.*", "sub"]) == []
+
+        (di / "ns/Bad.dsdl").write_text("@sealed\n")
+        with raises(_dsdl_definition.FileNameFormatError):
+            check_syntax(di / "ns", jobs=3)
+
+
+def _unittest_parse_incremental() -> None:
+    import tempfile
+    from pytest import raises
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "ns").mkdir()
+        (di / "lib").mkdir()
+        (di / "lib/Item.1.0.dsdl").write_text("@print 'item'\nuint8 SIZE = 3\nuint8[SIZE] data\n@sealed\n")
+        (di / "ns/S.1.0.dsdl").write_text("@sealed\n---\n@sealed\n")  # Outdated, not used.
+        (di / "ns/Self.1.0.dsdl").write_text("ns.S.1.0 s\n@sealed\n")
+        printed = []  # type: List[Tuple[Path, int, str]]
+        text = "".join("uint8 a%d # Doc %d\n" % (i, i) for i in range(100)) + "@sealed\n---\n@assert _offset_ == {0}\n"
+        text += "lib.Item.1.0[<=2] items\n@print _offset_.max\n@extent 256\n"
+        result = parse_incremental(text, di / "ns/S.1.0.dsdl", di / "ns", di / "lib", lambda *x: printed.append(x))
+        assert result.error is None and result.text == text
+        initial = result.composite_type
+        assert isinstance(initial, _serializable.ServiceType)
+        item = initial.response_type.fields[0].data_type.element_type  # type: ignore
+        assert printed == [(di / "ns/S.1.0.dsdl", 1, "'item'"), (di / "ns/S.1.0.dsdl", 105, "56")]
+
+        offset = text.index("uint8 a50")
+        result = result.reparse(offset, offset + 5, "uint16")
+        offset = result.text.index("<=2]")
+        result = result.reparse(offset + 2, offset + 3, "3 + 1")
+        assert result.error is None and printed[-1][1:] == (105, "104")
+        out = result.composite_type
+        assert isinstance(out, _serializable.ServiceType)
+        assert str(out.request_type.fields[50].data_type) == "saturated uint16"
+        assert out.request_type.fields[50].doc == "Doc 50"
+        assert out.response_type.fields[0].data_type.capacity == 4  # type: ignore
+        assert out.response_type.fields[0].data_type.element_type is item  # type: ignore  # The lookup is kept.
+        assert out.response_type.extent == 256
+        assert initial.response_type.fields[0].data_type.capacity == 2  # type: ignore  # Results are immutable.
+
+        # The outcome is the same as if the text was read from the disk.
+        (di / "ns/S.1.0.dsdl").write_text(result.text)
+        _, expected = read_types(["ns.S.1.0"], [di / "ns", di / "lib"])
+        assert str(out.request_type.fields) == str(expected.request_type.fields)  # type: ignore
+        assert str(out.response_type.fields) == str(expected.response_type.fields)  # type: ignore
+
+        # Diagnostics; the errors found in the dependencies are reported too.
+        invalid = result.reparse(0, 0, "uint8 X = 1 / 0\n")
+        assert isinstance(invalid.error, _error.InvalidDefinitionError) and invalid.composite_type is None
+        assert (invalid.error.path, invalid.error.line) == (di / "ns/S.1.0.dsdl", 1)
+        offset = result.text.index("@extent")
+        invalid = result.reparse(offset, offset + len("@extent 256"), "")  # Detected when the type is constructed.
+        assert isinstance(invalid.error, _error.InvalidDefinitionError) and "extent" in invalid.error.text
+        assert invalid.error.path == di / "ns/S.1.0.dsdl"
+        invalid = result.reparse(0, 0, "uint8[<] x\n")
+        assert isinstance(invalid.error, _parser.DSDLSyntaxError) and invalid.error.line == 1
+        assert invalid.reparse(0, len("uint8[<] x\n"), "").composite_type is not None
+        result = parse_incremental("ns.Self.1.0 x\n@sealed\n", di / "ns/Self.1.0.dsdl", di / "ns")
+        assert isinstance(result.error, _data_type_builder.UndefinedDataTypeError)
+        result = parse_incremental("lib.Item.1.0 x\n@sealed\n", di / "ns/New.1.0.dsdl", di / "ns", di / "lib")
+        assert result.error is None and str(result.composite_type) == "ns.New.1.0"
+
+        with raises(_dsdl_definition.FileNameFormatError):
+            parse_incremental("@sealed\n", di / "ns/Bad.dsdl", di / "ns")
+        with raises(ValueError):
+            parse_incremental("@sealed\n", di / "ns/A.1.0.dsdl", di / "ns", parser_backend="bogus")
@@ -0,0 +1,315 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+"""
+Parallel processing of DSDL definitions.
+
+The dependency graph is obtained by a cheap lexical scan of each definition (no parsing involved).
+Definitions whose dependencies have all been processed are submitted to a process pool; the types produced by the
+workers are shipped to the workers that process the dependents, so that no definition is processed more than once.
+The types are exchanged through files in a temporary directory, one per definition, keyed by its index.
+Each file contains only the type of its definition; the types of the dependencies are stored as references
+(see :func:`_cache.dump_composite`) that are bound to the types already known to the receiving process.
+Hence, each worker loads each type at most once, and the types returned to the caller refer to each other
+the same way as in the sequential mode.
+Definitions that could not be processed in the pool for whatever reason (errors, dependency cycles, etc.) are
+left for the caller to process sequentially in the usual order, which yields the exact same error as the
+sequential mode and keeps the error semantics deterministic.
+"""
+
+import os
+import time
+import logging
+import tempfile
+import concurrent.futures
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from ._serializable import CompositeType, Version
+from . import _dsdl_definition
+from . import _cache
+from . import _parser
+
+
+_Key = Tuple[str, Version]
+
+_TaskResult = Tuple[int, bool, List[int], List[Tuple[int, str]]]
+"""Index of the definition, whether its type is stored, indices of its dependencies, and the print output."""
+
+
+def resolve_job_count(jobs: Optional[int]) -> int:
+    """
+    None means one job per CPU core.
+
+    >>> resolve_job_count(3)
+    3
+    >>> resolve_job_count(None) >= 1
+    True
+    """
+    if jobs is None:
+        return os.cpu_count() or 1
+    if not isinstance(jobs, int) or jobs < 1:
+        raise ValueError("The number of jobs shall be a positive integer or None, not %r" % jobs)
+    return jobs
+
+
+def process_in_parallel(
+    target_definitions: Sequence[_dsdl_definition.DSDLDefinition],
+    lookup_definitions: Sequence[_dsdl_definition.DSDLDefinition],
+    allow_unregulated_fixed_port_id: bool,
+    cache: Optional[_cache.DefinitionCache],
+    jobs: int,
+) -> Callable[[_dsdl_definition.DSDLDefinition, Callable[[int, str], None]], None]:
+    """
+    Processes the target definitions along with their dependencies from the lookup set in a process pool.
+    The results are stored in the definitions via :meth:`DSDLDefinition.set_cached_type`;
+    definitions that failed or were not processed are left untouched.
+
+    The print output produced by the workers cannot be delivered as it happens because the order of processing is
+    not deterministic. Instead, the returned callable shall be invoked for each target definition in order before
+    reading it; it replays the output of the target and of its dependencies that were processed in the pool.
+    """
+    universe = list(lookup_definitions)
+    index_of: Dict[_Key, int] = {(d.full_name, d.version): i for i, d in enumerate(universe)}
+    for d in target_definitions:
+        if (d.full_name, d.version) not in index_of:  # pragma: no cover
+            index_of[d.full_name, d.version] = len(universe)
+            universe.append(d)
+    # Targets may be separate objects that compare equal to the lookup definitions; both shall receive the results.
+    twins: Dict[int, List[_dsdl_definition.DSDLDefinition]] = {i: [d] for i, d in enumerate(universe)}
+    for d in target_definitions:
+        i = index_of[d.full_name, d.version]
+        if all(x is not d for x in twins[i]):
+            twins[i].append(d)
+
+    # Build the dependency graph restricted to the definitions that are actually needed.
+    # The definitions that have already been processed earlier are not processed again; their types are shipped
+    # to the workers along with the newly processed ones.
+    types: Dict[int, CompositeType] = {}
+    done: Dict[int, List[int]] = {}  # Index -> transitive dependencies.
+    direct: Dict[int, Set[int]] = {}
+    pending = [index_of[d.full_name, d.version] for d in target_definitions]
+    while pending:
+        i = pending.pop()
+        if i in direct:
+            continue
+        composite = universe[i].cached_type
+        if composite is not None:
+            types[i] = composite
+            done[i] = [index_of[d.full_name, d.version] for d in universe[i].dependencies]
+            direct[i] = set()
+            pending += done[i]
+            continue
+        direct[i] = {index_of[k] for k in universe[i].get_referenced_names() if k in index_of} - {i}
+        pending += list(direct[i])
+    already_done = len(done)
+    dependents: Dict[int, Set[int]] = {i: set() for i in direct}
+    for i, deps in direct.items():
+        for dep in deps:
+            dependents[dep].add(i)
+
+    started_at = time.monotonic()
+    printed: Dict[int, List[Tuple[int, str]]] = {}
+    failed: Set[int] = set()
+    stored: Set[int] = set()
+    with tempfile.TemporaryDirectory(prefix="pydsdl-") as directory, concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_initialize_worker,
+        initargs=(
+            [(d.file_path, d.root_namespace_path, d.parser_backend) for d in universe],
+            allow_unregulated_fixed_port_id,
+            cache,
+            Path(directory),
+        ),
+    ) as executor:
+        in_flight: Set["concurrent.futures.Future[_TaskResult]"] = set()
+
+        def submit(index: int) -> None:
+            closure: Set[int] = set()
+            for dep in direct[index]:
+                closure.add(dep)
+                closure.update(done[dep])
+            for x in closure - stored:  # Processed before this invocation, so the workers don't have it yet.
+                _store(Path(directory), x, types[x], [types[k] for k in done[x]])
+                stored.add(x)
+            # A transitive dependency has fewer transitive dependencies than its dependent, so this order allows
+            # the worker to load the dependencies before the types that refer to them.
+            ready = [(x, done[x]) for x in sorted(closure, key=lambda x: (len(done[x]), x))]
+            in_flight.add(executor.submit(_process, index, ready))
+
+        for i in sorted(i for i, deps in direct.items() if i not in done and all(x in done for x in deps)):
+            submit(i)
+        while in_flight:
+            finished, not_finished = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            in_flight.clear()
+            in_flight.update(not_finished)
+            for fut in finished:
+                index, ok, deps, out = fut.result()
+                if not ok:
+                    failed.add(index)
+                    continue
+                stored.add(index)
+                composite = _load(Path(directory), index, [types[k] for k in deps])
+                types[index] = composite
+                done[index] = deps
+                printed[index] = out
+                for d in twins[index]:
+                    d.set_cached_type(composite, [universe[x] for x in deps])
+                for dependent in sorted(dependents[index]):
+                    if dependent not in done and all(x in done for x in direct[dependent]):
+                        submit(dependent)
+
+    _logger.info(
+        "Processed %d of %d definitions using %d jobs in %.0f ms; %d failed",
+        len(done) - already_done,
+        len(direct) - already_done,
+        jobs,
+        (time.monotonic() - started_at) * 1e3,
+        len(failed),
+    )
+
+    replayed: Set[int] = set()
+
+    def replay(target: _dsdl_definition.DSDLDefinition, handler: Callable[[int, str], None]) -> None:
+        index = index_of[target.full_name, target.version]
+        for x in done.get(index, []) + [index]:
+            if x in printed and x not in replayed:
+                replayed.add(x)
+                for line_number, text in printed[x]:
+                    handler(line_number, text)
+
+    return replay
+
+
+def find_syntax_errors(
+    definitions: Sequence[_dsdl_definition.DSDLDefinition], jobs: int
+) -> List[_parser.DSDLSyntaxError]:
+    """
+    Constructs the syntax trees of the definitions (see :attr:`DSDLDefinition.ast`) in a process pool and returns
+    the syntax errors in the order of the definitions. No lookup is involved, so the definitions are independent.
+    The trees constructed by the workers are discarded rather than shipped back.
+    Definitions that the workers failed to parse for any other reason are parsed again by the caller,
+    so that the error is raised the same way as in the sequential mode.
+    """
+    outcomes: List[Tuple[bool, Optional[_parser.DSDLSyntaxError]]] = [(False, None)] * len(definitions)
+    started_at = time.monotonic()
+    if jobs > 1 and len(definitions) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            outcomes = list(
+                executor.map(
+                    _find_syntax_error,
+                    [(d.file_path, d.root_namespace_path, d.parser_backend) for d in definitions],
+                    chunksize=max(1, len(definitions) // (jobs * 4)),
+                )
+            )
+    out: List[_parser.DSDLSyntaxError] = []
+    for d, (completed, error) in zip(definitions, outcomes):
+        if not completed:
+            try:
+                d.check_syntax()
+            except _parser.DSDLSyntaxError as ex:
+                error = ex
+        if error is not None:
+            out.append(error)
+    _logger.info(
+        "Parsed %d definitions using %d jobs in %.0f ms; %d syntax errors",
+        len(definitions),
+        jobs,
+        (time.monotonic() - started_at) * 1e3,
+        len(out),
+    )
+    return out
+
+
+def _find_syntax_error(source: Tuple[Path, Path, str]) -> Tuple[bool, Optional[_parser.DSDLSyntaxError]]:
+    """Returns whether the definition was parsed (successfully or not) and the syntax error, if any."""
+    try:
+        file_path, root_namespace_path, parser_backend = source
+        _dsdl_definition.DSDLDefinition(file_path, root_namespace_path, parser_backend=parser_backend).check_syntax()
+    except _parser.DSDLSyntaxError as ex:
+        return True, ex
+    except Exception as ex:  # pylint: disable=broad-except
+        _logger.debug("%s: Parsing failed in the worker: %s", source[0], ex)
+        return False, None
+    return True, None
+
+
+class _WorkerContext:
+    """
+    The state of a worker process. The definitions are constructed once per worker and then reused between tasks,
+    so that the types that were processed or received by the worker earlier are not processed again.
+    """
+
+    def __init__(
+        self,
+        sources: List[Tuple[Path, Path, str]],
+        allow_unregulated_fixed_port_id: bool,
+        cache: Optional[_cache.DefinitionCache],
+        directory: Path,
+    ) -> None:
+        self.definitions = [
+            _dsdl_definition.DSDLDefinition(fp, root, parser_backend=backend) for fp, root, backend in sources
+        ]
+        self.index = _dsdl_definition.DefinitionIndex(self.definitions)
+        self.allow_unregulated_fixed_port_id = allow_unregulated_fixed_port_id
+        self.cache = cache
+        self.directory = directory
+
+
+_worker_context: Optional[_WorkerContext] = None
+
+
+def _initialize_worker(
+    sources: List[Tuple[Path, Path, str]],
+    allow_unregulated_fixed_port_id: bool,
+    cache: Optional[_cache.DefinitionCache],
+    directory: Path,
+) -> None:
+    global _worker_context  # pylint: disable=global-statement
+    _worker_context = _WorkerContext(sources, allow_unregulated_fixed_port_id, cache, directory)
+
+
+def _process(index: int, ready: List[Tuple[int, List[int]]]) -> _TaskResult:
+    ctx = _worker_context
+    assert ctx is not None, "Worker not initialized"
+    for i, deps in ready:
+        if ctx.definitions[i].cached_type is None:  # Otherwise, received or processed by this worker earlier.
+            dependencies = [ctx.definitions[x] for x in deps]
+            composite = _load(ctx.directory, i, [d.cached_type for d in dependencies])
+            ctx.definitions[i].set_cached_type(composite, dependencies)
+    target = ctx.definitions[index]
+    out: List[Tuple[int, str]] = []
+    try:
+        composite = target.read(
+            ctx.index,
+            lambda line_number, text: out.append((line_number, text)),
+            ctx.allow_unregulated_fixed_port_id,
+            ctx.cache,
+        )
+        index_of = {id(d): i for i, d in enumerate(ctx.definitions)}
+        deps = [index_of[id(d)] for d in target.dependencies]
+        _store(ctx.directory, index, composite, [ctx.definitions[x].cached_type for x in deps])
+    except Exception as ex:  # pylint: disable=broad-except
+        # The error will be reproduced by the caller in the sequential mode, so we don't need to ship it back.
+        _logger.debug("%s: Processing failed in the worker: %s", target, ex)
+        return index, False, [], []
+    return index, True, deps, out
+
+
+def _store(
+    directory: Path, index: int, composite: CompositeType, dependencies: Sequence[Optional[CompositeType]]
+) -> None:
+    data, _ = _cache.dump_composite(composite, dependencies)
+    (directory / str(index)).write_bytes(data)
+
+
+def _load(directory: Path, index: int, dependencies: Sequence[Optional[CompositeType]]) -> CompositeType:
+    def resolve(position: int) -> CompositeType:
+        out = dependencies[position]
+        assert out is not None, "The dependencies shall be loaded first"
+        return out
+
+    return _cache.load_composite((directory / str(index)).read_bytes(), resolve)
+
+
+_logger = logging.getLogger(__name__)
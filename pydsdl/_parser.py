@@ -2,9 +2,13 @@
 # This software is distributed under the terms of the MIT License.
 # Author: Pavel Kirienko <pavel@opencyphal.org>
 
+import os
+import re
 import typing
 import logging
-import itertools
+import pickle
+import hashlib
+import collections
 import functools
 import fractions
 from pathlib import Path
@@ -14,36 +18,140 @@ from parsimonious.nodes import Node as _Node
 from . import _error
 from . import _serializable
 from . import _expression
+from . import _ast
 
 
 class DSDLSyntaxError(_error.InvalidDefinitionError):
     pass
 
 
-def parse(text: str, statement_stream_processor: "StatementStreamProcessor") -> None:
+PARSER_BACKENDS = ("parsimonious", "handwritten")
+"""
+The parsimonious backend uses the generic packrat parser driven by ``grammar.parsimonious``.
+The handwritten backend implements the same grammar directly (see :mod:`pydsdl._handwritten_parser`); it is faster.
+Both produce identical syntax trees and identical syntax error locations.
+"""
+
+
+def parse(
+    text: str, statement_stream_processor: "StatementStreamProcessor", backend: typing.Optional[str] = None
+) -> None:
     """
     The entry point of the parser. As the text is being parsed, the parser invokes appropriate
     methods in the statement stream processor.
+    This is a shortcut for :func:`parse_ast` followed by :func:`evaluate`.
+    """
+    evaluate(parse_ast(text, backend), statement_stream_processor)
+
+
+def parse_ast(text: str, backend: typing.Optional[str] = None) -> _ast.Definition:
+    """
+    Parses the text into an abstract syntax tree without evaluating it; the result does not depend on anything
+    but the text. Raises :class:`DSDLSyntaxError` if the text is not a syntactically valid definition.
+
+    The backend is one of :data:`PARSER_BACKENDS`; see :func:`resolve_parser_backend`.
+    """
+    backend = resolve_parser_backend(backend)
+    if backend == "parsimonious" and _is_nested_deeply(text):
+        # The generic matcher recurses into every rule, so a deeply nested expression exhausts the call stack.
+        # The handwritten backend parses expressions without recursion and produces the same tree.
+        _logger.info("The definition is nested too deeply for the parsimonious backend, using the handwritten one")
+        backend = "handwritten"
+    if backend == "parsimonious":
+        try:
+            tree = _parse_line_scoped(text)
+        except parsimonious.ParseError as ex:
+            raise DSDLSyntaxError("Syntax error", line=int(ex.line())) from None  # type: ignore
+        except RecursionError:
+            # The screening is approximate (e.g., moderately nested brackets around a long chain of powers).
+            _logger.info("The definition is nested too deeply for the parsimonious backend, using the handwritten one")
+        else:
+            return _process_parse_tree(tree)
+    from . import _handwritten_parser  # pylint: disable=import-outside-toplevel,cyclic-import
+
+    return _handwritten_parser.parse_ast(text)
+
+
+def check_string_literals(definition: _ast.Definition) -> None:
+    """
+    Interprets the string literals of the tree, which is otherwise done during the evaluation (see :mod:`_ast`),
+    and raises :class:`DSDLSyntaxError` for the first malformed one. This is needed where the tree is checked
+    for syntax errors without being evaluated.
+    """
+    for node in definition.walk():
+        if isinstance(node, _ast.StringLiteral):
+            try:
+                _parse_string_literal(node.source)
+            except DSDLSyntaxError as ex:
+                ex.set_error_location_if_unknown(line=node.line)
+                raise ex
+
+
+def resolve_parser_backend(backend: typing.Optional[str]) -> str:
     """
-    pr = _ParseTreeProcessor(statement_stream_processor)
+    Returns the backend as-is if it is one of :data:`PARSER_BACKENDS`; raises :class:`ValueError` otherwise.
+    None means the default, which is taken from the environment variable ``PYDSDL_PARSER_BACKEND``,
+    or parsimonious if the variable is not set.
+
+    >>> resolve_parser_backend("handwritten")
+    'handwritten'
+    """
+    backend = backend or _DEFAULT_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError("Unknown parser backend %r; expected one of %r" % (backend, PARSER_BACKENDS))
+    return backend
+
+
+_NESTING_THRESHOLD = 16
+"""
+The parsimonious backend exhausts the default call stack at a few dozen levels of nested brackets,
+or at a hundred-odd chained right-associative operators; the limits are kept well below that.
+"""
+
+
+def _is_nested_deeply(text: str) -> bool:
+    """
+    A cheap conservative estimate of whether the text may be nested too deeply for the parsimonious backend.
+    Brackets and operators inside comments and string literals are counted too, which is harmless.
+
+    >>> _is_nested_deeply("uint8[(2 + 3) * 4] a")
+    False
+    >>> _is_nested_deeply("bool A = " + "!" * 100 + "true")
+    True
+    >>> _is_nested_deeply("uint8 B = " + "(" * 20 + "1" + ")" * 20)
+    True
+    """
+    if text.count("**") > _NESTING_THRESHOLD * 3 or text.count("!") > _NESTING_THRESHOLD * 6:
+        return True
+    depth = 0
+    for bracket in _BRACKET_PATTERN.findall(text):
+        depth = depth + 1 if bracket in "([{" else max(depth - 1, 0)
+        if depth > _NESTING_THRESHOLD:
+            return True
+    return False
+
+
+_BRACKET_PATTERN = re.compile(r"[()\[\]{}]")
+
+
+def _process_parse_tree(tree: _Node) -> _ast.Definition:
+    pr = _ParseTreeProcessor()
     try:
-        pr.visit(_get_grammar().parse(text))  # type: ignore
-    except _error.FrontendError as ex:
-        # Inject error location. If this exception is being propagated from a recursive instance, it already has
-        # its error location populated, so nothing will happen here.
-        ex.set_error_location_if_unknown(line=pr.current_line_number)
-        raise ex
-    except parsimonious.ParseError as ex:
-        raise DSDLSyntaxError("Syntax error", line=int(ex.line())) from None  # type: ignore
+        out = pr.visit(tree)
     except parsimonious.VisitationError as ex:  # pragma: no cover
-        # noinspection PyBroadException
-        try:
-            line = int(ex.original_class.line())
-        except Exception:  # pylint: disable=broad-except
-            line = pr.current_line_number
-        # Treat as internal because all intentional errors are not wrapped into VisitationError.
-        assert line > 0
-        raise _error.InternalError(str(ex), line=line) from ex
+        # Treat as internal because the syntax tree construction is not supposed to fail.
+        raise _error.InternalError(str(ex), line=pr.current_line_number) from ex
+    assert isinstance(out, _ast.Definition)
+    return out
+
+
+def evaluate(definition: _ast.Definition, statement_stream_processor: "StatementStreamProcessor") -> None:
+    """
+    The semantic analysis pass: walks the syntax tree, evaluates the expressions, and invokes the appropriate
+    methods of the statement stream processor in the order the statements appear in the text.
+    The same tree can be evaluated any number of times.
+    """
+    Evaluator(statement_stream_processor).run(definition.lines)
 
 
 class StatementStreamProcessor:
@@ -52,6 +160,8 @@ class StatementStreamProcessor:
     The methods are invoked immediately as corresponding statements are encountered within the
     processed DSDL definition.
     This interface can be used to construct a more abstract intermediate representation of the processed text.
+    Processors that are used with :mod:`pydsdl._incremental` shall support :func:`copy.copy`,
+    which shall produce an independent snapshot of the state of the processor.
     """
 
     def on_header_comment(self, comment: str) -> None:
@@ -87,17 +197,120 @@ class StatementStreamProcessor:
         raise NotImplementedError  # pragma: no cover
 
 
+def extract_versioned_type_references(text: str) -> List[Tuple[str, _serializable.Version]]:
+    """
+    A cheap lexical scan that finds all versioned data type references in the definition without parsing it.
+    The names are returned as written, so relative references have to be resolved by the caller.
+    The result may contain false positives if the text is malformed, but it never misses a valid reference.
+    The output is ordered by the first occurrence of each reference; duplicates are removed.
+
+    >>> for x in extract_versioned_type_references("ns.A.1.0[<2] a  # B.1.0 in comment\\nC.2_0.1 C = D.1.0.X + {1.0}"):
+    ...     print(x)
+    ('ns.A', Version(major=1, minor=0))
+    ('C', Version(major=20, minor=1))
+    ('D', Version(major=1, minor=0))
+    """
+    out: typing.Dict[Tuple[str, _serializable.Version], None] = {}  # Ordered set.
+    for line in text.splitlines():
+        line = _STRING_LITERAL_PATTERN.sub("''", line).split("#", 1)[0]
+        for m in _VERSIONED_TYPE_PATTERN.finditer(line):
+            name, major, minor = m.groups()
+            out[name, _serializable.Version(int(major.replace("_", "")), int(minor.replace("_", "")))] = None
+    return list(out)
+
+
+_STRING_LITERAL_PATTERN = re.compile(r"'[^'\\]*(?:\\.[^'\\]*)*'|\"[^\"\\]*(?:\\.[^\"\\]*)*\"")
+_VERSIONED_TYPE_PATTERN = re.compile(
+    r"(?<![\w.])([a-zA-Z_]\w*(?:\.[a-zA-Z_]\w*)*)\.(\d(?:_?\d)*)\.(\d(?:_?\d)*)(?![\w])"
+)
+
+
+def _parse_line_scoped(text: str) -> _Node:
+    """
+    Equivalent to ``_get_grammar().parse(text)`` but the packrat memo is discarded at every end of line.
+    The top-level rule ``definition = line (end_of_line line)*`` never backtracks across an end of line, so the
+    entries memoized for the preceding lines are never used again; keeping them would make the memory consumption
+    proportional to the length of the file rather than to the length of the longest line.
+    The resulting tree and the syntax errors are exactly the same.
+    """
+    definition = _get_grammar()["definition"]
+    line, tail = definition.members
+    end_of_line, _ = tail.members[0].members
+    error = parsimonious.ParseError(text)
+    head = line.match_core(text, 0, collections.defaultdict(dict), error)
+    if head is None:  # pragma: no cover
+        raise error
+    pos = head.end
+    children: List[_Node] = []
+    while pos < len(text):
+        cache: typing.DefaultDict[int, typing.Dict[int, typing.Any]] = collections.defaultdict(dict)
+        eol = end_of_line.match_core(text, pos, cache, error)
+        if eol is None:
+            break
+        ln = line.match_core(text, eol.end, cache, error)
+        if ln is None:  # pragma: no cover
+            break
+        children.append(_Node(tail.members[0], text, pos, ln.end, [eol, ln]))
+        pos = ln.end
+    if pos < len(text):
+        raise parsimonious.IncompleteParseError(text, pos, definition)
+    return _Node(definition, text, 0, pos, [head, _Node(tail, text, head.end, pos, children)])
+
+
+_DEFAULT_BACKEND = os.environ.get("PYDSDL_PARSER_BACKEND", "parsimonious")
+
+
+def compile_grammar(output_file: Path) -> None:
+    """
+    Stores the grammar into a precompiled artifact that is loaded by the parsimonious backend instead of compiling
+    the text grammar at the first use in every process. This is invoked by ``setup.py`` at build time to place
+    the artifact next to ``grammar.parsimonious`` in the built package.
+    The artifact carries a stamp that identifies the grammar and the library version; if it does not match,
+    the artifact is ignored and the text grammar is compiled as usual.
+    """
+    text = _GRAMMAR_FILE.read_text()
+    tmp = Path(str(output_file) + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(_get_grammar_stamp(text), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(parsimonious.Grammar(text), f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(output_file)
+
+
 @functools.lru_cache(None)
 def _get_grammar() -> parsimonious.Grammar:
-    return parsimonious.Grammar((Path(__file__).parent / "grammar.parsimonious").read_text())  # type: ignore
+    text = _GRAMMAR_FILE.read_text()
+    try:
+        with open(_GRAMMAR_FILE.parent / GRAMMAR_ARTIFACT_FILE_NAME, "rb") as f:
+            if pickle.load(f) == _get_grammar_stamp(text):
+                grammar = pickle.load(f)
+                if isinstance(grammar, parsimonious.Grammar):
+                    return grammar
+            _logger.info("The precompiled grammar %s is stale, using the text grammar", f.name)
+    except FileNotFoundError:
+        pass
+    except Exception as ex:  # pylint: disable=broad-except
+        _logger.info("The precompiled grammar could not be loaded, using the text grammar: %r", ex)
+    return parsimonious.Grammar(text)  # type: ignore
+
+
+def _get_grammar_stamp(text: str) -> str:
+    from . import __version__
+
+    key = "\n".join([__version__, str(_GRAMMAR_ARTIFACT_REVISION), text])
+    return hashlib.sha256(key.encode("utf8")).hexdigest()
+
+
+GRAMMAR_ARTIFACT_FILE_NAME = "grammar.pickle"
+
+_GRAMMAR_FILE = Path(__file__).parent / "grammar.parsimonious"
+_GRAMMAR_ARTIFACT_REVISION = 1
 
 
 _logger = logging.getLogger(__name__)
 
 
-_Children = typing.Tuple[typing.Any, ...]
+_Children = typing.Sequence[typing.Any]
 _VisitorHandler = typing.Callable[["_ParseTreeProcessor", _Node, _Children], typing.Any]
-_PrimitiveTypeConstructor = typing.Callable[[_serializable.PrimitiveType.CastMode], _serializable.PrimitiveType]
 
 
 def _make_typesafe_child_lifter(expected_type: typing.Type[object]) -> _VisitorHandler:
@@ -113,32 +326,46 @@ def _make_typesafe_child_lifter(expected_type: typing.Type[object]) -> _VisitorH
     return visitor_handler
 
 
-def _make_binary_operator_handler(operator: _expression.BinaryOperator[_expression.OperatorOutput]) -> _VisitorHandler:
-    return lambda _self, _node, _children: operator
+def _childless(handler: _VisitorHandler) -> _VisitorHandler:
+    """
+    Marks a visitor handler that only needs the node itself but not its visited children, e.g., because it works
+    with the text of the node directly. The subtree of such node is not traversed; the children are empty.
+    """
+    setattr(handler, "childless", True)
+    return handler
+
+
+@functools.lru_cache(None)
+def _get_dispatch_table() -> typing.Dict[str, typing.Tuple[_VisitorHandler, bool]]:
+    """
+    Maps the name of every grammar rule that has a handler in :class:`_ParseTreeProcessor` to the handler and
+    a flag telling whether the handler needs the visited children.
+    This replaces the per-node lookup of the handler by name that is done by :class:`parsimonious.NodeVisitor`.
+    """
+    table = {}
+    for rule_name in _get_grammar():
+        handler = getattr(_ParseTreeProcessor, "visit_" + rule_name, None)
+        if handler is not None:
+            table[rule_name] = handler, not getattr(handler, "childless", False)
+    return table
+
+
+@_childless
+def _visit_operator(_self: "_ParseTreeProcessor", node: _Node, _c: _Children) -> str:
+    return str(node.text)
 
 
 # noinspection PyMethodMayBeStatic
 class _ParseTreeProcessor(parsimonious.NodeVisitor):
     """
-    This class processes the parse tree, evaluates the expressions and emits a high-level representation
-    of the processed description. Essentially it does most of the ground work related to supporting the DSDL
-    language, which is bad because it makes the class unnecessarily complex and hard to maintain. Shall it be
-    needed to extend the language, please consider refactoring the logic by adding an intermediate abstract
-    syntax tree in order to separate the semantic analysis from the grammar-related logic. If that is done,
-    expression evaluation will be performed at the AST level rather than at the parse tree level, as it is
-    done currently.
+    This class transforms the parse tree into the abstract syntax tree defined in :mod:`pydsdl._ast`.
+    The semantic analysis is performed separately by :func:`evaluate`.
     """
 
-    # Intentional exceptions that shall not be treated as parse errors.
-    # Beware that those might be propagated from recursive parser instances!
-    unwrapped_exceptions = (_error.FrontendError, SystemError, MemoryError, SystemExit)  # type: ignore
-
-    def __init__(self, statement_stream_processor: StatementStreamProcessor):
-        assert isinstance(statement_stream_processor, StatementStreamProcessor)
-        self._statement_stream_processor = statement_stream_processor  # type: StatementStreamProcessor
+    def __init__(self) -> None:
         self._current_line_number = 1  # Lines are numbered from one
-        self._comment = ""
-        self._comment_is_header = True
+        self._line_start = 0  # The position of the beginning of the current line in the text
+        self._lines: List[_ast.Line] = []
         super().__init__()
 
     @property
@@ -146,147 +373,168 @@ class _ParseTreeProcessor(parsimonious.NodeVisitor):
         assert self._current_line_number > 0
         return self._current_line_number
 
-    # Misc. helpers
-    def _flush_comment(self) -> None:
-        if self._comment_is_header:
-            self._statement_stream_processor.on_header_comment(self._comment)
-        else:
-            self._statement_stream_processor.on_attribute_comment(self._comment)
-        self._comment_is_header = False
-        self._comment = ""
+    def _at(self, node: _Node) -> Tuple[int, int]:
+        """The line and column numbers of the node."""
+        return self._current_line_number, node.start - self._line_start + 1
+
+    def visit(self, node: _Node) -> typing.Any:
+        """
+        Unlike the recursive reflection-based :meth:`parsimonious.NodeVisitor.visit`, this traversal uses an explicit
+        stack and the handler table from :func:`_get_dispatch_table`.
+        A node without a handler is replaced with the tuple of its visited children, or with itself if it has none
+        (e.g., whitespace); no call is made for such nodes. The subtree of a node whose handler is marked with
+        :func:`_childless` is not traversed at all.
+        """
+        table = _get_dispatch_table()
+        results: List[typing.Any] = []
+        stack: List[typing.Any] = [node]
+        try:
+            while stack:
+                item = stack.pop()
+                if item.__class__ is tuple:  # All children of the node are visited, their results are on top.
+                    node, handler, start = item
+                    children = results[start:]
+                    del results[start:]
+                    results.append(handler(self, node, children) if handler is not None else tuple(children))
+                    continue
+                node = item
+                handler, needs_children = table.get(node.expr.name, (None, True))
+                if needs_children and node.children:
+                    stack.append((node, handler, len(results)))
+                    stack.extend(reversed(node.children))
+                else:
+                    results.append(handler(self, node, ()) if handler is not None else node)
+        except Exception as ex:
+            raise parsimonious.VisitationError(ex, type(ex), node) from ex
+        (out,) = results
+        return out
 
-    def generic_visit(self, node: _Node, visited_children: typing.Sequence[typing.Any]) -> typing.Any:
-        """If the node has children, replace the node with them."""
-        return tuple(visited_children) or node
+    def visit_definition(self, _n: _Node, _c: _Children) -> _ast.Definition:
+        return _ast.Definition(self._lines)
 
     def visit_line(self, node: _Node, children: _Children) -> None:
-        if len(node.text) == 0:
-            # Line is empty, flush comment
-            self._flush_comment()
+        statement, _, comment = children
+        self._lines.append(
+            _ast.Line(
+                self.current_line_number,
+                statement[0] if isinstance(statement, tuple) else None,
+                comment[0] if isinstance(comment, tuple) else None,
+                len(node.text) == 0,
+            )
+        )
 
-    def visit_end_of_line(self, _n: _Node, _c: _Children) -> None:
+    @_childless
+    def visit_end_of_line(self, node: _Node, _c: _Children) -> None:
         self._current_line_number += 1
+        self._line_start = node.end
 
     # ================================================== Statements ==================================================
 
-    visit_statement = _make_typesafe_child_lifter(type(None))  # Make sure all sub-nodes have been handled,
-    visit_statement_attribute = _make_typesafe_child_lifter(type(None))  # because processing terminates here; these
-    visit_statement_directive = _make_typesafe_child_lifter(type(None))  # nodes are above the top level.
+    visit_statement = _make_typesafe_child_lifter(_ast.Statement)
+    visit_statement_attribute = _make_typesafe_child_lifter(_ast.Statement)
+    visit_statement_directive = _make_typesafe_child_lifter(_ast.Directive)
 
-    def visit_comment(self, node: _Node, children: _Children) -> None:
+    @_childless
+    def visit_comment(self, node: _Node, _c: _Children) -> str:
         assert isinstance(node.text, str)
-        self._comment += "\n" if self._comment != "" else ""
-        self._comment += node.text[2:] if node.text.startswith("# ") else node.text[1:]
+        return node.text[2:] if node.text.startswith("# ") else node.text[1:]
 
-    def visit_statement_constant(self, _n: _Node, children: _Children) -> None:
+    def visit_statement_constant(self, node: _Node, children: _Children) -> _ast.Constant:
         constant_type, _sp0, name, _sp1, _eq, _sp2, exp = children
-        assert isinstance(constant_type, _serializable.SerializableType) and isinstance(name, str) and name
-        assert isinstance(exp, _expression.Any)
-        self._flush_comment()
-        self._statement_stream_processor.on_constant(constant_type, name, exp)
+        assert isinstance(constant_type, _ast.Type) and isinstance(name, str) and name
+        assert isinstance(exp, _ast.Expression)
+        return _ast.Constant(*self._at(node), constant_type, name, exp)
 
-    def visit_statement_field(self, _n: _Node, children: _Children) -> None:
+    def visit_statement_field(self, node: _Node, children: _Children) -> _ast.Field:
         field_type, _space, name = children
-        assert isinstance(field_type, _serializable.SerializableType) and isinstance(name, str) and name
-        self._flush_comment()
-        self._statement_stream_processor.on_field(field_type, name)
+        assert isinstance(field_type, _ast.Type) and isinstance(name, str) and name
+        return _ast.Field(*self._at(node), field_type, name)
 
-    def visit_statement_padding_field(self, _n: _Node, children: _Children) -> None:
+    def visit_statement_padding_field(self, node: _Node, children: _Children) -> _ast.PaddingField:
         void_type = children[0]
-        assert isinstance(void_type, _serializable.VoidType)
-        self._flush_comment()
-        self._statement_stream_processor.on_padding_field(void_type)
+        assert isinstance(void_type, _ast.VoidType)
+        return _ast.PaddingField(*self._at(node), void_type)
 
-    def visit_statement_service_response_marker(self, _n: _Node, _c: _Children) -> None:
-        self._flush_comment()
-        self._comment_is_header = True  # Allow response header comment
-        self._statement_stream_processor.on_service_response_marker()
+    @_childless
+    def visit_statement_service_response_marker(self, node: _Node, _c: _Children) -> _ast.ServiceResponseMarker:
+        return _ast.ServiceResponseMarker(*self._at(node))
 
-    def visit_statement_directive_with_expression(self, _n: _Node, children: _Children) -> None:
+    def visit_statement_directive_with_expression(self, node: _Node, children: _Children) -> _ast.Directive:
         _at, name, _space, exp = children
-        assert isinstance(name, str) and name and isinstance(exp, _expression.Any)
-        self._flush_comment()
-        self._statement_stream_processor.on_directive(
-            line_number=self.current_line_number, directive_name=name, associated_expression_value=exp
-        )
+        assert isinstance(name, str) and name and isinstance(exp, _ast.Expression)
+        return _ast.Directive(*self._at(node), name, exp)
 
-    def visit_statement_directive_without_expression(self, _n: _Node, children: _Children) -> None:
+    def visit_statement_directive_without_expression(self, node: _Node, children: _Children) -> _ast.Directive:
         _at, name = children
         assert isinstance(name, str) and name
-        self._flush_comment()
-        self._statement_stream_processor.on_directive(
-            line_number=self.current_line_number, directive_name=name, associated_expression_value=None
-        )
+        return _ast.Directive(*self._at(node), name, None)
 
+    @_childless
     def visit_identifier(self, node: _Node, _c: _Children) -> str:
         assert isinstance(node.text, str) and node.text
-        self._flush_comment()
         return node.text
 
     # ================================================== Data types ==================================================
 
-    visit_type = _make_typesafe_child_lifter(_serializable.SerializableType)
-    visit_type_array = _make_typesafe_child_lifter(_serializable.ArrayType)
-    visit_type_scalar = _make_typesafe_child_lifter(_serializable.SerializableType)
-    visit_type_primitive = _make_typesafe_child_lifter(_serializable.PrimitiveType)
+    visit_type = _make_typesafe_child_lifter(_ast.Type)
+    visit_type_array = _make_typesafe_child_lifter(_ast.ArrayType)
+    visit_type_scalar = _make_typesafe_child_lifter(_ast.Type)
+    visit_type_primitive = _make_typesafe_child_lifter(_ast.PrimitiveType)
 
     visit_type_primitive_name = parsimonious.NodeVisitor.lift_child
 
-    def visit_type_array_variable_inclusive(
-        self, _n: _Node, children: _Children
-    ) -> _serializable.VariableLengthArrayType:
+    def visit_type_array_variable_inclusive(self, node: _Node, children: _Children) -> _ast.ArrayType:
         element_type, _s0, _bl, _s1, _op, _s2, length, _s3, _br = children
-        return _serializable.VariableLengthArrayType(element_type, _unwrap_array_capacity(length))
+        return _ast.ArrayType(*self._at(node), element_type, "<=", length)
 
-    def visit_type_array_variable_exclusive(
-        self, _n: _Node, children: _Children
-    ) -> _serializable.VariableLengthArrayType:
+    def visit_type_array_variable_exclusive(self, node: _Node, children: _Children) -> _ast.ArrayType:
         element_type, _s0, _bl, _s1, _op, _s2, length, _s3, _br = children
-        return _serializable.VariableLengthArrayType(element_type, _unwrap_array_capacity(length) - 1)
+        return _ast.ArrayType(*self._at(node), element_type, "<", length)
 
-    def visit_type_array_fixed(self, _n: _Node, children: _Children) -> _serializable.FixedLengthArrayType:
+    def visit_type_array_fixed(self, node: _Node, children: _Children) -> _ast.ArrayType:
         element_type, _s0, _bl, _s1, length, _s2, _br = children
-        return _serializable.FixedLengthArrayType(element_type, _unwrap_array_capacity(length))
+        return _ast.ArrayType(*self._at(node), element_type, "", length)
 
-    def visit_type_versioned(self, _n: _Node, children: _Children) -> _serializable.CompositeType:
-        name, name_tail, _, version = children
-        assert isinstance(name, str) and name and isinstance(version, _serializable.Version)
+    def visit_type_versioned(self, node: _Node, children: _Children) -> _ast.VersionedType:
+        name, name_tail, _, (major, minor) = children
+        assert isinstance(name, str) and name and isinstance(major, int) and isinstance(minor, int)
+        components = [name]
         for _, component in name_tail:
             assert isinstance(component, str)
-            name += _serializable.CompositeType.NAME_COMPONENT_SEPARATOR + component
+            components.append(component)
+        return _ast.VersionedType(*self._at(node), components, major, minor)
 
-        return self._statement_stream_processor.resolve_versioned_data_type(name, version)
-
-    def visit_type_version_specifier(self, _n: _Node, children: _Children) -> _serializable.Version:
+    def visit_type_version_specifier(self, _n: _Node, children: _Children) -> Tuple[int, int]:
         major, _, minor = children
-        assert isinstance(major, _expression.Rational) and isinstance(minor, _expression.Rational)
-        return _serializable.Version(major=major.as_native_integer(), minor=minor.as_native_integer())
+        return major, minor
 
-    def visit_type_primitive_truncated(self, _n: _Node, children: _Children) -> _serializable.PrimitiveType:
-        _kw, _sp, cons = children  # type: _Node, _Node, _PrimitiveTypeConstructor
-        return cons(_serializable.PrimitiveType.CastMode.TRUNCATED)
+    def visit_type_primitive_truncated(self, node: _Node, children: _Children) -> _ast.PrimitiveType:
+        _kw, _sp, (name, bit_length) = children
+        return _ast.PrimitiveType(*self._at(node), "truncated", name, bit_length)
 
-    def visit_type_primitive_saturated(self, _n: _Node, children: _Children) -> _serializable.PrimitiveType:
-        _, cons = children  # type: _Node, _PrimitiveTypeConstructor
-        return cons(_serializable.PrimitiveType.CastMode.SATURATED)
+    def visit_type_primitive_saturated(self, node: _Node, children: _Children) -> _ast.PrimitiveType:
+        _, (name, bit_length) = children
+        return _ast.PrimitiveType(*self._at(node), "saturated", name, bit_length)
 
-    def visit_type_primitive_name_boolean(self, _n: _Node, _c: _Children) -> _PrimitiveTypeConstructor:
-        return typing.cast(_PrimitiveTypeConstructor, _serializable.BooleanType)
+    @_childless
+    def visit_type_primitive_name_boolean(self, _n: _Node, _c: _Children) -> Tuple[str, None]:
+        return "bool", None
 
-    def visit_type_primitive_name_unsigned_integer(self, _n: _Node, children: _Children) -> _PrimitiveTypeConstructor:
-        return lambda cm: _serializable.UnsignedIntegerType(children[-1], cm)
+    def visit_type_primitive_name_unsigned_integer(self, _n: _Node, children: _Children) -> Tuple[str, int]:
+        return "uint", children[-1]
 
-    def visit_type_primitive_name_signed_integer(self, _n: _Node, children: _Children) -> _PrimitiveTypeConstructor:
-        return lambda cm: _serializable.SignedIntegerType(children[-1], cm)
+    def visit_type_primitive_name_signed_integer(self, _n: _Node, children: _Children) -> Tuple[str, int]:
+        return "int", children[-1]
 
-    def visit_type_primitive_name_floating_point(self, _n: _Node, children: _Children) -> _PrimitiveTypeConstructor:
-        return lambda cm: _serializable.FloatType(children[-1], cm)
+    def visit_type_primitive_name_floating_point(self, _n: _Node, children: _Children) -> Tuple[str, int]:
+        return "float", children[-1]
 
-    def visit_type_void(self, _n: _Node, children: _Children) -> _serializable.VoidType:
+    def visit_type_void(self, node: _Node, children: _Children) -> _ast.VoidType:
         _, width = children
         assert isinstance(width, int)
-        return _serializable.VoidType(width)
+        return _ast.VoidType(*self._at(node), width)
 
+    @_childless
     def visit_type_bit_length_suffix(self, node: _Node, _c: _Children) -> int:
         return int(node.text)
 
@@ -301,8 +549,8 @@ class _ParseTreeProcessor(parsimonious.NodeVisitor):
     visit_op2_mul = parsimonious.NodeVisitor.lift_child
     visit_op2_exp = parsimonious.NodeVisitor.lift_child
 
-    def visit_expression_list(self, _n: _Node, children: _Children) -> Tuple[_expression.Any, ...]:
-        out = []  # type: List[_expression.Any]
+    def visit_expression_list(self, _n: _Node, children: _Children) -> List[_ast.Expression]:
+        out = []  # type: List[_ast.Expression]
         if children:
             children = children[0]
             assert len(children) == 2
@@ -310,40 +558,33 @@ class _ParseTreeProcessor(parsimonious.NodeVisitor):
             for _, _, _, exp in children[1]:
                 out.append(exp)
 
-        assert all(map(lambda x: isinstance(x, _expression.Any), out))
-        return tuple(out)
+        assert all(map(lambda x: isinstance(x, _ast.Expression), out))
+        return out
 
-    def visit_expression_parenthesized(self, _n: _Node, children: _Children) -> _expression.Any:
+    def visit_expression_parenthesized(self, _n: _Node, children: _Children) -> _ast.Expression:
         _, _, exp, _, _ = children
-        assert isinstance(exp, _expression.Any)
+        assert isinstance(exp, _ast.Expression)
         return exp
 
-    def visit_expression_atom(self, _n: _Node, children: _Children) -> _expression.Any:
+    def visit_expression_atom(self, node: _Node, children: _Children) -> _ast.Expression:
         (atom,) = children
-        if isinstance(atom, str):  # Identifier resolution
-            new_atom = self._statement_stream_processor.resolve_top_level_identifier(atom)
-            if not isinstance(new_atom, _expression.Any):
-                raise _error.InternalError(
-                    "Identifier %r resolved as %r, expected expression" % (atom, type(new_atom))
-                )  # pragma: no cover
-            atom = new_atom
-            del new_atom
-
-        assert isinstance(atom, _expression.Any)
+        if isinstance(atom, str):  # Identifier resolution is deferred until the semantic analysis.
+            return _ast.Identifier(*self._at(node), atom)
+        assert isinstance(atom, _ast.Expression)
         return atom
 
-    def _visit_binary_operator_chain(self, _n: _Node, children: _Children) -> _expression.Any:
+    def _visit_binary_operator_chain(self, node: _Node, children: _Children) -> _ast.Expression:
         left = children[0]
-        assert isinstance(left, _expression.Any)
+        assert isinstance(left, _ast.Expression)
+        operands, operators = [left], []
         for _, operator, _, right in children[1]:
-            assert callable(operator)
-            left = operator(left, right)
-            assert isinstance(left, _expression.Any)
-        return left
+            assert isinstance(operator, str) and isinstance(right, _ast.Expression)
+            operands.append(right)
+            operators.append(operator)
+        return _ast.OperatorChain(*self._at(node), operands, operators) if operators else left
 
     # Operators are handled through different grammar rules for precedence management purposes.
     # At the time of evaluation there is no point keeping them separate.
-    visit_ex_attribute = _visit_binary_operator_chain
     visit_ex_exponential = _visit_binary_operator_chain
     visit_ex_multiplicative = _visit_binary_operator_chain
     visit_ex_additive = _visit_binary_operator_chain
@@ -351,82 +592,324 @@ class _ParseTreeProcessor(parsimonious.NodeVisitor):
     visit_ex_comparison = _visit_binary_operator_chain
     visit_ex_logical = _visit_binary_operator_chain
 
+    def visit_ex_attribute(self, node: _Node, children: _Children) -> _ast.Expression:
+        left = children[0]
+        assert isinstance(left, _ast.Expression)
+        operands: List[_ast.Expression] = [left]
+        for item, (_, operator, _, name) in zip(node.children[1].children, children[1]):
+            assert operator == "." and isinstance(name, str)
+            operands.append(_ast.AttributeName(*self._at(item.children[3]), name))
+        return _ast.OperatorChain(*self._at(node), operands, ["."] * (len(operands) - 1)) if len(operands) > 1 else left
+
     # These are implemented via unary forms, no handling required.
     visit_ex_logical_not = parsimonious.NodeVisitor.lift_child
     visit_ex_inversion = parsimonious.NodeVisitor.lift_child
 
-    def visit_op1_form_log_not(self, _n: _Node, children: _Children) -> _expression.Any:
-        _op, _, exp = children
-        assert isinstance(_op, _Node) and isinstance(exp, _expression.Any)
-        return _expression.logical_not(exp)
-
-    def visit_op1_form_inv_pos(self, _n: _Node, children: _Children) -> _expression.Any:
-        _op, _, exp = children
-        assert isinstance(_op, _Node) and isinstance(exp, _expression.Any)
-        return _expression.positive(exp)
-
-    def visit_op1_form_inv_neg(self, _n: _Node, children: _Children) -> _expression.Any:
-        _op, _, exp = children
-        assert isinstance(_op, _Node) and isinstance(exp, _expression.Any)
-        return _expression.negative(exp)
-
-    visit_op2_log_or = _make_binary_operator_handler(_expression.logical_or)
-    visit_op2_log_and = _make_binary_operator_handler(_expression.logical_and)
-    visit_op2_cmp_equ = _make_binary_operator_handler(_expression.equal)
-    visit_op2_cmp_neq = _make_binary_operator_handler(_expression.not_equal)
-    visit_op2_cmp_leq = _make_binary_operator_handler(_expression.less_or_equal)
-    visit_op2_cmp_geq = _make_binary_operator_handler(_expression.greater_or_equal)
-    visit_op2_cmp_lss = _make_binary_operator_handler(_expression.less)
-    visit_op2_cmp_grt = _make_binary_operator_handler(_expression.greater)
-    visit_op2_bit_or = _make_binary_operator_handler(_expression.bitwise_or)
-    visit_op2_bit_xor = _make_binary_operator_handler(_expression.bitwise_xor)
-    visit_op2_bit_and = _make_binary_operator_handler(_expression.bitwise_and)
-    visit_op2_add_add = _make_binary_operator_handler(_expression.add)
-    visit_op2_add_sub = _make_binary_operator_handler(_expression.subtract)
-    visit_op2_mul_mul = _make_binary_operator_handler(_expression.multiply)
-    visit_op2_mul_div = _make_binary_operator_handler(_expression.divide)
-    visit_op2_mul_mod = _make_binary_operator_handler(_expression.modulo)
-    visit_op2_exp_pow = _make_binary_operator_handler(_expression.power)
-
-    def visit_op2_attrib(self, _n: _Node, _c: _Children) -> _expression.AttributeOperator[_expression.Any]:
-        return _expression.attribute
+    def _visit_unary_operator(self, node: _Node, children: _Children) -> _ast.Expression:
+        op, _, exp = children
+        assert isinstance(op, _Node) and isinstance(exp, _ast.Expression)
+        return _ast.UnaryOperator(*self._at(node), op.text, exp)
+
+    visit_op1_form_log_not = _visit_unary_operator
+    visit_op1_form_inv_pos = _visit_unary_operator
+    visit_op1_form_inv_neg = _visit_unary_operator
+
+    visit_op2_log_or = _visit_operator
+    visit_op2_log_and = _visit_operator
+    visit_op2_cmp_equ = _visit_operator
+    visit_op2_cmp_neq = _visit_operator
+    visit_op2_cmp_leq = _visit_operator
+    visit_op2_cmp_geq = _visit_operator
+    visit_op2_cmp_lss = _visit_operator
+    visit_op2_cmp_grt = _visit_operator
+    visit_op2_bit_or = _visit_operator
+    visit_op2_bit_xor = _visit_operator
+    visit_op2_bit_and = _visit_operator
+    visit_op2_add_add = _visit_operator
+    visit_op2_add_sub = _visit_operator
+    visit_op2_mul_mul = _visit_operator
+    visit_op2_mul_div = _visit_operator
+    visit_op2_mul_mod = _visit_operator
+    visit_op2_exp_pow = _visit_operator
+    visit_op2_attrib = _visit_operator
 
     # ================================================== Literals ==================================================
 
-    visit_literal = _make_typesafe_child_lifter(_expression.Any)
-    visit_literal_boolean = _make_typesafe_child_lifter(_expression.Boolean)
-    visit_literal_string = _make_typesafe_child_lifter(_expression.String)
+    visit_literal = _make_typesafe_child_lifter(_ast.Expression)
+    visit_literal_boolean = _make_typesafe_child_lifter(_ast.BooleanLiteral)
+    visit_literal_string = _make_typesafe_child_lifter(_ast.StringLiteral)
 
-    def visit_literal_set(self, _n: _Node, children: _Children) -> _expression.Set:
+    def visit_literal_set(self, node: _Node, children: _Children) -> _ast.SetLiteral:
         _, _, exp_list, _, _ = children
-        assert all(map(lambda x: isinstance(x, _expression.Any), exp_list))
-        return _expression.Set(exp_list)
+        assert all(map(lambda x: isinstance(x, _ast.Expression), exp_list))
+        return _ast.SetLiteral(*self._at(node), exp_list)
+
+    @_childless
+    def visit_literal_real(self, node: _Node, _c: _Children) -> _ast.RationalLiteral:
+        return _ast.RationalLiteral(*self._at(node), fractions.Fraction(node.text.replace("_", "")))
+
+    @_childless
+    def visit_literal_integer(self, node: _Node, _c: _Children) -> _ast.RationalLiteral:
+        return _ast.RationalLiteral(*self._at(node), fractions.Fraction(int(node.text.replace("_", ""), base=0)))
+
+    @_childless
+    def visit_literal_integer_decimal(self, node: _Node, _c: _Children) -> int:
+        return int(node.text.replace("_", ""))
+
+    @_childless
+    def visit_literal_boolean_true(self, node: _Node, _c: _Children) -> _ast.BooleanLiteral:
+        return _ast.BooleanLiteral(*self._at(node), True)
+
+    @_childless
+    def visit_literal_boolean_false(self, node: _Node, _c: _Children) -> _ast.BooleanLiteral:
+        return _ast.BooleanLiteral(*self._at(node), False)
+
+    @_childless
+    def visit_literal_string_single_quoted(self, node: _Node, _c: _Children) -> _ast.StringLiteral:
+        return _ast.StringLiteral(*self._at(node), node.text)
+
+    @_childless
+    def visit_literal_string_double_quoted(self, node: _Node, _c: _Children) -> _ast.StringLiteral:
+        return _ast.StringLiteral(*self._at(node), node.text)
+
+
+_BINARY_OPERATORS: typing.Dict[str, typing.Callable[[typing.Any, typing.Any], _expression.Any]] = {
+    "||": _expression.logical_or,
+    "&&": _expression.logical_and,
+    "==": _expression.equal,
+    "!=": _expression.not_equal,
+    "<=": _expression.less_or_equal,
+    ">=": _expression.greater_or_equal,
+    "<": _expression.less,
+    ">": _expression.greater,
+    "|": _expression.bitwise_or,
+    "^": _expression.bitwise_xor,
+    "&": _expression.bitwise_and,
+    "+": _expression.add,
+    "-": _expression.subtract,
+    "*": _expression.multiply,
+    "/": _expression.divide,
+    "%": _expression.modulo,
+    "**": _expression.power,
+    ".": _expression.attribute,
+}
+
+_UNARY_OPERATORS: typing.Dict[str, typing.Callable[[typing.Any], _expression.Any]] = {
+    "!": _expression.logical_not,
+    "+": _expression.positive,
+    "-": _expression.negative,
+}
+
+_PRIMITIVE_TYPES: typing.Dict[str, typing.Callable[..., _serializable.PrimitiveType]] = {
+    "bool": _serializable.BooleanType,
+    "uint": _serializable.UnsignedIntegerType,
+    "int": _serializable.SignedIntegerType,
+    "float": _serializable.FloatType,
+}
+
+_CAST_MODES = {
+    "saturated": _serializable.PrimitiveType.CastMode.SATURATED,
+    "truncated": _serializable.PrimitiveType.CastMode.TRUNCATED,
+}
+
+
+_ChildrenOf = typing.Callable[[typing.Any], typing.Sequence[_ast.Expression]]
+_Reducer = typing.Callable[[typing.Any, typing.List[typing.Any]], typing.Any]
+
+
+class Evaluator:
+    """
+    Evaluates the syntax tree in the depth-first left-to-right order, so that the entities are resolved and
+    the errors are reported in the order they appear in the text. The pending comment is flushed whenever
+    an identifier or a statement is encountered, as well as at every empty line: a comment that is followed
+    by an empty line or is the first one in the definition becomes the header comment; otherwise, it documents
+    the preceding attribute.
+    """
 
-    def visit_literal_real(self, node: _Node, _c: _Children) -> _expression.Rational:
-        return _expression.Rational(fractions.Fraction(node.text.replace("_", "")))
+    def __init__(self, statement_stream_processor: StatementStreamProcessor) -> None:
+        assert isinstance(statement_stream_processor, StatementStreamProcessor)
+        self._ssp = statement_stream_processor
+        self._current_line_number = 1
+        self._comment = ""
+        self._comment_is_header = True
+        self._handlers: typing.Dict[type, typing.Callable[[typing.Any], typing.Any]] = {
+            _ast.Identifier: self._evaluate_identifier,
+            _ast.AttributeName: self._evaluate_attribute_name,
+            _ast.RationalLiteral: lambda x: _expression.Rational(x.value),
+            _ast.StringLiteral: lambda x: _parse_string_literal(x.source),
+            _ast.BooleanLiteral: lambda x: _expression.Boolean(x.value),
+            _ast.PrimitiveType: self._evaluate_primitive_type,
+            _ast.VoidType: lambda x: _serializable.VoidType(x.bit_length),
+            _ast.VersionedType: self._evaluate_versioned_type,
+        }
+        # The composite nodes are mapped to the functions that list their children and that reduce the values of
+        # the children into the value of the node. The children are evaluated first, in the order they are listed.
+        self._reducers: typing.Dict[type, typing.Tuple[_ChildrenOf, _Reducer]] = {
+            _ast.OperatorChain: (lambda x: x.operands, _reduce_operator_chain),
+            _ast.UnaryOperator: (lambda x: (x.operand,), lambda x, v: _UNARY_OPERATORS[x.operator](v[0])),
+            _ast.SetLiteral: (lambda x: x.elements, lambda _, v: _expression.Set(tuple(v))),
+            _ast.ArrayType: (lambda x: (x.element_type, x.capacity), _reduce_array_type),
+        }
 
-    def visit_literal_integer(self, node: _Node, _c: _Children) -> _expression.Rational:
-        return _expression.Rational(int(node.text.replace("_", ""), base=0))
+    @property
+    def current_line_number(self) -> int:
+        assert self._current_line_number > 0
+        return self._current_line_number
 
-    def visit_literal_integer_decimal(self, node: _Node, _c: _Children) -> _expression.Rational:
-        return _expression.Rational(int(node.text.replace("_", "")))
+    @property
+    def state(self) -> typing.Tuple[int, str, bool]:
+        """
+        The state of the evaluator between the lines, which can be restored later to resume the evaluation
+        (provided that the state of the statement stream processor is also restored).
+        """
+        return self._current_line_number, self._comment, self._comment_is_header
+
+    @state.setter
+    def state(self, value: typing.Tuple[int, str, bool]) -> None:
+        self._current_line_number, self._comment, self._comment_is_header = value
+
+    def run(self, lines: typing.Iterable[_ast.Line]) -> None:
+        try:
+            for line in lines:
+                self._evaluate_line(line)
+        except _error.FrontendError as ex:
+            # Inject error location. If this exception is being propagated from a recursive instance, it already has
+            # its error location populated, so nothing will happen here.
+            ex.set_error_location_if_unknown(line=self.current_line_number)
+            raise ex
+        except (SystemError, MemoryError):  # pragma: no cover
+            raise
+        except Exception as ex:  # pylint: disable=broad-except
+            raise _error.InternalError(line=self.current_line_number, culprit=ex) from ex
+
+    def _evaluate_line(self, line: _ast.Line) -> None:
+        self._current_line_number = line.line
+        if line.statement is not None:
+            self._evaluate_statement(line.statement)
+        if line.comment is not None:
+            self._comment += "\n" if self._comment != "" else ""
+            self._comment += line.comment
+        if line.empty:
+            self._flush_comment()
 
-    def visit_literal_boolean_true(self, _n: _Node, _c: _Children) -> _expression.Boolean:
-        return _expression.Boolean(True)
+    def _flush_comment(self) -> None:
+        if self._comment_is_header:
+            self._ssp.on_header_comment(self._comment)
+        else:
+            self._ssp.on_attribute_comment(self._comment)
+        self._comment_is_header = False
+        self._comment = ""
 
-    def visit_literal_boolean_false(self, _n: _Node, _c: _Children) -> _expression.Boolean:
-        return _expression.Boolean(False)
+    def _evaluate_statement(self, statement: _ast.Statement) -> None:
+        ssp = self._ssp
+        if isinstance(statement, _ast.Field):
+            field_type = self._evaluate(statement.type)
+            self._flush_comment()  # Field name
+            self._flush_comment()
+            ssp.on_field(field_type, statement.name)
+        elif isinstance(statement, _ast.Constant):
+            constant_type = self._evaluate(statement.type)
+            self._flush_comment()  # Constant name
+            value = self._evaluate(statement.value)
+            self._flush_comment()
+            ssp.on_constant(constant_type, statement.name, value)
+        elif isinstance(statement, _ast.Directive):
+            self._flush_comment()  # Directive name
+            value = self._evaluate(statement.expression) if statement.expression is not None else None
+            self._flush_comment()
+            ssp.on_directive(
+                line_number=self.current_line_number,
+                directive_name=statement.name,
+                associated_expression_value=value,
+            )
+        elif isinstance(statement, _ast.PaddingField):
+            void_type = self._evaluate(statement.type)
+            self._flush_comment()
+            ssp.on_padding_field(void_type)
+        elif isinstance(statement, _ast.ServiceResponseMarker):
+            self._flush_comment()
+            self._comment_is_header = True  # Allow response header comment
+            ssp.on_service_response_marker()
+        else:  # pragma: no cover
+            raise _error.InternalError("Unexpected statement: %r" % statement)
+
+    def _evaluate(self, node: _ast.Expression) -> typing.Any:
+        """
+        Post-order traversal with an explicit stack because the expressions can be nested arbitrarily deep.
+        The stack holds the nodes to expand paired with None, and the nodes to reduce paired with the index
+        in the value stack where the values of their children begin.
+        """
+        handler = self._handlers.get(type(node))
+        if handler is not None:
+            return handler(node)  # Fast path for the most common case.
+        handlers, reducers = self._handlers, self._reducers
+        values: typing.List[typing.Any] = []
+        pending: typing.List[typing.Tuple[_ast.Expression, typing.Optional[int]]] = [(node, None)]
+        while pending:
+            node, start = pending.pop()
+            if start is not None:
+                out = reducers[type(node)][1](node, values[start:])
+                del values[start:]
+                values.append(out)
+                continue
+            handler = handlers.get(type(node))
+            if handler is not None:
+                values.append(handler(node))
+                continue
+            pending.append((node, len(values)))
+            pending += [(x, None) for x in reversed(reducers[type(node)][0](node))]
+        (out,) = values
+        return out
 
-    def visit_literal_string_single_quoted(self, node: _Node, _c: _Children) -> _expression.String:
-        return _parse_string_literal(node.text)
+    def _evaluate_identifier(self, node: _ast.Identifier) -> _expression.Any:
+        self._flush_comment()
+        out = self._ssp.resolve_top_level_identifier(node.name)
+        if not isinstance(out, _expression.Any):
+            raise _error.InternalError(
+                "Identifier %r resolved as %r, expected expression" % (node.name, type(out))
+            )  # pragma: no cover
+        return out
 
-    def visit_literal_string_double_quoted(self, node: _Node, _c: _Children) -> _expression.String:
-        return _parse_string_literal(node.text)
+    def _evaluate_attribute_name(self, node: _ast.AttributeName) -> str:
+        self._flush_comment()
+        return node.name
+
+    @staticmethod
+    def _evaluate_primitive_type(node: _ast.PrimitiveType) -> _serializable.PrimitiveType:
+        cast_mode = _CAST_MODES[node.cast_mode]
+        if node.bit_length is None:
+            return _PRIMITIVE_TYPES[node.name](cast_mode)
+        return _PRIMITIVE_TYPES[node.name](node.bit_length, cast_mode)
+
+    def _evaluate_versioned_type(self, node: _ast.VersionedType) -> _serializable.CompositeType:
+        for _ in node.name_components:
+            self._flush_comment()  # Every name component is an identifier
+        return self._ssp.resolve_versioned_data_type(
+            _serializable.CompositeType.NAME_COMPONENT_SEPARATOR.join(node.name_components),
+            _serializable.Version(major=node.major, minor=node.minor),
+        )
 
 
 #
 # Internal helper functions.
 #
+def _reduce_operator_chain(node: _ast.OperatorChain, values: typing.List[_expression.Any]) -> _expression.Any:
+    left = values[0]
+    for operator, right in zip(node.operators, values[1:]):
+        left = _BINARY_OPERATORS[operator](left, right)
+        assert isinstance(left, _expression.Any)
+    return left
+
+
+def _reduce_array_type(node: _ast.ArrayType, values: typing.List[typing.Any]) -> _serializable.ArrayType:
+    element_type, capacity = values[0], _unwrap_array_capacity(values[1])
+    if node.mode == "<=":
+        return _serializable.VariableLengthArrayType(element_type, capacity)
+    if node.mode == "<":
+        return _serializable.VariableLengthArrayType(element_type, capacity - 1)
+    return _serializable.FixedLengthArrayType(element_type, capacity)
+
+
 def _unwrap_array_capacity(ex: _expression.Any) -> int:
     assert isinstance(ex, _expression.Any)
     if isinstance(ex, _expression.Rational):
@@ -436,61 +919,147 @@ def _unwrap_array_capacity(ex: _expression.Any) -> int:
     raise _error.InvalidDefinitionError("Array capacity expression must yield a rational, not %s" % ex.TYPE_NAME)
 
 
+# The body of a string literal is a sequence of segments, each of which is either a run of plain characters or
+# a single well-formed escape sequence. The longest well-formed prefix ends where the first malformed escape begins.
+_STRING_LITERAL_ESCAPE_PATTERN = re.compile(r"\\(?:u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|[rntRNT\"'\\])")
+_STRING_LITERAL_PREFIX_PATTERN = re.compile(r"(?:[^\\]+|%s)*" % _STRING_LITERAL_ESCAPE_PATTERN.pattern)
+_STRING_LITERAL_ESCAPES = {
+    "\\r": "\r",
+    "\\R": "\r",
+    "\\n": "\n",
+    "\\N": "\n",
+    "\\t": "\t",
+    "\\T": "\t",
+    '\\"': '"',
+    "\\'": "'",
+    "\\\\": "\\",
+}
+
+
 def _parse_string_literal(literal: str) -> _expression.String:
     assert literal[0] == literal[-1]
     assert literal[0] in "'\""
     assert len(literal) >= 2
 
-    quote_symbol = literal[0]
-    iterator = iter(literal[1:-1])
+    body = literal[1:-1]
+    if "\\" not in body:
+        assert literal[0] not in body, "Unescaped quotes cannot appear inside string literals. Bad grammar?"
+        return _expression.String(body)
+    end = _STRING_LITERAL_PREFIX_PATTERN.match(body).end()  # type: ignore
+    if end < len(body):
+        # The error message refers to the number of symbols decoded before the malformed escape sequence.
+        index = len(_STRING_LITERAL_ESCAPE_PATTERN.sub(_decode_string_literal_escape, body[:end]))
+        raise _diagnose_string_literal_escape(body, end, index)
+    return _expression.String(_STRING_LITERAL_ESCAPE_PATTERN.sub(_decode_string_literal_escape, body))
 
-    def _next_symbol() -> str:
-        try:
-            s = next(iterator)  # type: str
-        except StopIteration:
-            return ""
-
-        if s != "\\":
-            assert s != quote_symbol, "Unescaped quotes cannot appear inside string literals. Bad grammar?"
-            return s
-
-        s = next(iterator)
-        if s in "uU":
-            h = ""
-            for _ in range(4 if s.islower() else 8):
-                s = next(iterator).lower()
-                if s not in "0123456789abcdef":
-                    raise DSDLSyntaxError("Invalid hex character: %r" % s)
-                h += s
-            return chr(int(h, 16))
 
-        try:
-            return {
-                "r": "\r",
-                "n": "\n",
-                "t": "\t",
-                '"': '"',
-                "'": "'",
-                "\\": "\\",
-            }[s.lower()]
-        except KeyError:
-            raise DSDLSyntaxError("Invalid escape sequence") from None
-
-    out = ""
-    for index in itertools.count():  # pragma: no branch
-        try:
-            symbol = _next_symbol()
-        except DSDLSyntaxError as ex:
-            raise DSDLSyntaxError("The string literal is malformed after index %d: %s" % (index, ex.text)) from None
-        except StopIteration:
-            raise DSDLSyntaxError("Unexpected end of string literal after index %d" % index) from None
-        else:
-            if len(symbol) == 0:
-                break
-            assert len(symbol) == 1
-            out += symbol
+def _decode_string_literal_escape(match: "re.Match[str]") -> str:
+    escape = match.group()
+    try:
+        return _STRING_LITERAL_ESCAPES[escape]
+    except KeyError:
+        return chr(int(escape[2:], 16))
+
+
+def _diagnose_string_literal_escape(body: str, position: int, index: int) -> DSDLSyntaxError:
+    """
+    Constructs the error for the malformed escape sequence at the specified position, where the segment pattern
+    did not match. The escape is examined symbol by symbol to report the first problem in the order of reading.
+    """
+    assert body[position] == "\\"
+    kind = body[position + 1 : position + 2]
+    if kind in ("u", "U"):
+        for s in body[position + 2 : position + (6 if kind == "u" else 10)]:
+            if s.lower() not in "0123456789abcdef":
+                message = "Invalid hex character: %r" % s.lower()
+                return DSDLSyntaxError("The string literal is malformed after index %d: %s" % (index, message))
+    elif kind:
+        return DSDLSyntaxError("The string literal is malformed after index %d: Invalid escape sequence" % index)
+    return DSDLSyntaxError("Unexpected end of string literal after index %d" % index)
+
+
+def _unittest_parse_line_scoped() -> None:
+    from pytest import raises
 
-    return _expression.String(out)
+    for text in [
+        "",
+        "\n",
+        "# Header\r\n\nuint8 a  # Comment\n@assert true\n---\nvoid2\n",
+        "uint8 A = 'multi\nline'\nuint8[<3] b",
+    ]:
+        assert _parse_line_scoped(text) == _get_grammar().parse(text)
+    for text in ["uint8x a", "uint8 a\n\nuint8 b = \n", "uint8 A = 'x\ny' junk\n", "bool a\r\r\n"]:
+        with raises(parsimonious.IncompleteParseError) as ei:
+            _get_grammar().parse(text)
+        with raises(parsimonious.IncompleteParseError) as ei_line_scoped:
+            _parse_line_scoped(text)
+        assert (ei.value.pos, ei.value.line()) == (ei_line_scoped.value.pos, ei_line_scoped.value.line())
+
+
+def _unittest_dispatch_table() -> None:
+    table = _get_dispatch_table()
+    handlers = {x[len("visit_") :] for x in dir(_ParseTreeProcessor) if x.startswith("visit_")}
+    assert handlers == set(table)  # Catch misspelled handlers, they would be silently ignored otherwise.
+    assert table["literal_real"] == (_ParseTreeProcessor.visit_literal_real, False)
+    assert table["ex_additive"][1]
+    assert "_" not in table
+
+    tree = _get_grammar().parse("float32 A = 1_0.5e-1  # C\n")
+    out = _ParseTreeProcessor().visit(tree)
+    assert isinstance(out, _ast.Definition)
+    assert repr(out.lines[0].statement.value) == "RationalLiteral(line=1, column=13, value=Fraction(21, 20))"
+    assert out.lines[0].comment == "C"
+
+
+def _unittest_deep_nesting_routing(caplog: typing.Any) -> None:
+    from unittest.mock import patch
+
+    shallow = "uint8 A = " + "(" * 8 + "1" + ")" * 8 + "\n"
+    deep = "uint8 A = " + "(" * 40 + "1" + ")" * 40 + "\n"
+    with patch(__name__ + "._parse_line_scoped", wraps=_parse_line_scoped) as parsimonious_parser:
+        with caplog.at_level(logging.INFO, logger=__name__):
+            assert parse_ast(shallow, "parsimonious") == parse_ast(shallow, "handwritten")
+            assert parsimonious_parser.call_count == 1
+            assert not caplog.records
+            assert parse_ast(deep, "parsimonious") == parse_ast(deep, "handwritten")
+            assert parsimonious_parser.call_count == 1  # Not attempted at all.
+            assert ["too deeply" in x.getMessage() for x in caplog.records] == [True]
+
+
+def _unittest_grammar_artifact() -> None:
+    import tempfile
+    from unittest.mock import patch
+
+    text = _GRAMMAR_FILE.read_text()
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        (di / "grammar.parsimonious").write_text(text)
+        artifact = di / GRAMMAR_ARTIFACT_FILE_NAME
+        compile_grammar(artifact)
+        assert not list(di.glob("*.tmp"))
+
+        def load() -> parsimonious.Grammar:
+            _get_grammar.cache_clear()
+            try:
+                with patch(__name__ + "._GRAMMAR_FILE", di / "grammar.parsimonious"):
+                    return _get_grammar()
+            finally:
+                _get_grammar.cache_clear()
+
+        sample = "uint8 a  # Comment\n@assert 1 + 2 == 3\n"
+        reference = parsimonious.Grammar(text).parse(sample)
+        assert load().parse(sample) == reference
+        with open(artifact, "wb") as f:  # Make sure the grammar is actually loaded from the artifact.
+            pickle.dump(_get_grammar_stamp(text), f)
+            pickle.dump(parsimonious.Grammar(text + '\nmarker = "marker"\n'), f)
+        assert "marker" in load()
+
+        (di / "grammar.parsimonious").write_text(text + "\n# Changed\n")  # Now the artifact is stale.
+        assert load().parse(sample) == reference
+        artifact.write_bytes(b"garbage")
+        assert load().parse(sample) == reference
+        artifact.unlink()
+        assert load().parse(sample) == reference
 
 
 def _unittest_parse_string_literal() -> None:
@@ -537,6 +1106,18 @@ def _unittest_parse_string_literal() -> None:
     with raises(DSDLSyntaxError, match=".*escape.*"):
         _parse_string_literal("'\\z'")
 
+    def fails(literal: str, message: str) -> None:
+        with raises(DSDLSyntaxError) as ei:
+            _parse_string_literal(literal)
+        assert ei.value.text == message
+
+    fails("'ab\\u12G4'", "The string literal is malformed after index 2: Invalid hex character: 'g'")
+    fails("'\\r\\Nab\\q'", "The string literal is malformed after index 4: Invalid escape sequence")
+    fails("'abc\\U0000'", "Unexpected end of string literal after index 3")
+    fails("'\\t\\'", "Unexpected end of string literal after index 1")
+    once("'\\R\\N\\T\\\"\\'\\\\'", "\r\n\t\"'\\")  # The escape letters are case-insensitive.
+    once('"' + "x\\u0041" * 10000 + '"', "xA" * 10000)
+
     once('"evening"', "evening")  # okay we support English, cool
     once('"вечер"', "вечер")  # and Russian too
     once('"õhtust"', "õhtust")  # heck, even Estonian
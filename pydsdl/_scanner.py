@@ -0,0 +1,202 @@
+# Copyright (c) 2023 OpenCyphal
+# This software is distributed under the terms of the MIT License.
+# Author: Pavel Kirienko <pavel@opencyphal.org>
+
+import os
+import fnmatch
+import logging
+import concurrent.futures
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class FileSystemScanner:
+    """
+    Finds files in directory trees using a single :func:`os.scandir` pass per directory regardless of the number
+    of file name patterns. Directory listing can be done concurrently in a thread pool, which helps on file systems
+    with high latency (network mounts, container overlays). Like :meth:`pathlib.Path.rglob`, the scanner does not
+    descend into symlinked directories.
+
+    The results of ``stat()`` and of the directory walks are cached for the lifetime of the instance, so an instance
+    shall be used only for the duration of one operation (e.g., one invocation of ``read_namespace()``) to avoid
+    returning outdated information.
+
+    Exclude patterns are matched using :func:`fnmatch.fnmatch` against the name of each file and directory and also
+    against its path relative to the scanned directory (with forward slashes); matching directories are skipped
+    entirely. For example, ``.git`` excludes all directories named so, while ``foo/build*`` excludes only those
+    directories whose names begin with ``build`` located in ``foo``.
+    """
+
+    def __init__(self, exclude_patterns: Iterable[str] = (), threads: int = 1) -> None:
+        if isinstance(exclude_patterns, (str, bytes)):
+            raise TypeError("Exclude patterns shall be an iterable of strings, not a single string")
+        self._exclude_patterns = list(map(str, exclude_patterns))
+        self._threads = int(threads)
+        if self._threads < 1:
+            raise ValueError("Invalid number of threads: %r" % threads)
+        self._entries: Dict[Path, "os.DirEntry[str]"] = {}
+        self._stats: Dict[Path, os.stat_result] = {}
+        self._found: Dict[Tuple[Path, Tuple[str, ...]], List[Path]] = {}
+
+    @property
+    def exclude_patterns(self) -> List[str]:
+        return list(self._exclude_patterns)
+
+    def find_files(self, directory: Path, patterns: Sequence[str]) -> List[Path]:
+        """
+        Returns the sorted list of all files located in the directory or its subdirectories whose names match
+        any of the patterns.
+        """
+        directory = Path(directory)
+        key = directory, tuple(patterns)
+        if key in self._found:
+            return list(self._found[key])
+        out: List[Path] = []
+        pending = [(directory, "")]
+        executor = concurrent.futures.ThreadPoolExecutor(self._threads) if self._threads > 1 else None
+        try:
+            while pending:
+                # The directories are processed level by level; the listings of one level are done concurrently.
+                listings: Iterator[Tuple[List[Path], List[Tuple[Path, str]]]]
+                if executor is not None:
+                    listings = executor.map(lambda x: self._list(x[0], x[1], patterns), pending)
+                else:
+                    listings = map(lambda x: self._list(x[0], x[1], patterns), pending)
+                pending = []
+                for files, subdirectories in listings:
+                    out += files
+                    pending += subdirectories
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self._found[key] = list(sorted(out))
+        return list(self._found[key])
+
+    def stat(self, path: Path) -> os.stat_result:
+        """
+        Like :meth:`pathlib.Path.stat` but cached. The files found by :meth:`find_files` are stat-ed using the
+        information obtained while listing the directory where possible.
+        """
+        path = Path(path)
+        try:
+            return self._stats[path]
+        except KeyError:
+            pass
+        entry = self._entries.get(path)
+        st = entry.stat() if entry is not None else path.stat()
+        self._stats[path] = st
+        return st
+
+    def samefile(self, a: Path, b: Path) -> bool:
+        """Like :meth:`pathlib.Path.samefile` but uses the cached stat results."""
+        sa, sb = self.stat(a), self.stat(b)
+        return (sa.st_dev, sa.st_ino) == (sb.st_dev, sb.st_ino)
+
+    def _list(
+        self, directory: Path, relative: str, patterns: Sequence[str]
+    ) -> Tuple[List[Path], List[Tuple[Path, str]]]:
+        files: List[Path] = []
+        subdirectories: List[Tuple[Path, str]] = []
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as ex:
+            if not relative:
+                raise  # The root itself is not accessible, which is not something we can ignore.
+            _logger.warning("Could not list directory %s: %r", directory, ex)
+            return files, subdirectories
+        for entry in entries:
+            entry_relative = (relative + "/" + entry.name) if relative else entry.name
+            if self._is_excluded(entry.name, entry_relative):
+                _logger.debug("Excluded: %s", entry.path)
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append((directory / entry.name, entry_relative))
+                elif any(fnmatch.fnmatch(entry.name, p) for p in patterns) and entry.is_file():
+                    path = directory / entry.name
+                    self._entries[path] = entry
+                    files.append(path)
+            except OSError as ex:  # pragma: no cover
+                _logger.warning("Could not access %s: %r", entry.path, ex)
+        return files, subdirectories
+
+    def _is_excluded(self, name: str, relative: str) -> bool:
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relative, p) for p in self._exclude_patterns)
+
+    def __repr__(self) -> str:
+        return "%s(exclude_patterns=%r, threads=%d)" % (type(self).__name__, self._exclude_patterns, self._threads)
+
+
+def make_scanner(scanner: Optional[FileSystemScanner]) -> FileSystemScanner:
+    """Returns the scanner as-is or a new default one if None."""
+    return scanner if scanner is not None else FileSystemScanner()
+
+
+_logger = logging.getLogger(__name__)
+
+
+def _unittest_scanner() -> None:
+    import tempfile
+    from pytest import raises
+
+    with tempfile.TemporaryDirectory() as directory:
+        di = Path(directory)
+        for rel in [
+            "A.1.0.dsdl",
+            "b/B.1.0.dsdl",
+            "b/B.1.0.uavcan",
+            "b/c/C.1.0.dsdl",
+            "b/c/readme.md",
+            ".git/X.1.0.dsdl",
+            "build/Y.1.0.dsdl",
+            "b/build/Z.1.0.dsdl",
+        ]:
+            (di / rel).parent.mkdir(parents=True, exist_ok=True)
+            (di / rel).write_text(rel)
+        (di / "dir.dsdl").mkdir()  # Directories are never matched even if the name matches the pattern.
+        try:
+            (di / "b/link").symlink_to(di / "b/c", target_is_directory=True)  # Not followed.
+        except OSError:  # pragma: no cover
+            pass
+
+        def find(*exclude: str, threads: int = 1) -> List[str]:
+            sc = FileSystemScanner(exclude, threads=threads)
+            return [p.relative_to(di).as_posix() for p in sc.find_files(di, ["*.dsdl", "*.uavcan"])]
+
+        everything = [
+            ".git/X.1.0.dsdl",
+            "A.1.0.dsdl",
+            "b/B.1.0.dsdl",
+            "b/B.1.0.uavcan",
+            "b/build/Z.1.0.dsdl",
+            "b/c/C.1.0.dsdl",
+            "build/Y.1.0.dsdl",
+        ]
+        assert find() == everything
+        assert find(threads=4) == everything
+        assert find(".git", "build") == ["A.1.0.dsdl", "b/B.1.0.dsdl", "b/B.1.0.uavcan", "b/c/C.1.0.dsdl"]
+        assert find("b/build", "*.uavcan") == [
+            x for x in everything if x not in ("b/build/Z.1.0.dsdl", "b/B.1.0.uavcan")
+        ]
+        assert find("b") == [".git/X.1.0.dsdl", "A.1.0.dsdl", "build/Y.1.0.dsdl"]
+
+        sc = FileSystemScanner()
+        (found,) = sc.find_files(di / "b/c", ["*.dsdl"])
+        assert sc.stat(found).st_size == len("b/c/C.1.0.dsdl")
+        (found).write_text("changed")
+        assert sc.stat(found).st_size == len("b/c/C.1.0.dsdl")  # Cached.
+        assert FileSystemScanner().stat(found).st_size == len("changed")
+        (di / "b/c/D.1.0.dsdl").touch()
+        assert sc.find_files(di / "b/c", ["*.dsdl"]) == [found]  # Cached.
+        assert sc.samefile(di / "b/c", di / "b/../b/c")
+        assert not sc.samefile(di / "b/c", di / "b")
+
+        with raises(OSError):
+            sc.find_files(di / "nonexistent", ["*"])
+        with raises(TypeError):
+            FileSystemScanner(".git")
+        with raises(ValueError):
+            FileSystemScanner(threads=0)
+        assert make_scanner(sc) is sc
+        assert "FileSystemScanner" in repr(make_scanner(None))
@@ -81,9 +81,11 @@ class SerializableType(_expression.Any):
     def __eq__(self, other: object) -> bool:
         if isinstance(other, SerializableType):
             same_type = isinstance(other, type(self)) and isinstance(self, type(other))
+            if not same_type or str(self) != str(other):
+                return False
+            # The bit length sets are compared last because the exact comparison may be costly.
             try:  # Ensure equality of the bit length sets, otherwise, different types like voids may compare equal.
-                same_bls = self.bit_length_set == other.bit_length_set
+                return self.bit_length_set == other.bit_length_set
             except TypeError:  # If the type is non-serializable, assume equality.
-                same_bls = same_type
-            return same_type and same_bls and str(self) == str(other)
+                return True
         return NotImplemented
@@ -4,6 +4,7 @@
 
 # pylint: disable=global-statement,protected-access,too-many-statements,consider-using-with,redefined-outer-name
 
+import sys
 import tempfile
 from typing import Union, Tuple, Optional, Sequence, Type, Iterable
 from pathlib import Path
@@ -592,12 +593,18 @@ def _unittest_error(wrkspc: Workspace) -> None:
             ],
         )
 
-    with raises(_data_type_builder.UndefinedDataTypeError):
+    with raises(_dsdl_definition.CircularDependencyError, match=r".*vendor\.circular_dependency\.A\.1\.0.*") as ex:
         defs = [
             wrkspc.parse_new("vendor/circular_dependency/A.1.0.dsdl", "B.1.0 b\n@sealed"),
             wrkspc.parse_new("vendor/circular_dependency/B.1.0.dsdl", "A.1.0 b\n@sealed"),
         ]
         parse_definition(defs[0], defs)
+    assert ex.value.path and ex.value.path.name == "B.1.0.dsdl"
+    assert ex.value.line == 1
+
+    with raises(_dsdl_definition.CircularDependencyError):
+        defs = [wrkspc.parse_new("vendor/circular_dependency/A.1.0.dsdl", "uint8 a\nA.1.0 b\n@sealed")]
+        parse_definition(defs[0], defs)
 
     with raises(_error.InvalidDefinitionError, match="(?i).*union directive.*"):
         parse_definition(
@@ -1958,6 +1965,39 @@ def _unittest_dsdl_parser_expressions(wrkspc: Workspace) -> None:
     )
 
 
+def _unittest_dsdl_parser_deep_expressions(wrkspc: Workspace) -> None:
+    depth = sys.getrecursionlimit() * 3
+    text = "\n".join(
+        [
+            "bool A = " + "!" * depth + "true",
+            "int64 B = " + "(" * depth + "-(" * depth + "1" + ")" * depth * 2,
+            "uint8 C = 1" + " ** 1" * depth,
+            "uint8[" + "(" * depth + "2" + ")" * depth + "] d",
+            "@assert {" + "{" * depth + "A" + "}" * depth + "}.count == 1",
+            "@assert " + " + ".join(["(1 * 2 - 1)"] * depth) + " == " + str(depth),
+            "@sealed",
+        ]
+    )
+    t = parse_definition(wrkspc.parse_new("ns/Deep.0.1.dsdl", text), [])
+    assert [(c.name, c.value.native_value) for c in t.constants] == [("A", depth % 2 == 0), ("B", 1), ("C", 1)]
+    assert isinstance(t.fields[0].data_type, _serializable.FixedLengthArrayType)
+    assert t.fields[0].data_type.capacity == 2
+
+
+def _unittest_dsdl_parser_wide_structure(wrkspc: Workspace) -> None:
+    fields = sys.getrecursionlimit() * 2
+    layout = ["uint8", "uint16[<=8]", "float32", "uint8[<=32]", "bool"]
+    text = "".join("%s f%d\n" % (layout[i % len(layout)], i) for i in range(fields)) + "@sealed\n"
+    t = parse_definition(wrkspc.parse_new("ns/Wide.0.1.dsdl", text), [])
+    per_layout = (8, 8 + 8 * 16, 32, 8 + 8 * 32, 1)
+    assert t.bit_length_set.max == sum(per_layout[i % len(layout)] for i in range(fields))
+    assert t.bit_length_set.is_aligned_at_byte()
+    offsets = [offset for _, offset in t.iterate_fields_with_offsets()]
+    assert len(offsets) == fields
+    assert offsets[-1].min == sum((8, 8, 32, 8, 1)[i % len(layout)] for i in range(fields - 1))
+    assert set(offsets[-1] % 8) == {(fields // len(layout) - 1) % 8}  # Only the bools are not byte-sized.
+
+
 def _unittest_pickle(wrkspc: Workspace) -> None:
     import pickle
 
@@ -2031,3 +2071,41 @@ def _unittest_public_api() -> None:
         expected_types = {root} | set(_collect_descendants(root))
         for t in expected_types:
             assert t.__name__ in dir(pydsdl), "Data type %r is not exported" % t
+
+
+def _unittest_parser_backend_conformance(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Runs the entire test suite above with every definition parsed by both backends,
+    verifying that the syntax trees (or the syntax errors) are identical.
+    """
+    import inspect
+    from typing import Any
+
+    original_parse_ast = _parser.parse_ast
+    parsed = [0]
+    current = [""]
+
+    def dual_parse_ast(text: str, backend: Optional[str] = None) -> Any:
+        del backend
+        outcomes = []
+        for backend in _parser.PARSER_BACKENDS:
+            try:
+                outcomes.append(original_parse_ast(text, backend=backend))
+            except _parser.DSDLSyntaxError as ex:
+                outcomes.append((ex.text, ex.line))
+        assert all(x == outcomes[0] for x in outcomes), "Divergence in %s:\n%s" % (current[0], text)
+        parsed[0] += 1
+        if isinstance(outcomes[0], tuple):
+            raise _parser.DSDLSyntaxError(outcomes[0][0], line=outcomes[0][1])
+        return outcomes[0]
+
+    monkeypatch.setattr(_parser, "parse_ast", dual_parse_ast)
+    this = _unittest_parser_backend_conformance.__name__
+    for name, fun in sorted(globals().items()):
+        if name.startswith("_unittest_") and name != this:
+            current[0] = name
+            if "wrkspc" in inspect.signature(fun).parameters:
+                fun(Workspace())
+            else:
+                fun()
+    assert parsed[0] > 100
@@ -4,6 +4,26 @@
 # Author: Pavel Kirienko <pavel@opencyphal.org>
 # type: ignore
 
+import sys
+from pathlib import Path
 import setuptools
+from setuptools.command.build_py import build_py
 
-setuptools.setup()
+
+class BuildPy(build_py):
+    """
+    Places the precompiled grammar into the built package; see ``pydsdl._parser.compile_grammar()``.
+    """
+
+    def run(self):
+        super().run()
+        if not self.dry_run:
+            sys.path.insert(0, str(Path(__file__).resolve().parent))
+            from pydsdl import _parser
+
+            output_file = Path(self.build_lib) / "pydsdl" / _parser.GRAMMAR_ARTIFACT_FILE_NAME
+            _parser.compile_grammar(output_file)
+            self.announce(f"Precompiled grammar: {output_file}", level=2)
+
+
+setuptools.setup(cmdclass={"build_py": BuildPy})